@@ -0,0 +1,33 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import argparse
+
+from stream_simulator.benchmarks import BENCHMARKS, run
+
+parser = argparse.ArgumentParser(
+    description = "Offline benchmarks of the simulator hot paths, " \
+        "on an in-process transport and synthetic worlds. For example:\n" \
+        ">> python3 benchmark.py --quick --only tf raycast -o results.json",
+    formatter_class = argparse.RawDescriptionHelpFormatter
+)
+parser.add_argument("--only", nargs = "+", choices = list(BENCHMARKS),
+    help = "benchmarks to run (default: all)")
+parser.add_argument("--quick", action = "store_true",
+    help = "fewer sizes and rounds, for a smoke run")
+parser.add_argument("-o", "--output",
+    help = "JSON file to write the results to (default: stdout)")
+args = parser.parse_args()
+
+report = run(
+    only = args.only,
+    quick = args.quick,
+    log = lambda m: print(m, file = sys.stderr)
+)
+if args.output is None:
+    print(json.dumps(report, indent = 2))
+else:
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent = 2)
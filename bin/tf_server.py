@@ -0,0 +1,25 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import sys
+
+from stream_simulator import TfServer
+
+if len(sys.argv) < 2:
+    print("You must provide a valid yaml name as argument, and optionally the tf shard and the device name. For example:")
+    print(">> python3 tf_server.py elsa [shard_0] [device_0]")
+    print("Without shard it serves the simulation's tf, or the router of its shards")
+    exit(0)
+
+c = sys.argv[1]
+
+_shard = None
+if len(sys.argv) >= 3 and sys.argv[2] != "-":
+    _shard = sys.argv[2]
+
+_device_sim_name = None
+if len(sys.argv) >= 4:
+    _device_sim_name = sys.argv[3]
+
+s = TfServer(conf_file = c, device_sim_name = _device_sim_name, shard = _shard)
+s.start()
@@ -3,5 +3,8 @@
 
 from __future__ import absolute_import
 
+from .sim_clock import SimClock
+from .tick_scheduler import TickScheduler
+from .async_tick_scheduler import AsyncTickScheduler
 from .base_thing import BaseThing
 from .basic_sensor import BasicSensor
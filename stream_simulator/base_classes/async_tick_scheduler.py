@@ -0,0 +1,140 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import threading
+import concurrent.futures
+
+from commlib.logger import Logger
+
+from stream_simulator.base_classes.sim_clock import SimClock
+from stream_simulator.base_classes.tick_scheduler import TickJob
+
+class AsyncTickScheduler:
+    # Asyncio runtime of the simulator: a single event loop, on a thread of
+    # its own, runs the periodic work of all the devices. Coroutine jobs
+    # (the `<sample>_async` methods of the devices) run on the loop itself;
+    # plain jobs, which may block on commlib calls, run on a small thread
+    # pool. Same interface and timing rules as TickScheduler.
+    is_async = True
+
+    def __init__(self, workers = 4, clock = None):
+        self.logger = Logger("async_tick_scheduler")
+        self.workers = workers
+        self.clock = SimClock.get() if clock is None else clock
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers = workers
+        )
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(self.executor)
+        self.thread = None
+        self.running = False
+        self.stepped = asyncio.Event()
+        self.jobs = []
+        self.busy = 0
+        self.clock.on_step(self.wake)
+
+    def add(self, function, hz, name = None, active = None):
+        job = TickJob(function, 1.0 / hz, name, active)
+        job.due = self.clock.time() + job.period
+        asyncio.run_coroutine_threadsafe(self.run_job(job), self.loop)
+        return job
+
+    async def run_job(self, job):
+        is_coroutine = asyncio.iscoroutinefunction(job.function)
+        self.jobs.append(job)
+        try:
+            while self.running:
+                await self.wait_until(job.due)
+                if job.cancelled or (job.active is not None and not job.active()):
+                    return
+                self.busy += 1
+                try:
+                    await self.tick(job, is_coroutine)
+                finally:
+                    self.busy -= 1
+        finally:
+            self.jobs.remove(job)
+
+    async def tick(self, job, is_coroutine):
+        try:
+            if is_coroutine:
+                await job.function()
+            else:
+                await self.loop.run_in_executor(None, job.function)
+        except Exception as e:
+            self.logger.error(f"Tick of {job.name} failed: {str(e)}")
+        job.ticks += 1
+
+        job.due += job.period
+        now = self.clock.time()
+        if job.due < now:
+            missed = int((now - job.due) / job.period) + 1
+            job.missed += missed
+            job.due += missed * job.period
+
+    async def wait_until(self, due):
+        while True:
+            wait = due - self.clock.time()
+            if wait <= 0:
+                return
+            timeout = self.clock.real_timeout(wait)
+            if timeout is None:
+                await self.stepped.wait()
+            else:
+                await asyncio.sleep(timeout)
+
+    # Called from the thread stepping the clock
+    def wake(self):
+        self.loop.call_soon_threadsafe(self.release)
+
+    def release(self):
+        stepped = self.stepped
+        self.stepped = asyncio.Event()
+        stepped.set()
+
+    # Same as TickScheduler.settle
+    def settle(self, timeout = 5):
+        end = time.time() + timeout
+        now = self.clock.time()
+        while self.busy > 0 or \
+                any(j.due <= now and not j.cancelled for j in list(self.jobs)):
+            if time.time() > end:
+                return False
+            time.sleep(0.001)
+        return True
+
+    # Runs a blocking call off the loop
+    async def blocking(self, function, *args):
+        return await self.loop.run_in_executor(None, function, *args)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(
+            target = self.loop.run_forever,
+            daemon = True
+        )
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        future = asyncio.run_coroutine_threadsafe(self.cancel_jobs(), self.loop)
+        try:
+            future.result(timeout = 1)
+        except Exception as e:
+            self.logger.warning(f"Jobs not cancelled cleanly: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout = 1)
+        self.executor.shutdown(wait = False)
+
+    async def cancel_jobs(self):
+        tasks = [t for t in asyncio.all_tasks() \
+            if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions = True)
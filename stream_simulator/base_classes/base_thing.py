@@ -1,10 +1,68 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import asyncio
+import functools
+
 from commlib.logger import Logger
 from derp_me.client import DerpMeClient
 
+from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.base_classes.sim_clock import SimClock
+from stream_simulator.base_classes.tick_scheduler import TickScheduler
+
 class BaseThing:
     id = 0
     def __init__(self):
         BaseThing.id += 1
+        self.tick_jobs = {}
+
+    # Timestamps and sleeps of the devices follow the simulation clock
+    @property
+    def clock(self):
+        return SimClock.get()
+
+    # Runs function at hz on the simulator's scheduler while the device is
+    # enabled. Scheduling the same function again replaces its job. In the
+    # asyncio runtime the `<function>_async` coroutine is used if defined.
+    def schedule(self, function, hz):
+        key = function.__name__
+        if key in self.tick_jobs:
+            self.tick_jobs[key].cancel()
+        scheduler = TickScheduler.get()
+        if scheduler.is_async:
+            function = getattr(self, key + "_async", function)
+        self.tick_jobs[key] = scheduler.add(
+            function,
+            hz,
+            name = f"{self.name}.{key}",
+            active = lambda: self.info["enabled"]
+        )
+        return self.tick_jobs[key]
+
+    # Publishes a sample on the device stream and stores it as the latest
+    # value of the device, through the sample sink
+    def write_sample(self, sample, publisher = None, key = None, stored = None):
+        CommlibFactory.getSampleSink().write(
+            self.publisher if publisher is None else publisher,
+            self.derp_data_key if key is None else key,
+            sample,
+            stored = stored
+        )
+
+    # Same as write_sample, from the asyncio runtime: a batching sink only
+    # holds the sample, so it is written on the loop, otherwise the publish
+    # is made off it
+    async def write_sample_async(self, sample, publisher = None, key = None,
+            stored = None):
+        write = functools.partial(self.write_sample, sample,
+            publisher = publisher, key = key, stored = stored)
+        if CommlibFactory.getSampleSink().batch:
+            return write()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, write)
+
+    def unschedule(self):
+        for key in self.tick_jobs:
+            self.tick_jobs[key].cancel()
+        self.tick_jobs = {}
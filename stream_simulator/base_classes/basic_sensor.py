@@ -1,21 +1,21 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
-import abc
 
 from colorama import Fore, Style
 
 from commlib.logger import Logger
 from stream_simulator.base_classes import BaseThing
-from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.connectivity import CommlibFactory, AsyncRPCClient
 
 class BasicSensor(BaseThing):
+    # Value of the sensor from its tf affections, set by the simulated sensors
+    simulation_value = None
+
     def __init__(self,
                  conf = None,
                  package = None,
@@ -122,11 +122,7 @@ class BasicSensor(BaseThing):
         return {}
 
     def sensor_read(self):
-        # Wait till commlib_factory is up
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
-
-        self.logger.info(f"Sensor {self.name} read thread started")
+        self.logger.info(f"Sensor {self.name} sampling started")
         # Operation parameters
 
         try:
@@ -144,55 +140,79 @@ class BasicSensor(BaseThing):
         except Exception as e:
             self.logger.warning(f"Missing operation parameters for {self.name}: {str(e)}. Change operation with caution!")
 
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.hz)
-
-            val = None
-            if self.mode in ["mock"]:
-                if self.operation == "constant":
-                    val = self.constant_value
-                elif self.operation == "random":
-                    val = random.uniform(
-                        self.random_min,
-                        self.random_max
-                    )
-                elif self.operation == "normal":
-                    val = random.gauss(
-                        self.normal_mean,
-                        self.normal_std
-                    )
-                elif self.operation == "triangle":
-                    val = self.prev + self.way * self.triangle_step
-                    if val >= self.triangle_max or val <= self.triangle_min:
-                        self.way *= -1
-                    self.prev = val
-                elif self.operation == "sinus":
-                    val = self.sinus_dc + self.sinus_amp * math.sin(self.prev)
-                    self.prev += self.sinus_step
-                else:
-                    self.logger.warning(f"Unsupported operation: {self.operation}")
-
-            elif self.mode == "simulation":
-                val = self.get_simulation_value()
-
-            # Publishing value:
-            self.publisher.publish({
-                "value": val,
-                "timestamp": time.time()
-            })
+        self.schedule(self.sensor_sample, self.hz)
 
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "value": val,
-                    "timestamp": time.time()
-                }]
+    def sensor_sample(self):
+        # Wait till commlib_factory is up
+        if CommlibFactory.get_tf_affection == None:
+            return
+
+        val = None
+        if self.mode in ["mock"]:
+            val = self.mock_value()
+        elif self.mode == "simulation":
+            val = self.get_simulation_value()
+
+        # Publishing and storing value:
+        self.write_sample({
+            "value": val,
+            "timestamp": self.clock.time()
+        })
+
+    # Asyncio runtime: the affections are awaited on the loop
+    async def sensor_sample_async(self):
+        if CommlibFactory.get_tf_affection == None:
+            return
+
+        val = None
+        if self.mode in ["mock"]:
+            val = self.mock_value()
+        elif self.mode == "simulation" and self.simulation_value is not None:
+            res = await AsyncRPCClient(CommlibFactory.get_tf_affection).call({
+                'name': self.name
+            })
+            val = self.simulation_value(res)
+
+        await self.write_sample_async({
+            "value": val,
+            "timestamp": self.clock.time()
+        })
+
+    def mock_value(self):
+        val = None
+        if self.operation == "constant":
+            val = self.constant_value
+        elif self.operation == "random":
+            val = random.uniform(
+                self.random_min,
+                self.random_max
+            )
+        elif self.operation == "normal":
+            val = random.gauss(
+                self.normal_mean,
+                self.normal_std
             )
+        elif self.operation == "triangle":
+            val = self.prev + self.way * self.triangle_step
+            if val >= self.triangle_max or val <= self.triangle_min:
+                self.way *= -1
+            self.prev = val
+        elif self.operation == "sinus":
+            val = self.sinus_dc + self.sinus_amp * math.sin(self.prev)
+            self.prev += self.sinus_step
+        else:
+            self.logger.warning(f"Unsupported operation: {self.operation}")
+        return val
 
-    @abc.abstractmethod
     def get_simulation_value(self):
-        return None
+        if self.simulation_value is None:
+            return None
+        while CommlibFactory.get_tf_affection == None:
+            self.clock.sleep(0.1)
+        res = CommlibFactory.get_tf_affection.call({
+            'name': self.name
+        })
+        return self.simulation_value(res)
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
@@ -202,8 +222,7 @@ class BasicSensor(BaseThing):
         self.get_mode_rpc_server.run()
         self.set_mode_rpc_server.run()
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
 
         return {"enabled": True}
 
@@ -229,8 +248,7 @@ class BasicSensor(BaseThing):
         self.set_mode_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
 
     def stop(self):
         self.info["enabled"] = False
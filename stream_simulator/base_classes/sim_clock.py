@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+
+class SimClock:
+    # Time source of the simulation. Robots, devices, tf and the tick
+    # scheduler take their timestamps and sleeps from it. Modes:
+    #   real:      the wall clock
+    #   scaled:    the wall clock sped up `scale` times (e.g. 10)
+    #   lockstep:  time only advances with step(), driven by a test runner
+    MODES = ["real", "scaled", "lockstep"]
+    shared = None
+
+    # The clock of the simulator, or a real time one for devices used on
+    # their own
+    @staticmethod
+    def get():
+        if SimClock.shared is None:
+            SimClock.shared = SimClock()
+        return SimClock.shared
+
+    def __init__(self, mode = "real", scale = 1.0, start = None):
+        if mode not in SimClock.MODES:
+            raise ValueError(f"Unknown clock mode {mode}")
+        if mode == "scaled" and scale <= 0:
+            raise ValueError(f"Clock scale must be positive, got {scale}")
+        self.mode = mode
+        self.scale = scale if mode == "scaled" else 1.0
+        self.real_start = time.time()
+        self.start = self.real_start if start is None else start
+        self.now = self.start
+        self.cond = threading.Condition()
+        self.listeners = []
+
+    @property
+    def lockstep(self):
+        return self.mode == "lockstep"
+
+    def time(self):
+        if self.lockstep:
+            return self.now
+        return self.start + (time.time() - self.real_start) * self.scale
+
+    # Wall time to wait for `seconds` of simulation time, None if only a
+    # step can end the wait
+    def real_timeout(self, seconds):
+        if self.lockstep:
+            return None
+        return max(0, seconds) / self.scale
+
+    def sleep(self, seconds):
+        if not self.lockstep:
+            time.sleep(max(0, seconds) / self.scale)
+            return
+        with self.cond:
+            end = self.now + seconds
+            while self.now < end:
+                self.cond.wait()
+
+    # Advances a lockstep clock by dt and wakes up everything waiting on it
+    def step(self, dt):
+        if not self.lockstep:
+            raise RuntimeError(f"Cannot step a {self.mode} clock")
+        with self.cond:
+            self.now += dt
+            self.cond.notify_all()
+        for listener in self.listeners:
+            listener()
+        return self.now
+
+    # listener() is called after every step
+    def on_step(self, listener):
+        self.listeners.append(listener)
@@ -0,0 +1,142 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import heapq
+import threading
+import itertools
+
+from commlib.logger import Logger
+
+from stream_simulator.base_classes.sim_clock import SimClock
+
+class TickJob:
+    def __init__(self, function, period, name = None, active = None):
+        self.function = function
+        self.period = period
+        self.name = name
+        self.active = active
+        self.cancelled = False
+        self.due = None
+        self.ticks = 0
+        self.missed = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+class TickScheduler:
+    # Runs the periodic work of all the devices (sensor samples, robot
+    # motion) from a few worker threads, instead of a sleeping thread per
+    # device. Jobs are kept in a priority queue on their next due time,
+    # which advances by whole periods from the previous due time, so that
+    # jobs do not drift; ticks missed while overloaded are skipped. Due
+    # times are in the time of the simulation clock.
+    shared = None
+    is_async = False
+
+    # The scheduler of the simulator, or a default one for devices used
+    # on their own
+    @staticmethod
+    def get():
+        if TickScheduler.shared is None:
+            TickScheduler.shared = TickScheduler()
+            TickScheduler.shared.start()
+        return TickScheduler.shared
+
+    def __init__(self, workers = 4, clock = None):
+        self.logger = Logger("tick_scheduler")
+        self.workers = workers
+        self.clock = SimClock.get() if clock is None else clock
+        self.queue = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.threads = []
+        self.running = False
+        self.busy = 0
+        self.clock.on_step(self.wake)
+
+    # Calls function at hz, starting one period from now, until the job is
+    # cancelled or active() returns False. A job never runs concurrently
+    # with itself.
+    def add(self, function, hz, name = None, active = None):
+        job = TickJob(function, 1.0 / hz, name, active)
+        job.due = self.clock.time() + job.period
+        with self.cond:
+            self.push(job)
+        return job
+
+    def push(self, job):
+        heapq.heappush(self.queue, (job.due, next(self.counter), job))
+        self.cond.notify_all()
+
+    def wake(self):
+        with self.cond:
+            self.cond.notify_all()
+
+    # Waits until the jobs due by now have all run, so that a lockstep
+    # driver can step the clock again. Returns False on timeout.
+    def settle(self, timeout = 5):
+        end = time.time() + timeout
+        with self.cond:
+            while self.busy > 0 or (len(self.queue) > 0 and \
+                    self.queue[0][0] <= self.clock.time()):
+                left = end - time.time()
+                if left <= 0:
+                    return False
+                self.cond.wait(left)
+        return True
+
+    def start(self):
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+        for i in range(self.workers):
+            t = threading.Thread(target = self.work, daemon = True)
+            t.start()
+            self.threads.append(t)
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    def next_job(self):
+        with self.cond:
+            while self.running:
+                if len(self.queue) == 0:
+                    self.cond.wait()
+                    continue
+                wait = self.queue[0][0] - self.clock.time()
+                if wait > 0:
+                    self.cond.wait(self.clock.real_timeout(wait))
+                    continue
+                self.busy += 1
+                return heapq.heappop(self.queue)[2]
+            return None
+
+    def work(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+            if job.cancelled or (job.active is not None and not job.active()):
+                with self.cond:
+                    self.busy -= 1
+                    self.cond.notify_all()
+                continue
+            try:
+                job.function()
+            except Exception as e:
+                self.logger.error(f"Tick of {job.name} failed: {str(e)}")
+            job.ticks += 1
+
+            job.due += job.period
+            now = self.clock.time()
+            if job.due < now:
+                missed = int((now - job.due) / job.period) + 1
+                job.missed += missed
+                job.due += missed * job.period
+            with self.cond:
+                self.busy -= 1
+                self.push(job)
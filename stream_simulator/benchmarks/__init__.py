@@ -0,0 +1,7 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+from .synthetic import synthetic_map, synthetic_declarations, MemoryStore
+from .suite import BENCHMARKS, run, measure
@@ -0,0 +1,326 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+import math
+import random
+import logging
+import platform
+import statistics
+
+import numpy
+
+from .synthetic import synthetic_map, synthetic_declarations, MemoryStore
+
+VERSION = 1
+
+# Seconds per call of fn: the median and spread of repeat rounds of
+# number calls each, after warmup calls
+def measure(fn, number = 1, repeat = 5, warmup = 1):
+    for i in range(warmup):
+        fn()
+    times = []
+    for r in range(repeat):
+        start = time.perf_counter()
+        for i in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return times
+
+def summary(values):
+    values = sorted(values)
+    return {
+        "min": values[0],
+        "median": statistics.median(values),
+        "mean": statistics.mean(values),
+        "max": values[-1],
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0
+    }
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(q * len(values))) - 1)]
+
+# Throughput record: ops operations per call of the measured times
+def rate(name, params, unit, times, ops = 1):
+    return {
+        "name": name,
+        "params": params,
+        "unit": unit,
+        "value": ops / statistics.median(times),
+        "samples": len(times),
+        "stats": summary([ops / t for t in times])
+    }
+
+# Cost record, in seconds per call
+def cost(name, params, times):
+    return {
+        "name": name,
+        "params": params,
+        "unit": "s",
+        "value": statistics.median(times),
+        "samples": len(times),
+        "stats": summary(times)
+    }
+
+class InprocWorld:
+    # Runs the body of a benchmark with every broker in-process and an
+    # in-memory derp, on an empty bus, restoring the factory afterwards
+    def __enter__(self):
+        from stream_simulator.connectivity import CommlibFactory
+        from stream_simulator.connectivity.inproc import InprocBus
+        self.saved = (CommlibFactory.inproc_brokers, CommlibFactory.derp_client)
+        CommlibFactory.inproc_brokers = ["redis", "amqp"]
+        CommlibFactory.derp_client = MemoryStore()
+        InprocBus.reset()
+        return self
+
+    def __exit__(self, *args):
+        from stream_simulator.connectivity import CommlibFactory
+        from stream_simulator.connectivity.inproc import InprocBus
+        InprocBus.reset()
+        CommlibFactory.inproc_brokers, CommlibFactory.derp_client = self.saved
+
+# tf affectability queries per second against the number of actors, one
+# sensor per get_affections call and all of them in get_affections_batch
+def bench_tf(quick = False):
+    from stream_simulator.connectivity import CommlibFactory
+    from stream_simulator.transformations import TfController
+
+    ret = []
+    sensors = 30
+    for actors in ([10, 100] if quick else [10, 100, 1000, 5000]):
+        with InprocWorld():
+            tf = TfController(base = "bench", workers = 1)
+            declare = CommlibFactory.getRPCClient(rpc_name = "bench.tf.declare")
+            declarations = synthetic_declarations(500, 500, actors, sensors)
+            for d in declarations:
+                declare.call(d)
+            names = [d['name'] for d in declarations if '_sensor_' in d['name']]
+            single = CommlibFactory.getRPCClient(
+                rpc_name = "bench.tf.get_affections"
+            )
+            batch = CommlibFactory.getRPCClient(
+                rpc_name = "bench.tf.get_affections_batch"
+            )
+            params = {"actors": actors, "sensors": len(names)}
+
+            def query_each():
+                for n in names:
+                    single.call({"name": n})
+            ret.append(rate("tf.get_affections", params, "queries/s",
+                measure(query_each, repeat = 3 if quick else 5), len(names)))
+            ret.append(rate("tf.get_affections_batch", params, "queries/s",
+                measure(lambda: batch.call({"names": names}),
+                    repeat = 3 if quick else 5),
+                len(names)))
+            tf.stop()
+    return ret
+
+# Range readings per second against the map size and the sensor range, for
+# a robot with 8 range sensors around it
+def bench_raycast(quick = False):
+    from stream_simulator.mapping import DistanceField, Raycaster, rasterize
+
+    ret = []
+    for size in ([100, 500] if quick else [100, 500, 2000]):
+        conf = synthetic_map(size, size, obstacles = size // 2)
+        field = DistanceField(
+            rasterize(conf['width'], conf['height'], conf['obstacles'])
+        )
+        for max_range in [2, 10, 50]:
+            raycaster = Raycaster(field, 1)
+            for i in range(8):
+                raycaster.register(f"sonar_{i}", i * 45, max_range)
+            rng = random.Random(0)
+            poses = [
+                (rng.uniform(1, size - 1), rng.uniform(1, size - 1),
+                    rng.uniform(0, 2 * math.pi))
+                for i in range(100)
+            ]
+
+            def cast():
+                for x, y, theta in poses:
+                    raycaster.cast(x, y, theta)
+            ret.append(rate("raycast.readings",
+                {"map_size": size, "range": max_range, "sensors": 8},
+                "readings/s",
+                measure(cast, repeat = 3 if quick else 5),
+                8 * len(poses)))
+    return ret
+
+# World.setup (rasterization) against the obstacles, and the build of the
+# distance field that the first range sensor triggers
+def bench_world_setup(quick = False):
+    from stream_simulator.world import World
+
+    ret = []
+    size = 500 if quick else 1000
+    for obstacles in ([0, 100, 1000] if quick else [0, 100, 1000, 10000]):
+        world = World()
+        world.configuration = {'map': synthetic_map(size, size, obstacles)}
+        params = {"map_size": size, "obstacles": obstacles}
+        ret.append(cost("world.setup", params,
+            measure(world.setup, repeat = 3, warmup = 0)))
+        ret.append(cost("world.distance_field", params,
+            measure(lambda: world.distance_field.compute(),
+                repeat = 3, warmup = 0)))
+    return ret
+
+# Camera frames encoded per second, per format and size
+def bench_camera_encode(quick = False):
+    from stream_simulator.functionality.image_encoder import encode_image
+
+    ret = []
+    rng = numpy.random.default_rng(0)
+    for width, height in [(320, 240), (640, 480)]:
+        # A gradient with some noise, between the best and the worst case
+        # of the compressed formats
+        frame = numpy.add.outer(
+            numpy.arange(height), numpy.arange(width)
+        ).astype(numpy.uint8)
+        frame = numpy.stack([frame] * 3, axis = 2)
+        frame = frame + rng.integers(0, 16, frame.shape, dtype = numpy.uint8)
+        for format in ["raw", "jpeg", "png"]:
+            params = {"format": format, "width": width, "height": height}
+            for binary in [True, False]:
+                try:
+                    times = measure(
+                        lambda: encode_image(frame, format, binary = binary),
+                        number = 5 if quick else 20,
+                        repeat = 3 if quick else 5
+                    )
+                except ImportError as e:
+                    ret.append(skipped("camera.encode", params, e))
+                    break
+                ret.append(rate("camera.encode",
+                    dict(params, binary = binary), "frames/s", times))
+    return ret
+
+# Cost of one simulation step of a moving robot: the motion model, the
+# collision check, the pose publish and the ray casting of its sensors
+def bench_robot_step(quick = False):
+    from stream_simulator.world import World
+    from stream_simulator.robot import Robot
+
+    ret = []
+    for size in ([500] if quick else [100, 500, 2000]):
+        with InprocWorld():
+            world = World()
+            world.configuration = {
+                'tf_base': "bench.tf",
+                'map': synthetic_map(size, size, obstacles = size // 2)
+            }
+            world.env_properties = {
+                'temperature': 20, 'humidity': 50, 'luminosity': 100
+            }
+            world.setup()
+            robot = Robot(
+                configuration = {
+                    'name': "bench_robot",
+                    'mode': "simulation",
+                    'speak_mode': "espeak",
+                    'amqp_inform': False,
+                    'step_by_step_execution': False,
+                    'devices': {},
+                    'starting_pose': {'x': size / 2, 'y': size / 2, 'theta': 0}
+                },
+                world = world,
+                map = world.map
+            )
+            for i in range(8):
+                robot.raycaster.register(f"sonar_{i}", i * 45, 10)
+            robot.circ_buff.append({'linear': 0.5, 'rotational': 0.1})
+            robot.last_step = robot.clock.time()
+            ret.append(cost("robot.simulation_step", {"map_size": size},
+                measure(robot.simulation_step,
+                    number = 100 if quick else 500,
+                    repeat = 3 if quick else 5)))
+    return ret
+
+# Latency from a device writing a sample to the SampleSink to a subscriber
+# of its topic getting it
+def bench_sample_latency(quick = False):
+    import queue
+    from stream_simulator.connectivity import CommlibFactory, SampleSink
+
+    ret = []
+    count = 200 if quick else 2000
+    for batch in [False, True]:
+        with InprocWorld():
+            sink = SampleSink(derp_client = CommlibFactory.derp_client,
+                batch = batch)
+            received = queue.Queue()
+            sub = CommlibFactory.getSubscriber(
+                topic = "bench.sonar.data",
+                callback = lambda message, meta: received.put(
+                    time.perf_counter() - message['sent']
+                )
+            )
+            sub.run()
+            publisher = CommlibFactory.getPublisher(topic = "bench.sonar.data")
+            latencies = []
+            for i in range(count):
+                sink.write(publisher, "bench.sonar.data",
+                    {"distance": i, "sent": time.perf_counter()})
+                if batch:
+                    sink.flush()
+                latencies.append(received.get(timeout = 5))
+            sub.stop()
+            sink.stop()
+            sink.executor.shutdown(wait = True)
+            ret.append({
+                "name": "sample.latency",
+                "params": {"batch": batch, "transport": "inproc"},
+                "unit": "s",
+                "value": statistics.median(latencies),
+                "samples": count,
+                "stats": dict(summary(latencies),
+                    p95 = percentile(latencies, 0.95),
+                    p99 = percentile(latencies, 0.99))
+            })
+    return ret
+
+BENCHMARKS = {
+    "tf": bench_tf,
+    "raycast": bench_raycast,
+    "world_setup": bench_world_setup,
+    "camera_encode": bench_camera_encode,
+    "robot_step": bench_robot_step,
+    "sample_latency": bench_sample_latency
+}
+
+def skipped(name, params, error):
+    return {"name": name, "params": params, "skipped": str(error)}
+
+# Runs the benchmarks (all, or the only ones), offline: benchmarks whose
+# dependencies are missing are reported as skipped, failing ones with
+# their error, so a run always yields a complete report
+def run(only = None, quick = False, log = None):
+    names = list(BENCHMARKS) if only is None else only
+    results = []
+    # The simulator logs every declaration and step
+    logging.disable(logging.WARNING)
+    try:
+        for n in names:
+            if log is not None:
+                log(f"Running {n}")
+            try:
+                results += BENCHMARKS[n](quick = quick)
+            except ImportError as e:
+                results.append(skipped(n, {}, e))
+            except Exception as e:
+                results.append({"name": n, "params": {}, "error": repr(e)})
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        "suite": "stream_simulator",
+        "version": VERSION,
+        "timestamp": time.time(),
+        "quick": quick,
+        "python": sys.version.split()[0],
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "results": results
+    }
@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import random
+
+# Synthetic worlds for the benchmarks, reproducible from their seed. Sizes
+# are in world units, with the default resolution of 1 cell per unit.
+
+def synthetic_obstacles(width, height, count, seed = 0):
+    # Walls around the map, then count obstacles: a mix of lines,
+    # rectangles and circles
+    rng = random.Random(seed)
+    obstacles = {
+        'lines': [
+            {'x1': 0, 'y1': 0, 'x2': width - 1, 'y2': 0},
+            {'x1': 0, 'y1': 0, 'x2': 0, 'y2': height - 1},
+            {'x1': width - 1, 'y1': 0, 'x2': width - 1, 'y2': height - 1},
+            {'x1': 0, 'y1': height - 1, 'x2': width - 1, 'y2': height - 1}
+        ],
+        'rectangles': [],
+        'circles': []
+    }
+    for i in range(count):
+        x = rng.uniform(0, width)
+        y = rng.uniform(0, height)
+        kind = i % 3
+        if kind == 0:
+            obstacles['lines'].append({
+                'x1': x, 'y1': y,
+                'x2': x + rng.uniform(-20, 20), 'y2': y + rng.uniform(-20, 20)
+            })
+        elif kind == 1:
+            obstacles['rectangles'].append({
+                'x': x, 'y': y,
+                'width': rng.uniform(1, 10), 'height': rng.uniform(1, 10)
+            })
+        else:
+            obstacles['circles'].append({
+                'x': x, 'y': y, 'radius': rng.uniform(1, 5)
+            })
+    return obstacles
+
+def synthetic_map(width, height, obstacles = 0, resolution = 1, seed = 0):
+    return {
+        'width': width,
+        'height': height,
+        'resolution': resolution,
+        'obstacles': synthetic_obstacles(width, height, obstacles, seed),
+        'cache': False
+    }
+
+def declaration(name, type, subtype, x, y, theta = None, range = None,
+        properties = None):
+    return {
+        'type': type,
+        'subtype': subtype,
+        'name': name,
+        'pose': {'x': x, 'y': y, 'theta': theta},
+        'base_topic': f"bench.{name}",
+        'range': range,
+        'properties': properties,
+        'id': name
+    }
+
+# tf declarations of a world with the given number of actors and sensors,
+# spread over a width x height area, as the devices would declare them
+def synthetic_declarations(width, height, actors, sensors, seed = 0):
+    rng = random.Random(seed)
+    ret = []
+    actor_types = {
+        'human': lambda: {
+            'sound': 1, 'language': "EN", 'emotion': "happy", 'speech': "",
+            'gender': "none", 'age': -1, 'motion': 0
+        },
+        'fire': lambda: {},
+        'qr': lambda: {'message': "bench"},
+        'color': lambda: {'r': 255, 'g': 0, 'b': 0},
+        'sound_source': lambda: {'language': "EN"}
+    }
+    kinds = list(actor_types)
+    for i in range(actors):
+        kind = kinds[i % len(kinds)]
+        ret.append(declaration(
+            f"{kind}_{i}", "actor", kind,
+            rng.uniform(0, width), rng.uniform(0, height),
+            range = rng.uniform(2, 20),
+            properties = actor_types[kind]()
+        ))
+    for i in range(max(1, actors // 20)):
+        ret.append(declaration(
+            f"thermostat_{i}", "env",
+            {'category': "actuator", 'class': "env", 'subclass': ["thermostat"]},
+            rng.uniform(0, width), rng.uniform(0, height),
+            range = 20, properties = {'temperature': 25}
+        ))
+
+    sensor_types = [
+        ('temperature', "env", {}),
+        ('camera', "visual", {'fov': 60}),
+        ('microphone', "audio", {})
+    ]
+    for i in range(sensors):
+        subclass, cls, properties = sensor_types[i % len(sensor_types)]
+        ret.append(declaration(
+            f"{subclass}_sensor_{i}", "env",
+            {'category': "sensor", 'class': cls, 'subclass': [subclass]},
+            rng.uniform(0, width), rng.uniform(0, height),
+            theta = rng.uniform(0, 360), range = 10,
+            properties = dict(properties)
+        ))
+    return ret
+
+class MemoryStore:
+    # In-memory stand-in of the derp client for the offline runs: keeps the
+    # latest value of every key
+    def __init__(self):
+        self.values = {}
+
+    def lset(self, key, values):
+        self.values[key] = values
@@ -5,3 +5,8 @@ from __future__ import absolute_import
 
 from .conn_params import ConnParams
 from .commlib_factory import CommlibFactory
+from .async_endpoints import AsyncRPCClient, AsyncRedisRPCClient, AsyncPublisher
+from .sample_sink import SampleSink
+from .metrics import Metrics
+from .affections_coalescer import AffectionsCoalescer
+from .affections_subscriber import AffectionsSubscriber
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import threading
+
+from commlib.logger import Logger
+
+class AffectionsCoalescer:
+    # Drop-in replacement of the tf get_affections RPC client. Calls are
+    # merged into get_affections_batch calls, one in flight at a time: a
+    # call made while none is in flight is sent right away, and the calls
+    # made while one is in flight are sent together once it returns. Each
+    # caller gets its own result back. window (seconds) additionally holds
+    # every batch back to gather more calls, at the cost of that latency.
+    # async_batch_client, if given, makes the batch calls of call_async on
+    # the event loop instead of a thread.
+    def __init__(self, batch_client = None, window = 0, logger = None,
+            async_batch_client = None):
+        self.logger = Logger("affections_coalescer") if logger is None else logger
+        self.batch_client = batch_client
+        self.async_batch_client = async_batch_client
+        self.window = window
+        self.cond = threading.Condition()
+        self.round = None
+        self.in_flight = False
+        self.async_round = None
+        self.async_in_flight = None
+
+    def call(self, message):
+        name = message['name']
+        with self.cond:
+            rnd = self.round
+            leader = rnd is None
+            if leader:
+                rnd = {
+                    'names': [],
+                    'event': threading.Event(),
+                    'results': {}
+                }
+                self.round = rnd
+            if name not in rnd['names']:
+                rnd['names'].append(name)
+
+        if leader:
+            if self.window > 0:
+                time.sleep(self.window)
+            with self.cond:
+                while self.in_flight:
+                    self.cond.wait()
+                self.in_flight = True
+                self.round = None
+            try:
+                rnd['results'] = self.call_batch(rnd['names'])
+            finally:
+                with self.cond:
+                    self.in_flight = False
+                    self.cond.notify_all()
+                rnd['event'].set()
+        else:
+            rnd['event'].wait()
+
+        if name in rnd['results']:
+            return rnd['results'][name]
+        return {}
+
+    # Same coalescing for the coroutines of the asyncio runtime, which all
+    # run on one event loop: callers await the round's future, and only the
+    # batch call leaves the loop, unless async_batch_client makes it there.
+    async def call_async(self, message):
+        name = message['name']
+        rnd = self.async_round
+        if rnd is None:
+            loop = asyncio.get_running_loop()
+            rnd = {
+                'names': [],
+                'future': loop.create_future()
+            }
+            self.async_round = rnd
+            loop.create_task(self.flush_async(rnd))
+        if name not in rnd['names']:
+            rnd['names'].append(name)
+
+        results = await asyncio.shield(rnd['future'])
+        if name in results:
+            return results[name]
+        return {}
+
+    async def flush_async(self, rnd):
+        if self.window > 0:
+            await asyncio.sleep(self.window)
+        while self.async_in_flight is not None:
+            await asyncio.wait([self.async_in_flight])
+        self.async_round = None
+        self.async_in_flight = rnd['future']
+        try:
+            if self.async_batch_client is not None:
+                results = await self.call_batch_async(rnd['names'])
+            else:
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(
+                    None, self.call_batch, rnd['names']
+                )
+        finally:
+            self.async_in_flight = None
+        rnd['future'].set_result(results)
+
+    async def call_batch_async(self, names):
+        try:
+            res = await self.async_batch_client.call({'names': names})
+            return res['affections']
+        except Exception as e:
+            self.logger.error(f"Error in batch affections call: {str(e)}")
+            return {}
+
+    def call_batch(self, names):
+        try:
+            res = self.batch_client.call({'names': names})
+            return res['affections']
+        except Exception as e:
+            self.logger.error(f"Error in batch affections call: {str(e)}")
+            return {}
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+
+from commlib.logger import Logger
+
+from .commlib_factory import CommlibFactory
+
+class AffectionsSubscriber:
+    # Drop-in replacement of the tf get_affections client for push mode.
+    # The first call of a device subscribes it to tf, afterwards the
+    # affections are kept up to date by the deltas tf publishes in
+    # <base_topic>.affections and calls are answered locally.
+    # Deltas are numbered by tf: the ones arriving while the affections are
+    # (re)synced are held and applied after, and a missed one triggers a
+    # resync.
+    def __init__(self, subscribe_client = None, fallback = None, logger = None):
+        self.logger = Logger("affections_subscriber") if logger is None else logger
+        self.subscribe_client = subscribe_client
+        self.fallback = fallback
+        self.affections = {}
+        self.seqs = {}
+        self.pending = {}   # name -> deltas held during its resync
+        self.subs = {}
+        self.failed = set()
+        self.lock = threading.Lock()
+        self.subscribe_lock = threading.Lock()
+
+    def call(self, message):
+        name = message['name']
+        if name in self.affections:
+            return self.affections[name]
+        self.ensure_subscribed(name)
+        if name in self.affections:
+            return self.affections[name]
+        return self.fallback.call(message)
+
+    async def call_async(self, message):
+        name = message['name']
+        if name in self.affections:
+            return self.affections[name]
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.ensure_subscribed, name)
+        if name in self.affections:
+            return self.affections[name]
+        return await self.fallback.call_async(message)
+
+    def ensure_subscribed(self, name):
+        if name in self.failed:
+            return
+        with self.subscribe_lock:
+            if name not in self.subs:
+                self.subscribe(name)
+
+    def subscribe(self, name):
+        try:
+            res = self.subscribe_client.call({'name': name})
+            topic = res['topic']
+        except Exception as e:
+            self.logger.error(f"Could not subscribe {name} to affections: {str(e)}")
+            self.failed.add(name)
+            return
+        if topic is None:
+            # Not pushed by tf, polled through the fallback
+            self.failed.add(name)
+            return
+
+        with self.lock:
+            self.pending[name] = []
+        self.subs[name] = CommlibFactory.getSubscriber(
+            topic = topic,
+            callback = self.delta_callback
+        )
+        self.subs[name].run()
+
+        # Deltas published before the subscriber was up are lost, so resync
+        self.resync(name)
+
+    def resync(self, name):
+        try:
+            res = self.subscribe_client.call({'name': name})
+        except Exception as e:
+            self.logger.error(f"Could not resync affections of {name}: {str(e)}")
+            res = None
+        with self.lock:
+            pending = self.pending.pop(name, [])
+            if res is None:
+                # Polled until the next delta asks for a resync again
+                self.affections.pop(name, None)
+                self.seqs[name] = -1
+                return
+            self.affections[name] = res['affections']
+            self.seqs[name] = res['seq']
+        for message in pending:
+            self.delta_callback(message, None)
+
+    def delta_callback(self, message, meta):
+        name = message['name']
+        with self.lock:
+            if name in self.pending:
+                self.pending[name].append(message)
+                return
+            if name not in self.seqs or message['seq'] <= self.seqs[name]:
+                # Not subscribed, or already in the synced affections
+                return
+            prev = self.affections.get(name, {})
+            curr = {}
+            for k in message['names']:
+                if k in message['updated']:
+                    curr[k] = message['updated'][k]
+                elif k in prev:
+                    curr[k] = prev[k]
+            if message['seq'] == self.seqs[name] + 1 and \
+                    len(curr) == len(message['names']):
+                self.affections[name] = curr
+                self.seqs[name] = message['seq']
+                return
+            self.pending[name] = []
+        self.logger.warning(f"Affections of {name} out of sync, resyncing")
+        self.resync(name)
+
+    def stop(self):
+        for s in self.subs:
+            self.subs[s].stop()
@@ -0,0 +1,67 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import uuid
+import asyncio
+
+class AsyncRedisRPCClient:
+    # Redis RPC client of the asyncio runtime, on redis.asyncio: a call is
+    # awaited on the event loop, without a thread of its own. Speaks the
+    # commlib Redis RPC format, as RPCDispatcher does: the request is
+    # pushed as {data, header: {reply_to}} JSON on the list named after the
+    # RPC and the reply popped from the reply_to list. Returns None on
+    # timeout, as the commlib clients do.
+    def __init__(self, rpc_name = None, redis = None, timeout = 30):
+        self.rpc_name = rpc_name
+        self.redis = redis
+        self.timeout = timeout
+
+    def connection(self):
+        if self.redis is None:
+            from stream_simulator.connectivity import CommlibFactory
+            self.redis = CommlibFactory.getAsyncRedis()
+        return self.redis
+
+    async def call(self, message, timeout = None):
+        r = self.connection()
+        reply_to = f"{self.rpc_name}.reply.{uuid.uuid4().hex}"
+        await r.rpush(self.rpc_name, json.dumps({
+            'data': message,
+            'header': {
+                'reply_to': reply_to,
+                'timestamp': int(time.time() * 1000000000),
+                # Where older commlib services read it from
+                'properties': {'reply_to': reply_to}
+            }
+        }))
+        try:
+            res = await r.blpop([reply_to],
+                timeout = self.timeout if timeout is None else timeout)
+        finally:
+            await r.delete(reply_to)
+        if res is None:
+            return None
+        return json.loads(res[1])['data']
+
+class AsyncRPCClient:
+    # Awaitable face of an RPC client, for the asyncio runtime. Clients
+    # with a call_async of their own (the tf affections clients) are
+    # awaited natively, blocking commlib clients are called off the loop.
+    def __init__(self, client = None):
+        self.client = client
+
+    async def call(self, message):
+        if hasattr(self.client, "call_async"):
+            return await self.client.call_async(message)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.client.call, message)
+
+class AsyncPublisher:
+    def __init__(self, publisher = None):
+        self.publisher = publisher
+
+    async def publish(self, message):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.publisher.publish, message)
@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import redis
+import msgpack
+
+from commlib.logger import Logger
+
+# Endpoints of the topics marked binary in CommlibFactory. Messages are
+# msgpack maps on raw Redis pub/sub, so bytes fields (camera frames,
+# recordings) travel as they are, instead of as base64 text inside JSON.
+
+def pack(message):
+    return msgpack.packb(message, use_bin_type = True)
+
+def unpack(payload):
+    return msgpack.unpackb(payload, raw = False)
+
+class BinaryPublisher:
+    # publisher, if given, delivers the messages instead (in-process
+    # topics, which need no encoding at all)
+    def __init__(self, topic = None, pool = None, publisher = None):
+        self.topic = topic
+        self.publisher = publisher
+        self.redis = redis.Redis(connection_pool = pool)
+
+    # pipe, if given, is a Redis pipeline to queue the command on
+    def publish(self, message, pipe = None):
+        if self.publisher is not None:
+            return self.publisher.publish(message)
+        (self.redis if pipe is None else pipe).publish(self.topic, pack(message))
+
+    # Latest sample of the stream, under its own binary key
+    def store(self, key, record, pipe = None):
+        (self.redis if pipe is None else pipe).set(key + ".bin", pack(record))
+
+    @staticmethod
+    def load(pool, key):
+        payload = redis.Redis(connection_pool = pool).get(key + ".bin")
+        return None if payload is None else unpack(payload)
+
+class BinarySubscriber:
+    def __init__(self, topic = None, pool = None, on_message = None):
+        self.logger = Logger("binary_subscriber")
+        self.topic = topic
+        self.on_message = on_message
+        self.redis = redis.Redis(connection_pool = pool)
+        self.pubsub = None
+        self.thread = None
+
+    def run(self):
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages = True)
+        self.pubsub.subscribe(**{self.topic: self.handle})
+        self.thread = self.pubsub.run_in_thread(sleep_time = 0.01, daemon = True)
+
+    def stop(self):
+        if self.thread is not None:
+            self.thread.stop()
+            self.thread = None
+        if self.pubsub is not None:
+            self.pubsub.close()
+            self.pubsub = None
+
+    def handle(self, message):
+        try:
+            self.on_message(unpack(message['data']), {'topic': self.topic})
+        except Exception as e:
+            self.logger.error(f"Callback of {self.topic} failed: {str(e)}")
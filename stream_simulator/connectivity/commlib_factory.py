@@ -1,6 +1,7 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import fnmatch
 import importlib
 from colorama import Fore, Back, Style
 
@@ -14,6 +15,7 @@ class CommlibFactory:
     colors = {
         "redis": Fore.GREEN,
         "amqp": Fore.RED,
+        "inproc": Fore.WHITE,
         "RPCService": Fore.YELLOW,
         "RPCClient": Fore.BLUE,
         "Subscriber": Fore.MAGENTA,
@@ -28,6 +30,23 @@ class CommlibFactory:
     notify_sim = None
     get_tf_affection = None
     get_tf = None
+    # Publishers, subscribers and RPCs requested on these brokers are served
+    # in-process instead (see inproc.py), for headless runs where both ends
+    # live in the simulator process
+    inproc_brokers = []
+    # Redis RPC services served by one shared dispatcher (see
+    # rpc_dispatcher.py) instead of a connection and thread each
+    multiplex_rpcs = False
+    redis_pool = None
+    # redis.asyncio client of the asyncio runtime, bound to its event loop
+    async_redis = None
+    rpc_dispatcher = None
+    sample_sink = None
+    # Topics (fnmatch patterns) carried as msgpack with raw bytes fields,
+    # see binary_endpoints.py
+    binary_topics = []
+    # Endpoint call metrics (see metrics.py), when on
+    metrics = None
 
     @staticmethod
     def notify_ui(type = None, data = None):
@@ -57,6 +76,12 @@ class CommlibFactory:
             'action clients': 0,
             'event emmiters': 0
         },
+        'inproc': {
+            'publishers': 0,
+            'subscribers': 0,
+            'rpc servers': 0,
+            'rpc clients': 0
+        },
         'common': {
             'events': 0
         }
@@ -71,16 +96,101 @@ class CommlibFactory:
             f"{met}{Style.BRIGHT}{broker}::{type} {col}<{topic}>{res}"
         )
 
+    @staticmethod
+    def transport(broker):
+        if broker in CommlibFactory.inproc_brokers:
+            broker = "inproc"
+        if broker == "inproc":
+            module = importlib.import_module(
+                "stream_simulator.connectivity.inproc"
+            )
+        else:
+            module = importlib.import_module(
+                f"commlib.transports.{broker}"
+            )
+        return broker, module
+
+    # One connection pool per process for the Redis clients of the simulator
+    @staticmethod
+    def getRedisPool():
+        if CommlibFactory.redis_pool is None:
+            import redis
+            settings = ConnParams.REDIS_SETTINGS
+            CommlibFactory.redis_pool = redis.ConnectionPool(
+                host = settings["host"],
+                port = settings["port"],
+                db = settings.get("db", 0),
+                password = settings.get("password", None)
+            )
+        return CommlibFactory.redis_pool
+
+    # Connections of the asyncio runtime's Redis clients, made on (and only
+    # usable from) its event loop
+    @staticmethod
+    def getAsyncRedis():
+        if CommlibFactory.async_redis is None:
+            import redis.asyncio
+            settings = ConnParams.REDIS_SETTINGS
+            CommlibFactory.async_redis = redis.asyncio.Redis(
+                host = settings["host"],
+                port = settings["port"],
+                db = settings.get("db", 0),
+                password = settings.get("password", None)
+            )
+        return CommlibFactory.async_redis
+
+    @staticmethod
+    def getRPCDispatcher():
+        if CommlibFactory.rpc_dispatcher is None:
+            from stream_simulator.connectivity.rpc_dispatcher import RPCDispatcher
+            CommlibFactory.rpc_dispatcher = RPCDispatcher(
+                pool = CommlibFactory.getRedisPool()
+            )
+        return CommlibFactory.rpc_dispatcher
+
+    # callback timed as an endpoint of the given kind, when metrics are on
+    @staticmethod
+    def timedCallback(kind, topic, callback):
+        if CommlibFactory.metrics is None:
+            return callback
+        return CommlibFactory.metrics.callback(kind, topic, callback)
+
+    @staticmethod
+    def isBinary(topic):
+        for pattern in CommlibFactory.binary_topics:
+            if fnmatch.fnmatchcase(topic, pattern):
+                return True
+        return False
+
+    # Where the devices publish and store their samples
+    @staticmethod
+    def getSampleSink():
+        if CommlibFactory.sample_sink is None:
+            from stream_simulator.connectivity.sample_sink import SampleSink
+            CommlibFactory.sample_sink = SampleSink(
+                derp_client = CommlibFactory.derp_client
+            )
+        return CommlibFactory.sample_sink
+
     @staticmethod
     def getPublisher(broker = "redis", topic = None):
         ret = None
-        module = importlib.import_module(
-            f"commlib.transports.{broker}"
-        )
-        ret = module.Publisher(
-            conn_params = ConnParams.get(broker),
-            topic = topic
-        )
+        broker, module = CommlibFactory.transport(broker)
+        if broker in ["redis", "inproc"] and CommlibFactory.isBinary(topic):
+            from stream_simulator.connectivity.binary_endpoints import BinaryPublisher
+            ret = BinaryPublisher(
+                topic = topic,
+                pool = CommlibFactory.getRedisPool(),
+                publisher = module.Publisher(topic = topic) \
+                    if broker == "inproc" else None
+            )
+        else:
+            ret = module.Publisher(
+                conn_params = ConnParams.get(broker),
+                topic = topic
+            )
+        if CommlibFactory.metrics is not None:
+            ret = CommlibFactory.metrics.publisher(topic, ret)
         CommlibFactory.inform(broker, topic, "Publisher")
         CommlibFactory.stats[broker]['publishers'] += 1
         return ret
@@ -88,29 +198,57 @@ class CommlibFactory:
     @staticmethod
     def getSubscriber(broker = "redis", topic = None, callback = None):
         ret = None
-        module = importlib.import_module(
-            f"commlib.transports.{broker}"
-        )
-        ret = module.Subscriber(
-            conn_params = ConnParams.get(broker),
-            topic = topic,
-            on_message = callback
-        )
+        broker, module = CommlibFactory.transport(broker)
+        callback = CommlibFactory.timedCallback("subscriber", topic, callback)
+        if broker == "redis" and CommlibFactory.isBinary(topic):
+            from stream_simulator.connectivity.binary_endpoints import BinarySubscriber
+            ret = BinarySubscriber(
+                topic = topic,
+                pool = CommlibFactory.getRedisPool(),
+                on_message = callback
+            )
+        else:
+            ret = module.Subscriber(
+                conn_params = ConnParams.get(broker),
+                topic = topic,
+                on_message = callback
+            )
         CommlibFactory.inform(broker, topic, "Subscriber")
         CommlibFactory.stats[broker]['subscribers'] += 1
         return ret
 
     @staticmethod
-    def getRPCService(broker = "redis", rpc_name = None, callback = None):
+    # workers > 1 serves the RPC on that many broker consumers, so that its
+    # requests are handled in parallel (the dispatcher and inproc RPCs are
+    # parallel already)
+    def getRPCService(broker = "redis", rpc_name = None, callback = None,
+            workers = 1):
         ret = None
-        module = importlib.import_module(
-            f"commlib.transports.{broker}"
-        )
-        ret = module.RPCService(
-            conn_params = ConnParams.get(broker),
-            on_request = callback,
-            rpc_name = rpc_name
-        )
+        broker, module = CommlibFactory.transport(broker)
+        callback = CommlibFactory.timedCallback("rpc_service", rpc_name, callback)
+        if broker == "redis" and CommlibFactory.multiplex_rpcs:
+            from stream_simulator.connectivity.rpc_dispatcher import MuxRPCService
+            ret = MuxRPCService(
+                dispatcher = CommlibFactory.getRPCDispatcher(),
+                rpc_name = rpc_name,
+                callback = callback
+            )
+        elif workers > 1 and broker != "inproc":
+            from stream_simulator.connectivity.rpc_dispatcher import RPCServicePool
+            ret = RPCServicePool([
+                module.RPCService(
+                    conn_params = ConnParams.get(broker),
+                    on_request = callback,
+                    rpc_name = rpc_name
+                )
+                for i in range(workers)
+            ])
+        else:
+            ret = module.RPCService(
+                conn_params = ConnParams.get(broker),
+                on_request = callback,
+                rpc_name = rpc_name
+            )
         CommlibFactory.inform(broker, rpc_name, "RPCService")
         CommlibFactory.stats[broker]['rpc servers'] += 1
         return ret
@@ -118,17 +256,50 @@ class CommlibFactory:
     @staticmethod
     def getRPCClient(broker = "redis", rpc_name = None):
         ret = None
-        module = importlib.import_module(
-            f"commlib.transports.{broker}"
-        )
+        broker, module = CommlibFactory.transport(broker)
         ret = module.RPCClient(
             conn_params = ConnParams.get("redis"),
             rpc_name = rpc_name
         )
+        if CommlibFactory.metrics is not None:
+            ret = CommlibFactory.metrics.rpc_client(rpc_name, ret)
         CommlibFactory.inform(broker, rpc_name, "RPCClient")
         CommlibFactory.stats[broker]['rpc clients'] += 1
         return ret
 
+    # Awaitable clients, for the asyncio runtime. Redis RPCs are served on
+    # the event loop itself (see async_endpoints.py), the other brokers'
+    # clients are called off the loop.
+    @staticmethod
+    def getAsyncRPCClient(broker = "redis", rpc_name = None):
+        from stream_simulator.connectivity.async_endpoints import \
+            AsyncRPCClient, AsyncRedisRPCClient
+        if CommlibFactory.transport(broker)[0] == "redis":
+            ret = AsyncRedisRPCClient(rpc_name = rpc_name)
+            if CommlibFactory.metrics is not None:
+                ret.call = CommlibFactory.metrics.timed_async(
+                    "rpc_client", rpc_name, ret.call, lambda args: args[0]
+                )
+            CommlibFactory.inform("redis", rpc_name, "RPCClient")
+            CommlibFactory.stats["redis"]['rpc clients'] += 1
+            return ret
+        return AsyncRPCClient(
+            client = CommlibFactory.getRPCClient(
+                broker = broker,
+                rpc_name = rpc_name
+            )
+        )
+
+    @staticmethod
+    def getAsyncPublisher(broker = "redis", topic = None):
+        from stream_simulator.connectivity.async_endpoints import AsyncPublisher
+        return AsyncPublisher(
+            publisher = CommlibFactory.getPublisher(
+                broker = broker,
+                topic = topic
+            )
+        )
+
     @staticmethod
     def getActionServer(broker = "redis", action_name = None, callback = None):
         ret = None
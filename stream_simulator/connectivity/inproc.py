@@ -0,0 +1,110 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import copy
+import queue
+import threading
+
+from commlib.logger import Logger
+
+# In-process transport with the interface of the commlib transport modules
+# used by CommlibFactory (Publisher, Subscriber, RPCService, RPCClient).
+# Messages are handed over as deep copies instead of being serialized, so
+# that receivers may modify them as they do with the broker transports.
+# Publishes go through a queue per subscriber, drained by the subscriber's
+# own thread as with the broker transports; RPCs are direct calls of the
+# service callback.
+
+class InprocBus:
+    subscribers = {}
+    services = {}
+    cond = threading.Condition()
+
+    @staticmethod
+    def reset():
+        with InprocBus.cond:
+            InprocBus.subscribers = {}
+            InprocBus.services = {}
+
+class Publisher:
+    def __init__(self, conn_params = None, topic = None):
+        self.topic = topic
+
+    def publish(self, message):
+        subscribers = InprocBus.subscribers.get(self.topic, [])
+        for s in subscribers:
+            s.queue.put(copy.deepcopy(message))
+
+class Subscriber:
+    def __init__(self, conn_params = None, topic = None, on_message = None):
+        self.logger = Logger("inproc_subscriber")
+        self.topic = topic
+        self.on_message = on_message
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def run(self):
+        with InprocBus.cond:
+            subscribers = list(InprocBus.subscribers.get(self.topic, []))
+            if self not in subscribers:
+                subscribers.append(self)
+            # Replaced, not appended to, so publishers iterate safely
+            InprocBus.subscribers[self.topic] = subscribers
+        if self.thread is None:
+            self.thread = threading.Thread(target = self.dispatch, daemon = True)
+            self.thread.start()
+
+    def stop(self):
+        with InprocBus.cond:
+            subscribers = InprocBus.subscribers.get(self.topic, [])
+            InprocBus.subscribers[self.topic] = \
+                [s for s in subscribers if s is not self]
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread = None
+
+    def dispatch(self):
+        while True:
+            message = self.queue.get()
+            if message is None:
+                return
+            try:
+                self.on_message(message, {'topic': self.topic})
+            except Exception as e:
+                self.logger.error(f"Callback of {self.topic} failed: {str(e)}")
+
+class RPCService:
+    def __init__(self, conn_params = None, on_request = None, rpc_name = None):
+        self.rpc_name = rpc_name
+        self.on_request = on_request
+
+    def run(self):
+        with InprocBus.cond:
+            InprocBus.services[self.rpc_name] = self
+            InprocBus.cond.notify_all()
+
+    def stop(self):
+        with InprocBus.cond:
+            if InprocBus.services.get(self.rpc_name) is self:
+                del InprocBus.services[self.rpc_name]
+
+class RPCClient:
+    def __init__(self, conn_params = None, rpc_name = None):
+        self.rpc_name = rpc_name
+
+    # Waits up to timeout seconds for the service to be up, as a broker
+    # client waits for the reply
+    def call(self, message, timeout = 30):
+        service = InprocBus.services.get(self.rpc_name)
+        if service is None:
+            with InprocBus.cond:
+                InprocBus.cond.wait_for(
+                    lambda: self.rpc_name in InprocBus.services,
+                    timeout = timeout
+                )
+                service = InprocBus.services.get(self.rpc_name)
+        if service is None:
+            raise TimeoutError(f"No inproc service {self.rpc_name}")
+        return copy.deepcopy(service.on_request(
+            copy.deepcopy(message), {'rpc_name': self.rpc_name}
+        ))
@@ -0,0 +1,217 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import bisect
+import threading
+
+from commlib.logger import Logger
+
+# Latency buckets (upper bounds, in seconds), as Prometheus histograms
+BUCKETS = [
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0
+]
+
+# Approximate encoded size of a message, without encoding it: the length of
+# its strings and bytes plus 8 bytes per other scalar
+def payload_size(message):
+    if isinstance(message, (str, bytes, bytearray, memoryview)):
+        return len(message)
+    if isinstance(message, dict):
+        return sum(len(str(k)) + payload_size(v) for k, v in message.items())
+    if isinstance(message, (list, tuple)):
+        return sum(payload_size(v) for v in message)
+    return 8
+
+class EndpointMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, latency, size = 0, error = False):
+        with self.lock:
+            self.calls += 1
+            self.bytes += size
+            self.total += latency
+            self.buckets[bisect.bisect_left(BUCKETS, latency)] += 1
+            if error:
+                self.errors += 1
+
+    # Latency under which a fraction q of the calls fall, interpolated
+    # inside its bucket
+    def quantile(self, q):
+        with self.lock:
+            buckets = list(self.buckets)
+            calls = self.calls
+        if calls == 0:
+            return None
+        rank = q * calls
+        seen = 0
+        for i, n in enumerate(buckets):
+            if n > 0 and seen + n >= rank:
+                low = BUCKETS[i - 1] if i > 0 else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+    def report(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "latency_sum": self.total,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+class Metrics:
+    # Call counts, latencies, payload bytes and errors of the endpoints made
+    # by CommlibFactory while metrics are on, per kind (publisher,
+    # subscriber, rpc_service, rpc_client) and topic. Publisher and client
+    # latencies are the time to send (and get the reply), subscriber and
+    # service latencies the time of the callback.
+    def __init__(self):
+        self.logger = Logger("metrics")
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.job = None
+        self.path = None
+
+    def endpoint(self, kind, topic):
+        key = (kind, topic)
+        with self.lock:
+            if key not in self.endpoints:
+                self.endpoints[key] = EndpointMetrics()
+            return self.endpoints[key]
+
+    # fn(*args) timed as kind / topic; sized picks the payload of the call
+    def timed(self, kind, topic, fn, sized):
+        m = self.endpoint(kind, topic)
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                ret = fn(*args, **kwargs)
+            except Exception:
+                m.observe(time.perf_counter() - start, payload_size(sized(args)), True)
+                raise
+            size = payload_size(sized(args))
+            if ret is not None:
+                size += payload_size(ret)
+            m.observe(time.perf_counter() - start, size)
+            return ret
+        return call
+
+    # Same as timed, for a coroutine function
+    def timed_async(self, kind, topic, fn, sized):
+        m = self.endpoint(kind, topic)
+        async def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                ret = await fn(*args, **kwargs)
+            except Exception:
+                m.observe(time.perf_counter() - start, payload_size(sized(args)), True)
+                raise
+            size = payload_size(sized(args))
+            if ret is not None:
+                size += payload_size(ret)
+            m.observe(time.perf_counter() - start, size)
+            return ret
+        return call
+
+    def callback(self, kind, topic, callback):
+        if callback is None:
+            return None
+        return self.timed(kind, topic, callback, lambda args: args[0])
+
+    def publisher(self, topic, publisher):
+        return InstrumentedEndpoint(publisher, "publish",
+            self.timed("publisher", topic, publisher.publish, lambda args: args[0]))
+
+    def rpc_client(self, rpc_name, client):
+        return InstrumentedEndpoint(client, "call",
+            self.timed("rpc_client", rpc_name, client.call, lambda args: args[0]))
+
+    def report(self):
+        with self.lock:
+            endpoints = dict(self.endpoints)
+        ret = {}
+        for (kind, topic), m in endpoints.items():
+            ret.setdefault(kind, {})[topic] = m.report()
+        return ret
+
+    # The metrics in the Prometheus text exposition format
+    def prometheus(self):
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+        families = {
+            "calls_total": ("counter", []),
+            "errors_total": ("counter", []),
+            "bytes_total": ("counter", []),
+            "latency_seconds": ("histogram", [])
+        }
+        for (kind, topic), m in endpoints:
+            with m.lock:
+                calls, errors, size, total = m.calls, m.errors, m.bytes, m.total
+                buckets = list(m.buckets)
+            labels = f'kind="{kind}",topic="{topic}"'
+            families["calls_total"][1].append(f"{{{labels}}} {calls}")
+            families["errors_total"][1].append(f"{{{labels}}} {errors}")
+            families["bytes_total"][1].append(f"{{{labels}}} {size}")
+            histogram = families["latency_seconds"][1]
+            seen = 0
+            for le, n in zip(BUCKETS + ["+Inf"], buckets):
+                seen += n
+                histogram.append(f'_bucket{{{labels},le="{le}"}} {seen}')
+            histogram.append(f"_sum{{{labels}}} {total}")
+            histogram.append(f"_count{{{labels}}} {calls}")
+        lines = []
+        for family, (type, samples) in families.items():
+            name = "streamsim_endpoint_" + family
+            lines.append(f"# TYPE {name} {type}")
+            lines += [name + sample for sample in samples]
+        return "\n".join(lines) + "\n"
+
+    # Rewritten atomically, for the node exporter textfile collector
+    def dump(self, path = None):
+        path = self.path if path is None else path
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    # Dumps to path every period seconds on the given tick scheduler
+    def start(self, scheduler, path, period = 10.0):
+        self.path = path
+        if self.job is None:
+            self.job = scheduler.add(self.dump_safe, 1.0 / period, name = "metrics")
+
+    def stop(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+        if self.path is not None:
+            self.dump_safe()
+
+    def dump_safe(self):
+        try:
+            self.dump()
+        except OSError as e:
+            self.logger.error(f"Metrics not dumped to {self.path}: {str(e)}")
+
+class InstrumentedEndpoint:
+    # A publisher or RPC client with its publish / call method timed; the
+    # rest goes to the endpoint itself
+    def __init__(self, endpoint, method, timed):
+        self.endpoint = endpoint
+        setattr(self, method, timed)
+
+    def __getattr__(self, name):
+        return getattr(self.endpoint, name)
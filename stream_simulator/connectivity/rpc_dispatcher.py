@@ -0,0 +1,150 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import concurrent.futures
+
+import redis
+
+from commlib.logger import Logger
+
+class MuxRPCService:
+    # What CommlibFactory.getRPCService returns when RPCs are multiplexed:
+    # the run / stop interface of a commlib RPCService over a dispatcher
+    def __init__(self, dispatcher = None, rpc_name = None, callback = None):
+        self.dispatcher = dispatcher
+        self.rpc_name = rpc_name
+        self.on_request = callback
+
+    def run(self):
+        self.dispatcher.register(self)
+
+    def stop(self):
+        self.dispatcher.unregister(self)
+
+class RPCServicePool:
+    # Several commlib services of one rpc_name, all consuming its request
+    # queue, behind the run / stop interface of one
+    def __init__(self, services = None):
+        self.services = services
+
+    def run(self):
+        for s in self.services:
+            s.run()
+
+    def stop(self):
+        for s in self.services:
+            s.stop()
+
+class RPCDispatcher:
+    # Serves many rpc_names from one listener thread holding one Redis
+    # connection: a single BLPOP waits on the request queues of all the
+    # registered services, and the requests are handled on a small thread
+    # pool that replies through the shared connection pool. Speaks the
+    # commlib Redis RPC format ({data, header: {reply_to}} JSON messages on
+    # a list named after the RPC), so commlib clients work unchanged.
+    def __init__(self, pool = None, workers = 8):
+        self.logger = Logger("rpc_dispatcher")
+        self.pool = pool
+        self.redis = redis.Redis(connection_pool = pool)
+        self.listener = redis.Redis(connection_pool = pool)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers = workers
+        )
+        self.services = {}
+        self.lock = threading.Lock()
+        self.wake_key = f"rpc_dispatcher.{id(self)}.wake"
+        self.thread = None
+        self.running = False
+        # Set by stop, to cut a reconnection wait short
+        self.stopping = threading.Event()
+
+    def register(self, service):
+        with self.lock:
+            self.services[service.rpc_name] = service
+        self.start()
+        # Interrupts the current BLPOP so that it includes the new queue
+        self.redis.rpush(self.wake_key, "")
+
+    def unregister(self, service):
+        with self.lock:
+            if self.services.get(service.rpc_name) is service:
+                del self.services[service.rpc_name]
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.stopping.clear()
+        self.thread = threading.Thread(target = self.listen, daemon = True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.stopping.set()
+        try:
+            self.redis.rpush(self.wake_key, "")
+        except redis.exceptions.ConnectionError:
+            pass
+        self.executor.shutdown(wait = False)
+
+    def listen(self):
+        # Seconds before retrying a lost connection, doubled on every
+        # failure up to max_backoff
+        backoff = 0.1
+        max_backoff = 5.0
+        while self.running:
+            with self.lock:
+                keys = [self.wake_key] + list(self.services)
+            try:
+                res = self.listener.blpop(keys, timeout = 5)
+            except redis.exceptions.ConnectionError as e:
+                if not self.running:
+                    break
+                self.logger.error(
+                    f"RPC dispatcher connection lost, retrying in {backoff}s: {str(e)}"
+                )
+                self.stopping.wait(backoff)
+                backoff = min(backoff * 2, max_backoff)
+                continue
+            backoff = 0.1
+            if res is None:
+                continue
+            key, payload = res
+            if isinstance(key, bytes):
+                key = key.decode("utf-8")
+            if key == self.wake_key:
+                continue
+            service = self.services.get(key)
+            if service is None:
+                # Unregistered meanwhile, leave it to a later service
+                self.redis.lpush(key, payload)
+                continue
+            self.executor.submit(self.handle, service, payload)
+        try:
+            self.redis.delete(self.wake_key)
+        except redis.exceptions.ConnectionError:
+            pass
+
+    def handle(self, service, payload):
+        try:
+            msg = json.loads(payload)
+            header = msg['header']
+            reply_to = header['reply_to'] if 'reply_to' in header else \
+                header['properties']['reply_to']
+        except Exception as e:
+            self.logger.error(f"Malformed request on {service.rpc_name}: {str(e)}")
+            return
+        try:
+            resp = service.on_request(msg['data'], header)
+        except Exception as e:
+            self.logger.error(f"RPC {service.rpc_name} failed: {str(e)}")
+            resp = {}
+        # The request header, as commlib services answer
+        header = {k: header[k] for k in header if k != 'reply_to'}
+        self.redis.rpush(reply_to, json.dumps({
+            'data': resp,
+            'header': header
+        }))
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import threading
+import concurrent.futures
+
+from commlib.logger import Logger
+
+class SampleSink:
+    # Publishes the device samples and stores each as the latest value of
+    # its derp key. The store runs on a worker pool, alongside the publish
+    # instead of after it, and stores of the same key are coalesced: lset
+    # keeps only the last sample, so a key is written once with whatever is
+    # newest when its previous write returns.
+    # With batch, samples are held and flushed once per scheduler tick, so
+    # all the sensors sampled in a tick share one burst of writes: only the
+    # last sample of each key in a tick is stored, while every sample is
+    # still published.
+    # Samples of binary topics are stored by their publisher, as msgpack
+    # under their own Redis key, since derp only holds JSON. A flush sends
+    # these stores and the binary publishes through one Redis pipeline, on
+    # pool (CommlibFactory's by default).
+    def __init__(self, derp_client = None, workers = 4, batch = False,
+            pool = None):
+        self.logger = Logger("sample_sink")
+        self.derp_client = derp_client
+        self.batch = batch
+        self.pool = pool
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers = workers
+        )
+        self.lock = threading.Lock()
+        self.pending = []
+        self.latest = {}
+        self.storing = set()
+        self.stores = {}
+        self.job = None
+
+    # Flushes a batching sink at hz on the given tick scheduler
+    def start(self, scheduler, hz = 20):
+        if self.batch and self.job is None:
+            self.job = scheduler.add(self.flush, hz, name = "sample_sink")
+
+    def stop(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+        self.flush()
+
+    # sample is published on publisher and stored under key; stored, if
+    # given, is stored instead (for devices storing another shape)
+    def write(self, publisher, key, sample, stored = None):
+        record = sample if stored is None else stored
+        if hasattr(publisher, "store"):
+            self.stores[key] = publisher
+        if self.batch:
+            with self.lock:
+                self.pending.append((publisher, sample))
+                self.latest[key] = record
+            return
+        self.store(key, record)
+        publisher.publish(sample)
+
+    def flush(self):
+        pipe = None
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+            keys = [k for k in self.latest if k not in self.stores]
+            binary = {k: self.latest.pop(k) for k in list(self.latest) \
+                if k in self.stores}
+        for key in keys:
+            self.drain_soon(key)
+        for key, record in binary.items():
+            pipe = self.pipeline() if pipe is None else pipe
+            self.stores[key].store(key, record, pipe = pipe)
+        for publisher, sample in pending:
+            try:
+                if hasattr(publisher, "store"):
+                    pipe = self.pipeline() if pipe is None else pipe
+                    publisher.publish(sample, pipe = pipe)
+                else:
+                    publisher.publish(sample)
+            except Exception as e:
+                self.logger.error(f"Sample not published: {str(e)}")
+        if pipe is not None:
+            try:
+                pipe.execute()
+            except Exception as e:
+                self.logger.error(f"Binary samples not written: {str(e)}")
+
+    def pipeline(self):
+        import redis
+        if self.pool is None:
+            from stream_simulator.connectivity import CommlibFactory
+            self.pool = CommlibFactory.getRedisPool()
+        return redis.Redis(connection_pool = self.pool).pipeline(
+            transaction = False
+        )
+
+    def store(self, key, record):
+        with self.lock:
+            self.latest[key] = record
+        self.drain_soon(key)
+
+    def drain_soon(self, key):
+        with self.lock:
+            if key in self.storing:
+                return
+            self.storing.add(key)
+        self.executor.submit(self.drain, key)
+
+    def drain(self, key):
+        while True:
+            with self.lock:
+                if key not in self.latest:
+                    self.storing.discard(key)
+                    return
+                record = self.latest.pop(key)
+            try:
+                if key in self.stores:
+                    self.stores[key].store(key, record)
+                else:
+                    self.derp_client.lset(key, [record])
+            except Exception as e:
+                self.logger.error(f"Sample of {key} not stored: {str(e)}")
@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -223,7 +222,7 @@ class LedsController(BaseThing):
                 return -1
 
             if duration > 0:
-                time.sleep(duration) 
+                self.clock.sleep(duration) 
                 self.leds.write(data=[[0, 0, 0, 0]], wipe=True)
             
             return 0
@@ -310,7 +309,7 @@ class LedsController(BaseThing):
                 [{
                     "data": {"r": r, "g": g, "b": b, "brightness": brightness},
                     "type": "wipe",
-                    "timestamp": time.time()
+                    "timestamp": self.clock.time()
                 }]
             )
 
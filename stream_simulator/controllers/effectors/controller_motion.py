@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -213,7 +212,7 @@ class MotionController(BaseThing):
 
     def _init(self, delay):
         # wait for all controller to be initialized
-        time.sleep(delay)
+        self.clock.sleep(delay)
         self.logger.info("=============== Motion controller initialized ===================")
         
         if self.info["mode"] == "mock":
@@ -360,7 +359,7 @@ class MotionController(BaseThing):
     
     def _goal_handler(self, goalh):
         # prepare response's template
-        timestamp = time.time()
+        timestamp = self.clock.time()
         secs = int(timestamp)
         nanosecs = int((timestamp-secs) * 10**(9))
         ret = {
@@ -397,6 +396,6 @@ class MotionController(BaseThing):
                 self.logger.info("Goal Cancelled")
 
                 return ret
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
 
 
@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -165,7 +164,7 @@ class PanTiltController(BaseThing):
                         "pan": self._pan,
                         "tilt": self._tilt
                     },
-                    "timestamp": time.time()
+                    "timestamp": self.clock.time()
                 }]
             )
 
@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -130,7 +129,7 @@ class ServoController(BaseThing):
                     "data": {
                         "angle": self._angle
                     },
-                    "timestamp": time.time()
+                    "timestamp": self.clock.time()
                 }]
             )
 
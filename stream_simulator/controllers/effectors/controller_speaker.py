@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -194,7 +193,7 @@ class SpeakerController(BaseThing):
 
         # Concurrent speaker calls handling
         while self.blocked:
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.logger.info("Speaker unlocked")
         self.blocked = True
 
@@ -225,7 +224,7 @@ class SpeakerController(BaseThing):
             "speaker": self.name
         })
 
-        timestamp = time.time()
+        timestamp = self.clock.time()
         secs = int(timestamp)
         nanosecs = int((timestamp-secs) * 10**(9))
         ret = {
@@ -237,25 +236,25 @@ class SpeakerController(BaseThing):
             }
         }
         if self.info["mode"] == "mock":
-            now = time.time()
+            now = self.clock.time()
             self.logger.info("Speaking...")
-            while time.time() - now < 5:
+            while self.clock.time() - now < 5:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Speaking done")
 
         elif self.info["mode"] == "simulation":
-            now = time.time()
+            now = self.clock.time()
             self.logger.info("Speaking...")
-            while time.time() - now < 5:
+            while self.clock.time() - now < 5:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Speaking done")
 
         else: # The real deal
@@ -272,7 +271,7 @@ class SpeakerController(BaseThing):
                             self.logger.info("Cancel got")
                             self.blocked = False
                             return ret
-                        time.sleep(0.1)
+                        self.clock.sleep(0.1)
                 else: # google
                     from google.cloud import texttospeech
                     self.logger.info("Creating voice settings")
@@ -296,7 +295,7 @@ class SpeakerController(BaseThing):
                     self.logger.info("Speaking...")
                     
                     while not self.speaker.playing:
-                        time.sleep(0.1)
+                        self.clock.sleep(0.1)
 
                     while self.speaker.playing:
                         if goalh.cancel_event.is_set():
@@ -304,7 +303,7 @@ class SpeakerController(BaseThing):
                             self.logger.info("Cancel got")
                             self.blocked = False
                             return ret
-                        time.sleep(0.1)
+                        self.clock.sleep(0.1)
                     self.logger.info("Speaking done")
             except Exception as e:
                 self.speaker.restart()
@@ -321,7 +320,7 @@ class SpeakerController(BaseThing):
 
         # Concurrent speaker calls handling
         while self.blocked:
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.logger.info("Speaker unlocked")
         self.blocked = True
 
@@ -343,7 +342,7 @@ class SpeakerController(BaseThing):
             "volume": volume
         })
 
-        timestamp = time.time()
+        timestamp = self.clock.time()
         secs = int(timestamp)
         nanosecs = int((timestamp-secs) * 10**(9))
         ret = {
@@ -355,25 +354,25 @@ class SpeakerController(BaseThing):
             }
         }
         if self.info["mode"] == "mock":
-            now = time.time()
+            now = self.clock.time()
             self.logger.info("Playing...")
-            while time.time() - now < 5:
+            while self.clock.time() - now < 5:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Playing done")
 
         elif self.info["mode"] == "simulation":
-            now = time.time()
+            now = self.clock.time()
             self.logger.info("Playing...")
-            while time.time() - now < 5:
+            while self.clock.time() - now < 5:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Playing done")
         
         else: # The real deal      
@@ -390,7 +389,7 @@ class SpeakerController(BaseThing):
                     self.speaker.cancel()
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
                 
         self.logger.info("{} Playing finished".format(self.name))
         self.blocked = False
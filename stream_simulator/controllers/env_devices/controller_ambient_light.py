@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from colorama import Fore, Style
@@ -141,10 +139,7 @@ class EnvAmbientLightController(BaseThing):
         return {}
 
     def sensor_read(self):
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
-
-        self.logger.info(f"Sensor {self.name} read thread started")
+        self.logger.info(f"Sensor {self.name} sampling started")
 
         # Operation parameters
         self.constant_value = self.operation_parameters["constant"]['value']
@@ -159,76 +154,71 @@ class EnvAmbientLightController(BaseThing):
         self.sinus_amp = self.operation_parameters["sinus"]['amplitude']
         self.sinus_step = self.operation_parameters["sinus"]['step']
 
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.hz)
-
-            val = None
-            if self.mode == "mock":
-                if self.operation == "constant":
-                    val = self.constant_value
-                elif self.operation == "random":
-                    val = random.uniform(
-                        self.random_min,
-                        self.random_max
-                    )
-                elif self.operation == "normal":
-                    val = random.gauss(
-                        self.normal_mean,
-                        self.normal_std
-                    )
-                elif self.operation == "triangle":
-                    val = self.prev + self.way * self.triangle_step
-                    if val >= self.triangle_max or val <= self.triangle_min:
-                        self.way *= -1
-                    self.prev = val
-                elif self.operation == "sinus":
-                    val = self.sinus_dc + self.sinus_amp * math.sin(self.prev)
-                    self.prev += self.sinus_step
-                else:
-                    self.logger.warning(f"Unsupported operation: {self.operation}")
-
-                lum = val
-
-            elif self.mode == "simulation":
-                res = CommlibFactory.get_tf_affection.call({
-                    'name': self.name
-                })
-                # import pprint
-                # pprint.pprint(res)
-                # print("\n")
-                # print(res)
-                lum = self.env_properties['luminosity']
-                add_lum = 0
-                for a in res:
-                    rel_range = (1 - res[a]['distance'] / res[a]['range'])
-                    if res[a]['type'] == 'fire':
-                        # assumed 100% luminosity there
-                        add_lum += 100 * rel_range
-                    elif res[a]['type'] == "light":
-                        add_lum += rel_range * res[a]['info']['luminosity']
-
-                if add_lum < lum:
-                    lum = add_lum * 0.1 + lum
-                else:
-                    lum = lum * 0.1 + add_lum
-
-                if lum > 100:
-                    lum = 100
-
-            # Publishing value:
-            self.publisher.publish({
-                "value": lum,
-                "timestamp": time.time()
+        self.schedule(self.sensor_sample, self.hz)
+
+    def sensor_sample(self):
+        # Wait till commlib_factory is up
+        if CommlibFactory.get_tf_affection == None:
+            return
+
+        val = None
+        if self.mode == "mock":
+            if self.operation == "constant":
+                val = self.constant_value
+            elif self.operation == "random":
+                val = random.uniform(
+                    self.random_min,
+                    self.random_max
+                )
+            elif self.operation == "normal":
+                val = random.gauss(
+                    self.normal_mean,
+                    self.normal_std
+                )
+            elif self.operation == "triangle":
+                val = self.prev + self.way * self.triangle_step
+                if val >= self.triangle_max or val <= self.triangle_min:
+                    self.way *= -1
+                self.prev = val
+            elif self.operation == "sinus":
+                val = self.sinus_dc + self.sinus_amp * math.sin(self.prev)
+                self.prev += self.sinus_step
+            else:
+                self.logger.warning(f"Unsupported operation: {self.operation}")
+
+            lum = val
+
+        elif self.mode == "simulation":
+            res = CommlibFactory.get_tf_affection.call({
+                'name': self.name
             })
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "value": lum,
-                    "timestamp": time.time()
-                }]
-            )
+            # import pprint
+            # pprint.pprint(res)
+            # print("\n")
+            # print(res)
+            lum = self.env_properties['luminosity']
+            add_lum = 0
+            for a in res:
+                rel_range = (1 - res[a]['distance'] / res[a]['range'])
+                if res[a]['type'] == 'fire':
+                    # assumed 100% luminosity there
+                    add_lum += 100 * rel_range
+                elif res[a]['type'] == "light":
+                    add_lum += rel_range * res[a]['info']['luminosity']
+
+            if add_lum < lum:
+                lum = add_lum * 0.1 + lum
+            else:
+                lum = lum * 0.1 + add_lum
+
+            if lum > 100:
+                lum = 100
+
+        # Publishing and storing value:
+        self.write_sample({
+            "value": lum,
+            "timestamp": self.clock.time()
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
@@ -238,8 +228,7 @@ class EnvAmbientLightController(BaseThing):
         self.get_mode_rpc_server.run()
         self.set_mode_rpc_server.run()
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
 
         return {"enabled": True}
 
@@ -265,8 +254,7 @@ class EnvAmbientLightController(BaseThing):
         self.set_mode_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
 
     def stop(self):
         self.info["enabled"] = False
@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 import os
 import cv2
@@ -15,6 +13,7 @@ from colorama import Fore, Style
 
 from commlib.logger import Logger
 from stream_simulator.base_classes import BaseThing
+from stream_simulator.functionality import FrameCache, ResourceStore, camera_scene
 from stream_simulator.connectivity import CommlibFactory
 
 class EnvCameraController(BaseThing):
@@ -69,6 +68,8 @@ class EnvCameraController(BaseThing):
         self.derp_data_key = info["base_topic"] + ".raw"
         self.range = 80 if 'range' not in conf else conf['range']
         self.fov = 60 if 'fov' not in conf else conf['fov']
+        # Frame encoding: raw, jpeg or png
+        self.format = "raw" if 'format' not in conf else conf['format']
         self.env_properties = package['env']
 
         tf_package = {
@@ -106,12 +107,16 @@ class EnvCameraController(BaseThing):
             "colors": "dog.jpg",
             "empty": "empty.png"
         }
+        if self.mode in ["mock", "simulation"]:
+            ResourceStore.get().preload(ResourceStore.images)
 
         # Communication
         self.publisher = CommlibFactory.getPublisher(
             broker = "redis",
             topic = self.base_topic + ".data"
         )
+        # Frames go as raw bytes on binary topics
+        self.binary = CommlibFactory.isBinary(self.base_topic + ".data")
         self.enable_rpc_server = CommlibFactory.getRPCService(
             broker = "redis",
             callback = self.enable_callback,
@@ -124,141 +129,73 @@ class EnvCameraController(BaseThing):
         )
 
     def sensor_read(self):
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
+        self.logger.info(f"Sensor {self.name} sampling started")
+        self.schedule(self.sensor_sample, self.hz)
+
+    def sensor_sample(self):
+        # Wait till commlib_factory is up
+        if CommlibFactory.get_tf_affection == None:
+            return
 
-        self.logger.info(f"Sensor {self.name} read thread started")
         width = self.width
         height = self.height
-
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.hz)
-            dirname = os.path.dirname(__file__) + "/../.."
-            data = None
-
-            if self.mode == "mock":
-                im = cv2.imread(dirname + '/resources/all.png')
-                im = cv2.cvtColor(im, cv2.COLOR_BGR2RGB)
-                image = cv2.resize(im, dsize=(width, height))
-                data = [int(d) for row in image for c in row for d in c]
-                data = base64.b64encode(bytes(data)).decode("ascii")
-            elif self.mode == "simulation":
-                # Ask tf for proximity sound sources or humans
-                res = CommlibFactory.get_tf_affection.call({
-                    'name': self.name
-                })
-                # import pprint
-                # pprint.pprint(res)
-                # print('\n')
-
-                # Get the closest:
-                clos = None
-                clos_d = 100000.0
-                for x in res:
-                    if res[x]['distance'] < clos_d:
-                        clos = x
-                        clos_d = res[x]['distance']
-
-                if clos == None:
-                    cl_type = None
-                else:
-                    cl_type = res[clos]['type']
-
-                # types: qr, barcode, color, text, human
-                if cl_type == None:
-                    img = "all.png"
-                elif cl_type == "human":
-                    img = random.choice(["face.jpg", "face_inverted.jpg"])
-
-                elif cl_type == "qr":
-                    import qrcode
-                    try:
-                        im = qrcode.make(res[clos]["info"]["message"])
-                    except Exception as e:
-                        self.logger.error(f"QR creator could not produce string: {res[clos]['info']['message']} or qrcode library is not installed: {str(e)}")
-                    im.save(dirname + "/resources/qr_tmp.png")
-                    img = "qr_tmp.png"
-
-                elif cl_type == "barcode":
-                    img = "barcode.jpg"
-
-                elif cl_type == 'color':
-                    import numpy as np
-                    img = 'col_tmp.png'
-                    tmp = np.zeros((height, width, 3), np.uint8)
-                    tmp[:] = (
-                        res[clos]['info']["b"],
-                        res[clos]['info']["g"],
-                        res[clos]['info']["r"]
-                    )
-                    cv2.imwrite(dirname + "/resources/" + img, tmp)
-
-                elif cl_type == "text":
-                    import numpy as np
-                    img = 'txt_temp.png'
-                    try:
-                        from PIL import Image, ImageDraw, ImageFont, ImageFilter
-                        im  =  Image.new ( "RGB", (width,height), (255, 255, 255) )
-                        draw  =  ImageDraw.Draw ( im )
-                        final_text = res[clos]['info']["text"]
-                        final_text = [final_text[i:i+30] for i in range(0, len(final_text), 30)]
-
-                        start_coord = 30
-                        for i in final_text:
-                            draw.text (
-                                (10, start_coord),
-                                i,
-                                font=ImageFont.truetype("DejaVuSans.ttf", 36),
-                                fill=(0,0,0)
-                            )
-                            start_coord += 40
-                        im.save(dirname + "/resources/" + img)
-                    except Exception as e:
-                        self.logger.error(f"CameraController: Error with text image generation: {str(e)}")
-
-                im = cv2.imread(dirname + '/resources/' + img)
-                im = cv2.cvtColor(im, cv2.COLOR_BGR2RGB)
-                image = cv2.resize(im, dsize=(width, height))
-                data = [int(d) for row in image for c in row for d in c]
-                data = base64.b64encode(bytes(data)).decode("ascii")
-
-            # Publishing value:
-            self.publisher.publish({
-                "value": {
-                    "timestamp": time.time(),
-                    "format": "RGB",
-                    "per_rows": True,
-                    "width": width,
-                    "height": height,
-                    "image": data
-                },
-                "timestamp": time.time()
+        data = None
+        used_format = "RGB"
+
+        if self.mode == "mock":
+            data, used_format = FrameCache.get().frame(
+                camera_scene(None),
+                width,
+                height,
+                format = self.format,
+                binary = self.binary
+            )
+        elif self.mode == "simulation":
+            # Ask tf for proximity sound sources or humans
+            res = CommlibFactory.get_tf_affection.call({
+                'name': self.name
             })
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "value": {
-                        "timestamp": time.time(),
-                        "format": "RGB",
-                        "per_rows": True,
-                        "width": width,
-                        "height": height,
-                        "image": data
-                    },
-                    "timestamp": time.time()
-                }]
+            # import pprint
+            # pprint.pprint(res)
+            # print('\n')
+
+            # Get the closest:
+            clos = None
+            clos_d = 100000.0
+            for x in res:
+                if res[x]['distance'] < clos_d:
+                    clos = x
+                    clos_d = res[x]['distance']
+
+            # types: qr, barcode, color, text, human
+            data, used_format = FrameCache.get().frame(
+                camera_scene(None if clos is None else res[clos]),
+                width,
+                height,
+                format = self.format,
+                binary = self.binary
             )
 
+        # Publishing and storing value:
+        self.write_sample({
+            "value": {
+                "timestamp": self.clock.time(),
+                "format": used_format,
+                "per_rows": True,
+                "width": width,
+                "height": height,
+                "image": data
+            },
+            "timestamp": self.clock.time()
+        })
+
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
 
         self.enable_rpc_server.run()
         self.disable_rpc_server.run()
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
 
         return {"enabled": True}
 
@@ -271,8 +208,7 @@ class EnvCameraController(BaseThing):
         self.disable_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
 
     def stop(self):
         self.info["enabled"] = False
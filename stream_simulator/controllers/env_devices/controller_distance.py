@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from colorama import Fore, Style
@@ -54,6 +52,7 @@ class EnvDistanceController(BaseThing):
         }
 
         self.robots_poses = {}
+        self.robots_subscribers = None
 
         self.info = info
         self.name = info["name"]
@@ -66,6 +65,7 @@ class EnvDistanceController(BaseThing):
         self.pose = info["conf"]["pose"]
         self.derp_data_key = info["base_topic"] + ".raw"
         self.map = package["map"]
+        self.distance_field = package["distance_field"]
         self.resolution = package["resolution"]
         self.max_range = info['conf']['max_range']
 
@@ -135,6 +135,23 @@ class EnvDistanceController(BaseThing):
         self.robots_poses[nm]['x'] = message['x'] / self.resolution
         self.robots_poses[nm]['y'] = message['y'] / self.resolution
 
+    # First ray sample (2, 3, ... cells away) closer than half a meter to
+    # the robot, None if there is none
+    def ray_robot_hit(self, x, y, th, pose):
+        r = 0.5 / self.resolution
+        ox = x - pose['x']
+        oy = y - pose['y']
+        b = ox * math.cos(th) + oy * math.sin(th)
+        disc = b * b - (ox * ox + oy * oy - r * r)
+        if disc <= 0:
+            return None
+        d_in = -b - math.sqrt(disc)
+        d_out = -b + math.sqrt(disc)
+        d = max(2, int(math.floor(d_in)) + 1)
+        if d < d_out:
+            return d
+        return None
+
     def get_mode_callback(self, message, meta):
         return {
                 "mode": self.operation,
@@ -153,10 +170,7 @@ class EnvDistanceController(BaseThing):
         self.operation = message["mode"]
         return {}
 
-    def sensor_read(self):
-        while CommlibFactory.get_tf == None:
-            time.sleep(0.1)
-
+    def subscribe_robots(self):
         # Get all devices and check pan-tilts exist
         get_devices_rpc = CommlibFactory.getRPCClient(
             rpc_name = "streamsim.get_device_groups"
@@ -171,7 +185,8 @@ class EnvDistanceController(BaseThing):
             )
             self.robots_subscribers[r].run()
 
-        self.logger.info(f"Sensor {self.name} read thread started")
+    def sensor_read(self):
+        self.logger.info(f"Sensor {self.name} sampling started")
 
         # Operation parameters
         self.constant_value = self.operation_parameters["constant"]['value']
@@ -185,82 +200,66 @@ class EnvDistanceController(BaseThing):
         self.sinus_dc = self.operation_parameters["sinus"]['dc']
         self.sinus_amp = self.operation_parameters["sinus"]['amplitude']
         self.sinus_step = self.operation_parameters["sinus"]['step']
-
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.hz)
-
-            val = None
-            if self.mode == "mock":
-                if self.operation == "constant":
-                    val = self.constant_value
-                elif self.operation == "random":
-                    val = random.uniform(
-                        self.random_min,
-                        self.random_max
-                    )
-                elif self.operation == "normal":
-                    val = random.gauss(
-                        self.normal_mean,
-                        self.normal_std
-                    )
-                elif self.operation == "triangle":
-                    val = self.prev + self.way * self.triangle_step
-                    if val >= self.triangle_max or val <= self.triangle_min:
-                        self.way *= -1
-                    self.prev = val
-                elif self.operation == "sinus":
-                    val = self.sinus_dc + self.sinus_amp * math.sin(self.prev)
-                    self.prev += self.sinus_step
-                else:
-                    self.logger.warning(f"Unsupported operation: {self.operation}")
-
-            elif self.mode == "simulation":
-                # Get pose of the sensor (in case it is on a pan-tilt)
-                pp = CommlibFactory.get_tf.call({
-                    "name": self.name
-                })
-                xx = pp['x'] / self.resolution
-                yy = pp['y'] / self.resolution
-                th = pp['theta']
-
-                d = 1
-                tmpx = int(xx)
-                tmpy = int(yy)
-                limit = self.max_range / self.resolution
-                robot = False
-                while self.map[int(tmpx), int(tmpy)] == 0 and d < limit and robot == False:
-                    d += 1
-                    tmpx = xx + d * math.cos(th)
-                    tmpy = yy + d * math.sin(th)
-
-                    # Check robots atan2
-                    for r in self.robots_poses:
-                        dd = math.sqrt(
-                            math.pow(tmpy - self.robots_poses[r]['y'], 2) + \
-                            math.pow(tmpx - self.robots_poses[r]['x'], 2)
-                        )
-                        # print(dd, 0.5)
-                        if dd < (0.5 / self.resolution):
-                            print(d / self.resolution)
-                            robot = True
-
-                val = d * self.resolution
-
-                # print(self.name, val)
-            # Publishing value:
-            self.publisher.publish({
-                "value": val,
-                "timestamp": time.time()
+        self.schedule(self.sensor_sample, self.hz)
+
+    def sensor_sample(self):
+        # Wait till commlib_factory is up
+        if CommlibFactory.get_tf == None:
+            return
+        if self.robots_subscribers is None:
+            self.subscribe_robots()
+
+        val = None
+        if self.mode == "mock":
+            if self.operation == "constant":
+                val = self.constant_value
+            elif self.operation == "random":
+                val = random.uniform(
+                    self.random_min,
+                    self.random_max
+                )
+            elif self.operation == "normal":
+                val = random.gauss(
+                    self.normal_mean,
+                    self.normal_std
+                )
+            elif self.operation == "triangle":
+                val = self.prev + self.way * self.triangle_step
+                if val >= self.triangle_max or val <= self.triangle_min:
+                    self.way *= -1
+                self.prev = val
+            elif self.operation == "sinus":
+                val = self.sinus_dc + self.sinus_amp * math.sin(self.prev)
+                self.prev += self.sinus_step
+            else:
+                self.logger.warning(f"Unsupported operation: {self.operation}")
+
+        elif self.mode == "simulation":
+            # Get pose of the sensor (in case it is on a pan-tilt)
+            pp = CommlibFactory.get_tf.call({
+                "name": self.name
             })
+            xx = pp['x'] / self.resolution
+            yy = pp['y'] / self.resolution
+            th = pp['theta']
 
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "value": val,
-                    "timestamp": time.time()
-                }]
-            )
+            limit = self.max_range / self.resolution
+            d = self.distance_field.trace(xx, yy, th, limit)
+
+            # Check robots on the ray, before the obstacle
+            for r in self.robots_poses:
+                d_r = self.ray_robot_hit(xx, yy, th, self.robots_poses[r])
+                if d_r is not None and d_r < d:
+                    d = d_r
+
+            val = d * self.resolution
+
+            # print(self.name, val)
+        # Publishing and storing value:
+        self.write_sample({
+            "value": val,
+            "timestamp": self.clock.time()
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
@@ -270,8 +269,7 @@ class EnvDistanceController(BaseThing):
         self.get_mode_rpc_server.run()
         self.set_mode_rpc_server.run()
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
 
         return {"enabled": True}
 
@@ -297,8 +295,7 @@ class EnvDistanceController(BaseThing):
         self.set_mode_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
 
     def stop(self):
         self.info["enabled"] = False
@@ -2,9 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from stream_simulator.base_classes import BasicSensor
-from stream_simulator.connectivity import CommlibFactory
 import statistics
-import time
 
 class EnvGasSensorController(BasicSensor):
     def __init__(self, conf = None, package = None):
@@ -47,13 +45,7 @@ class EnvGasSensorController(BasicSensor):
 
         package["tf_declare"].call(tf_package)
 
-    def get_simulation_value(self):
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
-        res = CommlibFactory.get_tf_affection.call({
-            'name': self.name
-        })
-
+    def simulation_value(self, res):
         # humans max: 1000 ppm each
         # fires max: 5000 ppm
 
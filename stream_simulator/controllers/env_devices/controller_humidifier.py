@@ -69,7 +69,10 @@ class EnvHumidifierController(BaseThing):
             "pose": self.pose,
             "base_topic": self.base_topic,
             "name": self.name,
-            "range": self.range
+            "range": self.range,
+            "properties": {
+                "humidity": self.humidity
+            }
         }
 
         self.host = None
@@ -2,9 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from stream_simulator.base_classes import BasicSensor
-from stream_simulator.connectivity import CommlibFactory
 import statistics
-import time
 import random
 
 class EnvHumiditySensorController(BasicSensor):
@@ -48,14 +46,7 @@ class EnvHumiditySensorController(BasicSensor):
 
         package["tf_declare"].call(tf_package)
 
-    def get_simulation_value(self):
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
-
-        res = CommlibFactory.get_tf_affection.call({
-            'name': self.name
-        })
-
+    def simulation_value(self, res):
         ambient = self.env_properties['humidity']
         if len(res) == 0:
             return ambient + random.uniform(-0.5, 0.5)
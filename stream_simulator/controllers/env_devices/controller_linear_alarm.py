@@ -1,18 +1,17 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
+import asyncio
 
 from colorama import Fore, Style
 
 from commlib.logger import Logger
 from stream_simulator.base_classes import BaseThing
-from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.connectivity import CommlibFactory, AsyncRPCClient
 
 class EnvLinearAlarmController(BaseThing):
     def __init__(self,
@@ -106,55 +105,68 @@ class EnvLinearAlarmController(BaseThing):
         )
 
     def sensor_read(self):
-        # wait for tf
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
-
-        self.logger.info(f"Sensor {self.name} read thread started")
-        prev = 0
-        triggers = 0
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.hz)
-
-            val = None
-            if self.mode == "mock":
-                val = random.choice([None, "gn_robot_1"])
-            elif self.mode == "simulation":
-                res = CommlibFactory.get_tf_affection.call({
-                    'name': self.name
-                })
-                val = [x for x in res]
-
-            # Publishing value:
-            self.publisher.publish({
-                "value": val,
-                "timestamp": time.time()
+        self.logger.info(f"Sensor {self.name} sampling started")
+        self.prev = 0
+        self.triggers = 0
+        self.schedule(self.sensor_sample, self.hz)
+
+    def sensor_sample(self):
+        # Wait till commlib_factory is up
+        if CommlibFactory.get_tf_affection == None:
+            return
+
+        val = None
+        if self.mode == "mock":
+            val = random.choice([None, "gn_robot_1"])
+        elif self.mode == "simulation":
+            res = CommlibFactory.get_tf_affection.call({
+                'name': self.name
+            })
+            val = [x for x in res]
+
+        self.sensor_update(val)
+
+    # Asyncio runtime: the affections are awaited on the loop, only the
+    # publishing and storing leave it
+    async def sensor_sample_async(self):
+        if CommlibFactory.get_tf_affection == None:
+            return
+
+        val = None
+        if self.mode == "mock":
+            val = random.choice([None, "gn_robot_1"])
+        elif self.mode == "simulation":
+            res = await AsyncRPCClient(CommlibFactory.get_tf_affection).call({
+                'name': self.name
+            })
+            val = [x for x in res]
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.sensor_update, val)
+
+    def sensor_update(self, val):
+        # Publishing and storing value:
+        self.write_sample({
+            "value": val,
+            "timestamp": self.clock.time()
+        })
+
+        if self.prev == None and val not in [None, []]:
+            self.triggers += 1
+            self.publisher_triggers.publish({
+                "value": self.triggers,
+                "timestamp": self.clock.time()
             })
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "value": val,
-                    "timestamp": time.time()
-                }]
-            )
-
-            if prev == None and val not in [None, []]:
-                triggers += 1
-                self.publisher_triggers.publish({
-                    "value": triggers,
-                    "timestamp": time.time()
-                })
 
-                CommlibFactory.notify_ui(
-                    type = "alarm",
-                    data = {
-                        "name": self.name,
-                        "triggers": triggers
-                    }
-                )
+            CommlibFactory.notify_ui(
+                type = "alarm",
+                data = {
+                    "name": self.name,
+                    "triggers": self.triggers
+                }
+            )
 
-            prev = val
+        self.prev = val
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
@@ -162,8 +174,7 @@ class EnvLinearAlarmController(BaseThing):
         self.enable_rpc_server.run()
         self.disable_rpc_server.run()
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
 
         return {"enabled": True}
 
@@ -176,8 +187,7 @@ class EnvLinearAlarmController(BaseThing):
         self.disable_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
 
     def stop(self):
         self.info["enabled"] = False
@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -16,6 +15,7 @@ from colorama import Fore, Style
 from commlib.logger import Logger
 from stream_simulator.base_classes import BaseThing
 from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.functionality import ResourceStore
 
 class EnvMicrophoneController(BaseThing):
     def __init__(self,
@@ -86,6 +86,9 @@ class EnvMicrophoneController(BaseThing):
 
         package["tf_declare"].call(tf_package)
 
+        if self.mode == "simulation":
+            ResourceStore.get().preload(ResourceStore.sounds)
+
         self.blocked = False
 
         # Communication
@@ -153,7 +156,7 @@ class EnvMicrophoneController(BaseThing):
     def on_goal_record(self, goalh):
         self.logger.info("{} recording started".format(self.name))
         ret = {
-            'timestamp': time.time(),
+            'timestamp': self.clock.time(),
             'record': None,
             'volume': 0
         }
@@ -163,7 +166,7 @@ class EnvMicrophoneController(BaseThing):
 
         # Concurrent speaker calls handling
         while self.blocked:
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.logger.info("Microphone unlocked")
         self.blocked = True
 
@@ -178,21 +181,21 @@ class EnvMicrophoneController(BaseThing):
 
         
         if self.info["mode"] == "mock":
-            now = time.time()
+            now = self.clock.time()
             self.logger.info("Recording...")
-            while time.time() - now < duration:
+            while self.clock.time() - now < duration:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
 
             ret["record"] = base64.b64encode(b'0x55').decode("ascii")
             ret["volume"] = 100
 
         elif self.info["mode"] == "simulation":
             while CommlibFactory.get_tf_affection == None:
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
 
             # Ask tf for proximity sound sources or humans
             res = CommlibFactory.get_tf_affection.call({
@@ -219,14 +222,14 @@ class EnvMicrophoneController(BaseThing):
                     else:
                         wav = "english_sentence.wav"
 
-            now = time.time()
+            now = self.clock.time()
             self.logger.info(f"Recording... {res[clos]['type']}, {res[clos]['info']}")
-            while time.time() - now < duration:
+            while self.clock.time() - now < duration:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Recording done")
 
             ret["record"] = self.load_wav(wav)
@@ -237,23 +240,4 @@ class EnvMicrophoneController(BaseThing):
         return ret
 
     def load_wav(self, path):
-        # Read from file
-        import wave
-        import os
-        from pathlib import Path
-        dirname = Path(__file__).resolve().parent
-        fil = str(dirname) + '/../../resources/' + path
-        self.logger.info("Reading sound from " + fil)
-        f = wave.open(fil, 'rb')
-        channels = f.getnchannels()
-        framerate = f.getframerate()
-        sample_width = f.getsampwidth()
-        data = bytearray()
-        sample = f.readframes(256)
-        while sample:
-            for s in sample:
-                data.append(s)
-            sample = f.readframes(256)
-        f.close()
-        source = base64.b64encode(data).decode("ascii")
-        return source
+        return ResourceStore.get().wav_base64(path)
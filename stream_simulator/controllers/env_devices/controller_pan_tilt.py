@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from colorama import Fore, Style
@@ -136,17 +134,18 @@ class EnvPanTiltController(BaseThing):
         self.prev = 0
         self.hz = self.operation_parameters['sinus']['hz']
         self.sinus_step = self.operation_parameters['sinus']['step']
-        while self.info['enabled']:
-            if self.operation == "sinus":
-                time.sleep(1.0 / self.hz)
-                self.pan = self.pan_dc + self.pan_range / 2.0 * math.sin(self.prev)
-                self.prev += self.sinus_step
-
-            self.data_publisher.publish({
-                'pan': self.pan,
-                'tilt': self.tilt,
-                'name': self.name
-            })
+        self.schedule(self.data_sample, self.hz)
+
+    def data_sample(self):
+        if self.operation == "sinus":
+            self.pan = self.pan_dc + self.pan_range / 2.0 * math.sin(self.prev)
+            self.prev += self.sinus_step
+
+        self.data_publisher.publish({
+            'pan': self.pan,
+            'tilt': self.tilt,
+            'name': self.name
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
@@ -157,8 +156,7 @@ class EnvPanTiltController(BaseThing):
         self.set_subscriber.run()
 
         if self.mode == "mock":
-            self.data_thread = threading.Thread(target = self.thread_fun)
-            self.data_thread.start()
+            self.thread_fun()
 
         return {"enabled": True}
 
@@ -190,8 +188,7 @@ class EnvPanTiltController(BaseThing):
 
         if self.mode == "mock":
             if self.info['enabled']:
-                self.data_thread = threading.Thread(target = self.thread_fun)
-                self.data_thread.start()
+                self.thread_fun()
 
     def stop(self):
         self.info["enabled"] = False
@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -158,7 +157,7 @@ class EnvSpeakerController(BaseThing):
 
         # Concurrent speaker calls handling
         while self.blocked:
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.logger.info("Speaker unlocked")
         self.blocked = True
 
@@ -174,20 +173,20 @@ class EnvSpeakerController(BaseThing):
         })
 
         if self.info["mode"] in ["mock", "simulation"]:
-            now = time.time()
+            now = self.clock.time()
             self.logger.info("Playing...")
-            while time.time() - now < 5:
+            while self.clock.time() - now < 5:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Playing done")
 
         self.logger.info("{} Playing finished".format(self.name))
         self.blocked = False
         return {
-            "timestamp": time.time()
+            "timestamp": self.clock.time()
         }
 
     def on_goal_speak(self, goalh):
@@ -197,7 +196,7 @@ class EnvSpeakerController(BaseThing):
 
         # Concurrent speaker calls handling
         while self.blocked:
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.logger.info("Speaker unlocked")
         self.blocked = True
 
@@ -226,18 +225,18 @@ class EnvSpeakerController(BaseThing):
         })
 
         if self.info["mode"] in ["mock", "simulation"]:
-            now = time.time()
+            now = self.clock.time()
             self.logger.info("Speaking...")
-            while time.time() - now < 5:
+            while self.clock.time() - now < 5:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Speaking done")
 
         self.logger.info("{} Speak finished".format(self.name))
         self.blocked = False
         return {
-            'timestamp': time.time()
+            'timestamp': self.clock.time()
         }
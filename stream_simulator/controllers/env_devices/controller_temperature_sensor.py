@@ -1,9 +1,7 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 from stream_simulator.base_classes import BasicSensor
-from stream_simulator.connectivity import CommlibFactory
 import statistics
 
 class EnvTemperatureSensorController(BasicSensor):
@@ -47,12 +45,7 @@ class EnvTemperatureSensorController(BasicSensor):
 
         package["tf_declare"].call(tf_package)
 
-    def get_simulation_value(self):
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
-        res = CommlibFactory.get_tf_affection.call({
-            'name': self.name
-        })
+    def simulation_value(self, res):
         # Logic
         amb = self.env_properties['temperature']
         temps = []
@@ -69,7 +69,10 @@ class EnvThermostatController(BaseThing):
             "pose": self.pose,
             "base_topic": self.base_topic,
             "name": self.name,
-            "range": self.range
+            "range": self.range,
+            "properties": {
+                "temperature": self.temperature
+            }
         }
 
         self.host = None
@@ -5,7 +5,6 @@ import time
 import json
 import math
 import logging
-import threading
 import random
 from colorama import Fore, Style
 
@@ -99,39 +98,34 @@ class ButtonArrayController(BaseThing):
             self.sim_button_pressed_sub.run()
 
     def dispatch_information(self, _data, _button):
-        # Publish to stream
-        self.publishers[_button].publish({
-            "data": _data,
-            "timestamp": time.time()
-        })
-        # Set in memory
-        r = CommlibFactory.derp_client.lset(
-            self.derp_data_keys[_button],
-            [{
+        # Publish to stream and set in memory
+        self.write_sample(
+            {
                 "data": _data,
-                "timestamp": time.time()
-            }]
+                "timestamp": self.clock.time()
+            },
+            publisher = self.publishers[_button],
+            key = self.derp_data_keys[_button]
         )
 
     # Untested!!!
     def sim_button_pressed(self, data, meta):
         self.dispatch_information(1, data["button"])
-        time.sleep(0.1)
+        self.clock.sleep(0.1)
         # Simulated release
         self.dispatch_information(0, data["button"])
         self.logger.warning(f"Button controller: Pressed from sim! {data}")
 
     def sensor_read(self):
-        self.logger.info(f"Button {self.info['id']} sensor read thread started")
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.info["hz"])
-            if self.info["mode"] == "mock":
-                _val = float(random.randint(0,1))
-                _place = random.randint(0, len(self.button_places) - 1)
+        self.logger.info(f"Button {self.info['id']} sampling started")
+        self.schedule(self.sensor_sample, self.info["hz"])
 
-                self.dispatch_information(_val, self.button_places[_place])
+    def sensor_sample(self):
+        if self.info["mode"] == "mock":
+            _val = float(random.randint(0,1))
+            _place = random.randint(0, len(self.button_places) - 1)
 
-        self.logger.info(f"Button {self.info['id']} sensor read thread stopped")
+            self.dispatch_information(_val, self.button_places[_place])
 
     # Untested!!!
     def real_button_event(self, gpio_pin, level, button_id):
@@ -154,8 +148,7 @@ class ButtonArrayController(BaseThing):
             buttons = [i for i in range(self.number_of_buttons)]
             self.sensor.enable_pressed(buttons)
         if self.info["mode"] == "mock":
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
             self.logger.info(f"Button {self.info['id']} reads with {self.info['hz']} Hz")
 
     def stop(self):
@@ -171,8 +164,7 @@ class ButtonArrayController(BaseThing):
         self.info["queue_size"] = message["queue_size"]
 
         if self.info["mode"] == "mock":
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
 
         return {"enabled": True}
 
@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 import cv2
 import os
@@ -18,6 +16,7 @@ from colorama import Fore, Style
 from commlib.logger import Logger
 from stream_simulator.connectivity import CommlibFactory
 from stream_simulator.base_classes import BaseThing
+from stream_simulator.functionality import FrameCache, ResourceStore, camera_scene
 
 from pidevices import Dims
 
@@ -73,6 +72,8 @@ class CameraController(BaseThing):
         self.derp_data_key = info["base_topic"] + ".raw"
         self.range = 80 if 'range' not in conf else conf['range']
         self.fov = 60 if 'fov' not in conf else conf['fov']
+        # Frame encoding: raw, jpeg or png
+        self.format = "raw" if 'format' not in conf else conf['format']
         self.env_properties = package["env_properties"]
 
         # tf handling
@@ -105,6 +106,8 @@ class CameraController(BaseThing):
             broker = "redis",
             topic = self.base_topic + ".data"
         )
+        # Frames go as raw bytes on binary topics
+        self.binary = CommlibFactory.isBinary(self.base_topic + ".data")
         
         # merge actors
         self.actors = []
@@ -154,14 +157,15 @@ class CameraController(BaseThing):
             "empty": "empty.png",
             "superman": "all.png"
         }
+        if self.info["mode"] in ["mock", "simulation"]:
+            ResourceStore.get().preload(ResourceStore.images)
 
     def robot_pose_update(self, message, meta):
         self.robot_pose = message
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
         return {"enabled": True}
 
     def disable_callback(self, message, meta):
@@ -174,8 +178,7 @@ class CameraController(BaseThing):
         self.video_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
             self.logger.info("Camera {} reads with {} Hz".format(self.info["id"], self.info["hz"]))
 
     def stop(self):
@@ -183,10 +186,18 @@ class CameraController(BaseThing):
         self.disable_rpc_server.stop()
         self.video_rpc_server.stop()
 
-    def writeImageToFile(self, path = None, image = None, w = None, h = None):
+    def writeImageToFile(self, path = None, image = None, w = None, h = None,
+            format = None):
         try:
             from PIL import Image
-            imgdata = list(base64.b64decode(image.encode("ascii")))
+            if isinstance(image, str):
+                image = base64.b64decode(image.encode("ascii"))
+            if format in ["JPEG", "PNG"]:
+                import numpy as np
+                im = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR)
+                cv2.imwrite(path, im)
+                return
+            imgdata = list(image)
             img = Image.new('RGB', [w, h], 255)
             data = img.load()
             cnt = 0
@@ -208,19 +219,20 @@ class CameraController(BaseThing):
         width = 640
         height = 480
         # Wait till time passes
-        now = time.time()
+        now = self.clock.time()
         curr_img = self.image_counter
 
         self.logger.info(f"Generating images")
-        while time.time() - now < duration:
+        while self.clock.time() - now < duration:
             self.writeImageToFile(
                 path = expanduser("~") + f"/img_{self.image_counter}_motion.jpg",
                 image = self.img["image"],
                 w = width,
-                h = height
+                h = height,
+                format = self.img["format"]
             )
             while curr_img == self.image_counter:
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             curr_img = self.image_counter
 
         self.logger.info(f"Creating the video")
@@ -257,49 +269,47 @@ class CameraController(BaseThing):
         return {"data": enc_data.decode('ascii')}
 
     def sensor_read(self):
-        self.logger.info("camera {} sensor read thread started".format(self.info["id"]))
+        self.logger.info("camera {} sampling started".format(self.info["id"]))
         self.image_counter = 0
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.info["hz"])
-            self.img = self.get_image({"width": 640, "height": 480})
-            self.image_counter += 1
-            # Publishing value:
-            self.publisher.publish({
-                "data": self.img,
-                "timestamp": time.time()
-            })
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "data": self.img,
-                    "timestamp": time.time()
-                }]
-            )
+        self.schedule(self.sensor_sample, self.info["hz"])
+
+    def sensor_sample(self):
+        # Wait till commlib_factory is up
+        if self.info["mode"] == "simulation" and \
+            CommlibFactory.get_tf_affection == None:
+            return
+
+        self.img = self.get_image({"width": 640, "height": 480})
+        self.image_counter += 1
+        # Publishing and storing value:
+        self.write_sample({
+            "data": self.img,
+            "timestamp": self.clock.time()
+        })
 
     def get_image(self, message):
         self.logger.debug("Robot {}: get image callback: {}".format(self.name, message))
         try:
             width = message["width"] if "width" in message else 640
             height = message["height"] if "height" in message else 480
-            data_format = message["format"] if "format" in message else "bmp"
+            data_format = message["format"] if "format" in message else None
         except Exception as e:
             self.logger.error("{}: Malformed message for image get: {} - {}".format(self.name, str(e.__class__), str(e)))
             return {}
 
-        dirname = os.path.dirname(__file__) + "/../.."
-
         if self.info["mode"] == "mock":
-            im = cv2.imread(dirname + '/resources/all.png')
-            im = cv2.cvtColor(im, cv2.COLOR_BGR2RGB)
-            image = cv2.resize(im, dsize=(width, height))
-            data = [int(d) for row in image for c in row for d in c]
-            data = base64.b64encode(bytes(data)).decode("ascii")
+            data, used_format = FrameCache.get().frame(
+                camera_scene(None),
+                width,
+                height,
+                format = data_format or self.format,
+                binary = self.binary,
+                raw_format = "BMP"
+            )
 
         elif self.info["mode"] == "simulation":
             while CommlibFactory.get_tf_affection == None:
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             # Ask tf for proximity sound sources or humans
             res = CommlibFactory.get_tf_affection.call({
                 'name': self.name
@@ -316,85 +326,34 @@ class CameraController(BaseThing):
                     clos = x
                     clos_d = res[x]['distance']
 
-            if clos == None:
-                cl_type = None
-            else:
-                cl_type = res[clos]['type']
-
-            # print(self.name, cl_type)
-
-            if cl_type == None:
-                img = "all.png"
-            elif cl_type == "human":
-                img = random.choice(["face.jpg", "face_inverted.jpg"])
-
-            elif cl_type == "qr":
-                import qrcode
-                try:
-                    im = qrcode.make(res[clos]["info"]["message"])
-                except Exception as e:
-                    self.logger.error(f"QR creator could not produce string: {res[clos]['info']['message']} or qrcode library is not installed: {str(e)}")
-                im.save(dirname + "/resources/qr_tmp.png")
-                img = "qr_tmp.png"
-
-            elif cl_type == "barcode":
-                img = "barcode.jpg"
-
-            elif cl_type == 'color':
-                import numpy as np
-                img = 'col_tmp.png'
-                tmp = np.zeros((height, width, 3), np.uint8)
-                tmp[:] = (
-                    res[clos]['info']["b"],
-                    res[clos]['info']["g"],
-                    res[clos]['info']["r"]
-                )
-                cv2.imwrite(dirname + "/resources/" + img, tmp)
-
-            elif cl_type == "text":
-                import numpy as np
-                img = 'txt_temp.png'
-                try:
-                    from PIL import Image, ImageDraw, ImageFont, ImageFilter
-                    im  =  Image.new ( "RGB", (width,height), (255, 255, 255) )
-                    draw  =  ImageDraw.Draw ( im )
-                    final_text = res[clos]['info']["text"]
-                    final_text = [final_text[i:i+30] for i in range(0, len(final_text), 30)]
-
-                    start_coord = 30
-                    for i in final_text:
-                        draw.text (
-                            (10, start_coord),
-                            i,
-                            font=ImageFont.truetype("DejaVuSans.ttf", 36),
-                            fill=(0,0,0)
-                        )
-                        start_coord += 40
-                    im.save(dirname + "/resources/" + img)
-                except Exception as e:
-                    self.logger.error(f"CameraController: Error with text image generation: {str(e)}")
-
-            im = cv2.imread(dirname + '/resources/' + img)
-            im = cv2.cvtColor(im, cv2.COLOR_BGR2RGB)
-            image = cv2.resize(im, dsize=(width, height))
-            data = [int(d) for row in image for c in row for d in c]
-            data = base64.b64encode(bytes(data)).decode("ascii")
+            # types: qr, barcode, color, text, human
+            data, used_format = FrameCache.get().frame(
+                camera_scene(None if clos is None else res[clos]),
+                width,
+                height,
+                format = data_format or self.format,
+                binary = self.binary,
+                raw_format = "BMP"
+            )
 
         else: # The real deal
+            data_format = data_format or "bmp"
+            used_format = data_format.upper()
             try:
                 data = self.sensor.read(image_dims=Dims(width, height), image_format=data_format, save=True).data
             except Exception as e:
                 data = self.sensor.get_frame().data
                 self.sensor.restart()
 
-            data = base64.b64encode(data).decode("ascii")
+            if not self.binary:
+                data = base64.b64encode(data).decode("ascii")
 
-        timestamp = time.time()
+        timestamp = self.clock.time()
         secs = int(timestamp)
         nanosecs = int((timestamp-secs) * 10**(9))
         ret = {
-            "timestamp": time.time(),
-            "format": "BMP",
+            "timestamp": self.clock.time(),
+            "format": used_format,
             "per_rows": True,
             "width": width,
             "height": height,
@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from colorama import Fore, Style
@@ -121,14 +119,23 @@ class CytronLFController(BaseThing):
         )
 
     def sensor_read(self):
-        self.logger.info("Cytron-LF {} sensor read thread started".format(self.info["id"]))
-
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.info["hz"])
-
-            val = {}
+        self.logger.info("Cytron-LF {} sampling started".format(self.info["id"]))
+        self.schedule(self.sensor_sample, self.info["hz"])
+
+    def sensor_sample(self):
+        val = {}
+
+        if self.info["mode"] == "mock":
+            val = {
+                "so_1": 1 if (random.uniform(0,1) > 0.5) else 0,
+                "so_2": 1 if (random.uniform(0,1) > 0.5) else 0,
+                "so_3": 1 if (random.uniform(0,1) > 0.5) else 0,
+                "so_4": 1 if (random.uniform(0,1) > 0.5) else 0,
+                "so_5": 1 if (random.uniform(0,1) > 0.5) else 0
+            }
 
-            if self.info["mode"] == "mock":
+        elif self.info["mode"] == "simulation":
+            try:
                 val = {
                     "so_1": 1 if (random.uniform(0,1) > 0.5) else 0,
                     "so_2": 1 if (random.uniform(0,1) > 0.5) else 0,
@@ -136,49 +143,29 @@ class CytronLFController(BaseThing):
                     "so_4": 1 if (random.uniform(0,1) > 0.5) else 0,
                     "so_5": 1 if (random.uniform(0,1) > 0.5) else 0
                 }
-
-            elif self.info["mode"] == "simulation":
-                try:
-                    val = {
-                        "so_1": 1 if (random.uniform(0,1) > 0.5) else 0,
-                        "so_2": 1 if (random.uniform(0,1) > 0.5) else 0,
-                        "so_3": 1 if (random.uniform(0,1) > 0.5) else 0,
-                        "so_4": 1 if (random.uniform(0,1) > 0.5) else 0,
-                        "so_5": 1 if (random.uniform(0,1) > 0.5) else 0
-                    }
-                except:
-                    self.logger.warning("Pose not got yet..")
-                    pass
-            else: # The real deal
-                data = self.lf_sensor.read()
-
-                val = data._asdict()
-
-            # Publishing value:
-            self.publisher.publish({
-                'so_1': val['so_1'],
-                'so_2': val['so_2'],
-                'so_3': val['so_3'],
-                'so_4': val['so_4'],
-                'so_5': val['so_5']
-            })
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "data": {
-                        'so_1': val['so_1'],
-                        'so_2': val['so_2'],
-                        'so_3': val['so_3'],
-                        'so_4': val['so_4'],
-                        'so_5': val['so_5']
-                    },
-                    "timestamp": time.time()
-                }]
-            )
-
-        self.logger.info("Cytron-LF {} sensor read thread stopped".format(self.info["id"]))
+            except:
+                self.logger.warning("Pose not got yet..")
+                pass
+        else: # The real deal
+            data = self.lf_sensor.read()
+
+            val = data._asdict()
+
+        # Publishing and storing value:
+        data = {
+            'so_1': val['so_1'],
+            'so_2': val['so_2'],
+            'so_3': val['so_3'],
+            'so_4': val['so_4'],
+            'so_5': val['so_5']
+        }
+        self.write_sample(
+            data,
+            stored = {
+                "data": data,
+                "timestamp": self.clock.time()
+            }
+        )
 
     def calibrate_callback(self, message, meta):
         if self.info["mode"] == "real":
@@ -190,8 +177,7 @@ class CytronLFController(BaseThing):
         self.info["queue_size"] = message["queue_size"]
 
         self.memory = self.info["queue_size"] * [0]
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
         return {"enabled": True}
 
     def disable_callback(self, message, meta):
@@ -208,8 +194,7 @@ class CytronLFController(BaseThing):
 
         if self.info["enabled"]:
             self.memory = self.info["queue_size"] * [0]
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
             
             self.logger.info("Cytron Line Follower {} reads with {} Hz".format(self.info["id"], self.info["hz"]))
 
@@ -218,7 +203,7 @@ class CytronLFController(BaseThing):
         self.enable_rpc_server.stop()
         self.disable_rpc_server.stop()
 
-        self.sensor_read_thread.join()
+        self.unschedule()
 
         # if we are on "real" mode and the controller has started then Terminate it
         if self.info["mode"] == "real":
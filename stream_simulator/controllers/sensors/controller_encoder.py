@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from commlib.logger import Logger
@@ -108,122 +106,108 @@ class EncoderController(BaseThing):
         )
 
     def sensor_read(self):
-        self.logger.info("Encoder {} sensor read thread started".format(self.info["id"]))
+        self.logger.info("Encoder {} sampling started".format(self.info["id"]))
+        self.schedule(self.sensor_sample, self.info["hz"])
+
+    def sensor_sample(self):
         period = 1.0 / self.info["hz"]
 
-        while self.info["enabled"]:
-            time.sleep(period)
-            
-            if self.info["mode"] == "mock":
-                self.data = float(random.uniform(1000,2000))
-            elif self.info["mode"] == "simulation":
-                time.sleep(1)
-                if self.motion_derpme_topic == None:
-                    rpc_cl = CommlibFactory.getRPCClient(
-                        rpc_name = f"robot.{self.robot}.nodes_detector.get_connected_devices"
-                    )
-                    res = None
-                    while res == None: # if server is unready
-                        res = rpc_cl.call({})
-                    for d in res['devices']:
-                        if d['type'] == "SKID_STEER":
-                            self.motion_derpme_topic = d['base_topic'] + '.raw'
-
-                # get the two last velocities
-                rl = CommlibFactory.derp_client.lget(
-                    self.motion_derpme_topic, 0, -1
+        if self.info["mode"] == "mock":
+            self.data = float(random.uniform(1000,2000))
+        elif self.info["mode"] == "simulation":
+            if self.motion_derpme_topic == None:
+                rpc_cl = CommlibFactory.getRPCClient(
+                    rpc_name = f"robot.{self.robot}.nodes_detector.get_connected_devices"
                 )
-                self.data = 0
-                if len(rl['val']) == 0:
-                    pass
-                elif len(rl['val']) == 1:
-                    t = 0
-                    data = rl['val'][0]['data']
+                res = rpc_cl.call({})
+                if res is None: # server unready, retried on the next tick
+                    return
+                for d in res['devices']:
+                    if d['type'] == "SKID_STEER":
+                        self.motion_derpme_topic = d['base_topic'] + '.raw'
+
+            # get the two last velocities
+            rl = CommlibFactory.derp_client.lget(
+                self.motion_derpme_topic, 0, -1
+            )
+            self.data = 0
+            if len(rl['val']) == 0:
+                pass
+            elif len(rl['val']) == 1:
+                t = 0
+                data = rl['val'][0]['data']
+
+                # check timestamps:
+                if rl['val'][0]['timestamp'] < self.clock.time() - period:
+                    # the whole period had the velocity
+                    t = period
+                    # print("vel was", rl['val'][0]['data'], "for", period, "sec")
+                else:
+                    t = self.clock.time() - rl['val'][0]['timestamp']
 
-                    # check timestamps:
-                    if rl['val'][0]['timestamp'] < time.time() - period:
-                        # the whole period had the velocity
-                        t = period
-                        # print("vel was", rl['val'][0]['data'], "for", period, "sec")
-                    else:
-                        t = time.time() - rl['val'][0]['timestamp']
+                lin_factor = self.linear_coeff * t * data['linearVelocity']
+                if "L" in self.place:
+                    rot_factor = - self.angular_coeff * t * data['rotationalVelocity']
+                else:
+                    rot_factor = self.angular_coeff * t * data['rotationalVelocity']
 
+                self.data = lin_factor + rot_factor
+                # print("Case 1", t, lin_factor, rot_factor, self.data, self.name)
+
+            else:
+                # check timestamps:
+                if rl['val'][0]['timestamp'] < self.clock.time() - period:
+                    # the whole period had the velocity
+                    t = period
+                    data = rl['val'][0]['data']
                     lin_factor = self.linear_coeff * t * data['linearVelocity']
                     if "L" in self.place:
                         rot_factor = - self.angular_coeff * t * data['rotationalVelocity']
                     else:
                         rot_factor = self.angular_coeff * t * data['rotationalVelocity']
-
                     self.data = lin_factor + rot_factor
-                    # print("Case 1", t, lin_factor, rot_factor, self.data, self.name)
 
+                    # print("Case 1", t, lin_factor, rot_factor, self.data, self.name)
                 else:
-                    # check timestamps:
-                    if rl['val'][0]['timestamp'] < time.time() - period:
-                        # the whole period had the velocity
-                        t = period
-                        data = rl['val'][0]['data']
-                        lin_factor = self.linear_coeff * t * data['linearVelocity']
-                        if "L" in self.place:
-                            rot_factor = - self.angular_coeff * t * data['rotationalVelocity']
-                        else:
-                            rot_factor = self.angular_coeff * t * data['rotationalVelocity']
-                        self.data = lin_factor + rot_factor
-
-                        # print("Case 1", t, lin_factor, rot_factor, self.data, self.name)
+                    t = self.clock.time() - rl['val'][0]['timestamp']
+                    data = rl['val'][0]['data']
+                    lin_factor = self.linear_coeff * t * data['linearVelocity']
+                    if "L" in self.place:
+                        rot_factor = - self.angular_coeff * t * data['rotationalVelocity']
                     else:
-                        t = time.time() - rl['val'][0]['timestamp']
-                        data = rl['val'][0]['data']
-                        lin_factor = self.linear_coeff * t * data['linearVelocity']
+                        rot_factor = self.angular_coeff * t * data['rotationalVelocity']
+                    self.data = lin_factor + rot_factor
+                    # print("Case 3", t, lin_factor, rot_factor, self.data, self.name)
+
+                    # we must take the prev as well
+                    t_p = self.clock.time() - rl['val'][1]['timestamp']
+                    if t_p > period:
+                        t_p = period - t
+                        data = rl['val'][1]['data']
+                        lin_factor = self.linear_coeff * t_p * data['linearVelocity']
                         if "L" in self.place:
-                            rot_factor = - self.angular_coeff * t * data['rotationalVelocity']
+                            rot_factor = - self.angular_coeff * t_p * data['rotationalVelocity']
                         else:
-                            rot_factor = self.angular_coeff * t * data['rotationalVelocity']
-                        self.data = lin_factor + rot_factor
-                        # print("Case 3", t, lin_factor, rot_factor, self.data, self.name)
-
-                        # we must take the prev as well
-                        t_p = time.time() - rl['val'][1]['timestamp']
-                        if t_p > period:
-                            t_p = period - t
-                            data = rl['val'][1]['data']
-                            lin_factor = self.linear_coeff * t_p * data['linearVelocity']
-                            if "L" in self.place:
-                                rot_factor = - self.angular_coeff * t_p * data['rotationalVelocity']
-                            else:
-                                rot_factor = self.angular_coeff * t_p * data['rotationalVelocity']
-                            self.data += lin_factor + rot_factor
-
-                            # print("Case 3.2", t_p, lin_factor, rot_factor, self.data, self.name)
-
-            else: # The real deal
-                self.data = self.sensor.read()["rps"]
-
-            # Publishing value:
-            self.publisher.publish({
-                "rps": self.data,
-                "timestamp": time.time()
-            })
-            # print("storing", self.data, self.place)
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "rps": self.data,
-                    "timestamp": time.time()
-                }]
-            )
+                            rot_factor = self.angular_coeff * t_p * data['rotationalVelocity']
+                        self.data += lin_factor + rot_factor
+
+                        # print("Case 3.2", t_p, lin_factor, rot_factor, self.data, self.name)
+
+        else: # The real deal
+            self.data = self.sensor.read()["rps"]
 
-        self.logger.info("Encoder {} sensor read thread stopped".format(self.info["id"]))
+        # Publishing and storing value:
+        self.write_sample({
+            "rps": self.data,
+            "timestamp": self.clock.time()
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
         self.info["hz"] = message["hz"]
         self.info["queue_size"] = message["queue_size"]
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
         return {"enabled": True}
 
     def disable_callback(self, message, meta):
@@ -236,8 +220,7 @@ class EncoderController(BaseThing):
         self.disable_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
             self.logger.info("Encoder {} reads with {} Hz".format(self.info["id"], self.info["hz"]))
 
             if self.info["mode"] == "real":
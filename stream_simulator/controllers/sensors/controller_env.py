@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from colorama import Fore, Style
@@ -113,106 +111,93 @@ class EnvController(BaseThing):
         )
 
     def sensor_read(self):
-        while CommlibFactory.get_tf_affection == None:
-            time.sleep(0.1)
-
-        self.logger.info("Env {} sensor read thread started".format(self.info["id"]))
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.info["hz"])
-
-            val = {
-                "temperature": 0,
-                "pressure": 0,
-                "humidity": 0,
-                "gas": 0
-            }
-            if self.info["mode"] == "mock":
-                val["temperature"] = float(random.uniform(30, 10))
-                val["pressure"] = float(random.uniform(30, 10))
-                val["humidity"] = float(random.uniform(30, 10))
-                val["gas"] = float(random.uniform(30, 10))
-
-            elif self.info["mode"] == "simulation":
-                while CommlibFactory.get_tf_affection == None:
-                    time.sleep(0.1)
-                res = CommlibFactory.get_tf_affection.call({
-                    'name': self.name
-                })
-
-                import statistics
-                gas_aff = res["gas"]
-                hum_aff = res["humidity"]
-                tem_aff = res["temperature"]
-
-                # temperature
-                amb = self.env_properties['temperature']
-                temps = []
-                for a in tem_aff:
-                    r = (1 - tem_aff[a]['distance'] / tem_aff[a]['range']) * tem_aff[a]['info']['temperature']
-                    temps.append(r)
-                val["temperature"] = amb
-                if len(temps) != 0:
-                    val["temperature"] = amb + statistics.mean(temps)
-
-                # humidity
-                ambient = self.env_properties['humidity']
-                if len(hum_aff) == 0:
-                    val["humidity"] = ambient + random.uniform(-0.5, 0.5)
-                vs = []
-                for a in hum_aff:
-                    vs.append((1 - hum_aff[a]['distance'] / hum_aff[a]['range']) * hum_aff[a]['info']['humidity'])
-                if len(vs) > 0:
-                    affections = statistics.mean(vs)
-                    if ambient > affections:
-                        ambient += affections * 0.1
-                    else:
-                        ambient = affections - (affections - ambient) * 0.1
-                val["humidity"] = ambient
-
-                # gas
-                ppm = 400 # typical environmental
-                for a in gas_aff:
-                    rel_range = (1 - gas_aff[a]['distance'] / gas_aff[a]['range'])
-                    if gas_aff[a]['type'] == 'human':
-                        ppm += 1000.0 * rel_range
-                    elif gas_aff[a]['type'] == 'fire':
-                        ppm += 5000.0 * rel_range
-                val["gas"] = ppm
-
-                # pressure
-                val["pressure"] = 27.3 + random.uniform(-3, 3)
-            else: # The real deal
-                data = self.sensor.read()
-
-                val["temperature"] = data.temp
-                val["pressure"] = data.pres
-                val["humidity"] = data.hum
-                val["gas"] = data.gas
-
-            # Publishing value:
-            self.publisher.publish({
-                "data": val,
-                "timestamp": time.time()
+        self.logger.info("Env {} sampling started".format(self.info["id"]))
+        self.schedule(self.sensor_sample, self.info["hz"])
+
+    def sensor_sample(self):
+        # Wait till commlib_factory is up
+        if CommlibFactory.get_tf_affection == None:
+            return
+
+        val = {
+            "temperature": 0,
+            "pressure": 0,
+            "humidity": 0,
+            "gas": 0
+        }
+        if self.info["mode"] == "mock":
+            val["temperature"] = float(random.uniform(30, 10))
+            val["pressure"] = float(random.uniform(30, 10))
+            val["humidity"] = float(random.uniform(30, 10))
+            val["gas"] = float(random.uniform(30, 10))
+
+        elif self.info["mode"] == "simulation":
+            res = CommlibFactory.get_tf_affection.call({
+                'name': self.name
             })
 
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "data": val,
-                    "timestamp": time.time()
-                }]
-            )
-
-        self.logger.info("Env {} sensor read thread stopped".format(self.info["id"]))
+            import statistics
+            gas_aff = res["gas"]
+            hum_aff = res["humidity"]
+            tem_aff = res["temperature"]
+
+            # temperature
+            amb = self.env_properties['temperature']
+            temps = []
+            for a in tem_aff:
+                r = (1 - tem_aff[a]['distance'] / tem_aff[a]['range']) * tem_aff[a]['info']['temperature']
+                temps.append(r)
+            val["temperature"] = amb
+            if len(temps) != 0:
+                val["temperature"] = amb + statistics.mean(temps)
+
+            # humidity
+            ambient = self.env_properties['humidity']
+            if len(hum_aff) == 0:
+                val["humidity"] = ambient + random.uniform(-0.5, 0.5)
+            vs = []
+            for a in hum_aff:
+                vs.append((1 - hum_aff[a]['distance'] / hum_aff[a]['range']) * hum_aff[a]['info']['humidity'])
+            if len(vs) > 0:
+                affections = statistics.mean(vs)
+                if ambient > affections:
+                    ambient += affections * 0.1
+                else:
+                    ambient = affections - (affections - ambient) * 0.1
+            val["humidity"] = ambient
+
+            # gas
+            ppm = 400 # typical environmental
+            for a in gas_aff:
+                rel_range = (1 - gas_aff[a]['distance'] / gas_aff[a]['range'])
+                if gas_aff[a]['type'] == 'human':
+                    ppm += 1000.0 * rel_range
+                elif gas_aff[a]['type'] == 'fire':
+                    ppm += 5000.0 * rel_range
+            val["gas"] = ppm
+
+            # pressure
+            val["pressure"] = 27.3 + random.uniform(-3, 3)
+        else: # The real deal
+            data = self.sensor.read()
+
+            val["temperature"] = data.temp
+            val["pressure"] = data.pres
+            val["humidity"] = data.hum
+            val["gas"] = data.gas
+
+        # Publishing and storing value:
+        self.write_sample({
+            "data": val,
+            "timestamp": self.clock.time()
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
         self.info["hz"] = message["hz"]
         self.info["queue_size"] = message["queue_size"]
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
         return {"enabled": True}
 
     def disable_callback(self, message, meta):
@@ -225,8 +210,7 @@ class EnvController(BaseThing):
         self.disable_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
             self.logger.info("Env {} reads with {} Hz".format(self.info["id"], self.info["hz"]))
 
     def stop(self):
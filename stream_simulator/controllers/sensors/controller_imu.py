@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from colorama import Fore, Style
@@ -131,93 +129,80 @@ class ImuController(BaseThing):
     def robot_pose_update(self, message, meta):
         if self.prev_robot_pose == None:
             self.prev_robot_pose = message
-            self.prev_robot_pose['timestamp'] = time.time()
+            self.prev_robot_pose['timestamp'] = self.clock.time()
         else:
             self.prev_robot_pose = self.robot_pose
 
         self.robot_pose = message
-        self.robot_pose['timestamp'] = time.time()
+        self.robot_pose['timestamp'] = self.clock.time()
 
     def sensor_read(self):
-        self.logger.info("IMU {} sensor read thread started".format(self.info["id"]))
-        period = 1 / self.info["hz"]
+        self.logger.info("IMU {} sampling started".format(self.info["id"]))
+        self.schedule(self.sensor_sample, self.info["hz"])
+
+    def sensor_sample(self):
+        if self.info["mode"] == "mock":
+            val = {
+                "acceleration": {
+                    "x": 1,
+                    "y": 1,
+                    "z": 1
+                },
+                "gyroscope": {
+                    "yaw": random.uniform(0.3, -0.3),
+                    "pitch": random.uniform(0.3, -0.3),
+                    "roll": random.uniform(0.3, -0.3)
+                },
+                "magnetometer": {
+                    "yaw": random.uniform(0.3, -0.3),
+                    "pitch": random.uniform(0.3, -0.3),
+                    "roll": random.uniform(0.3, -0.3)
+                }
+            }
 
-        while self.info["enabled"]:
-            time.sleep(period)
-            
-            if self.info["mode"] == "mock":
+        elif self.info["mode"] == "simulation":
+            moving = 0
+            if self.clock.time() - self.robot_pose['timestamp'] < 1.5:
+                # this means the pose is old and the robot has stopped
+                # print("moving")
+                moving = 1
+            try:
                 val = {
                     "acceleration": {
-                        "x": 1,
-                        "y": 1,
-                        "z": 1
+                        "x": random.uniform(0.03, -0.03) + moving * 0.1,
+                        "y": random.uniform(0.03, -0.03),
+                        "z": random.uniform(0.03, -0.03)
                     },
                     "gyroscope": {
-                        "yaw": random.uniform(0.3, -0.3),
-                        "pitch": random.uniform(0.3, -0.3),
-                        "roll": random.uniform(0.3, -0.3)
+                        "yaw": random.uniform(0.03, -0.03),
+                        "pitch": random.uniform(0.03, -0.03),
+                        "roll": random.uniform(0.03, -0.03)
                     },
                     "magnetometer": {
-                        "yaw": random.uniform(0.3, -0.3),
-                        "pitch": random.uniform(0.3, -0.3),
-                        "roll": random.uniform(0.3, -0.3)
+                        "yaw": self.robot_pose["theta"] + random.uniform(0.03, -0.03),
+                        "pitch": random.uniform(0.03, -0.03),
+                        "roll": random.uniform(0.03, -0.03)
                     }
                 }
+                # import pprint
+                # pprint.pprint(val)
+                # print("")
+            except:
+                self.logger.warning("Pose not got yet..")
+        else: # The real deal
+            data = self._sensor.read()
 
-            elif self.info["mode"] == "simulation":
-                moving = 0
-                if time.time() - self.robot_pose['timestamp'] < 1.5:
-                    # this means the pose is old and the robot has stopped
-                    # print("moving")
-                    moving = 1
-                try:
-                    val = {
-                        "acceleration": {
-                            "x": random.uniform(0.03, -0.03) + moving * 0.1,
-                            "y": random.uniform(0.03, -0.03),
-                            "z": random.uniform(0.03, -0.03)
-                        },
-                        "gyroscope": {
-                            "yaw": random.uniform(0.03, -0.03),
-                            "pitch": random.uniform(0.03, -0.03),
-                            "roll": random.uniform(0.03, -0.03)
-                        },
-                        "magnetometer": {
-                            "yaw": self.robot_pose["theta"] + random.uniform(0.03, -0.03),
-                            "pitch": random.uniform(0.03, -0.03),
-                            "roll": random.uniform(0.03, -0.03)
-                        }
-                    }
-                    # import pprint
-                    # pprint.pprint(val)
-                    # print("")
-                except:
-                    self.logger.warning("Pose not got yet..")
-            else: # The real deal
-                data = self._sensor.read()
-                
-                try:
-                    val = self._calibrator.convert(data=data)
-                except CalibrationFileNotFound as err:
-                    self.logger.warning(err)
-                    val = data
-
-            # Publish data to sensor stream
-            self.publisher.publish({
-                "data": val,
-                "timestamp": time.time()
-            })
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "data": val,
-                    "timestamp": time.time()
-                }]
-            )
+            try:
+                val = self._calibrator.convert(data=data)
+            except CalibrationFileNotFound as err:
+                self.logger.warning(err)
+                val = data
 
-        self.logger.info("IMU {} sensor read thread stopped".format(self.info["id"]))
+        # Publishing and storing value:
+        self.write_sample({
+            "data": val,
+            "timestamp": self.clock.time()
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
@@ -225,8 +210,7 @@ class ImuController(BaseThing):
         self.info["queue_size"] = message["queue_size"]
 
         self.memory = self.info["queue_size"] * [0]
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
         return {"enabled": True}
 
     def disable_callback(self, message, meta):
@@ -242,8 +226,7 @@ class ImuController(BaseThing):
             self.robot_pose_sub.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
             self.logger.info("IMU {} reads with {} Hz".format(self.info["id"], self.info["hz"]))
 
             if self.info["mode"] == "real":
@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -16,7 +15,7 @@ from colorama import Fore, Style
 from commlib.logger import Logger
 from stream_simulator.connectivity import CommlibFactory
 from stream_simulator.base_classes import BaseThing
-from stream_simulator.functionality import VAD
+from stream_simulator.functionality import VAD, ResourceStore
 
 class MicrophoneController(BaseThing):
     def __init__(self, conf = None, package = None):
@@ -84,6 +83,9 @@ class MicrophoneController(BaseThing):
             tf_package['host_type'] = 'pan_tilt'
         package["tf_declare"].call(tf_package)
 
+        if info["mode"] == "simulation":
+            ResourceStore.get().preload(ResourceStore.sounds)
+
         self.blocked = False
 
         # merge actors
@@ -164,26 +166,7 @@ class MicrophoneController(BaseThing):
         self.logger.info(f"Speech detected from {source} [{language}]: {text}")
 
     def load_wav(self, path):
-        # Read from file
-        import wave
-        import os
-        from pathlib import Path
-        dirname = Path(__file__).resolve().parent
-        fil = str(dirname) + '/../../resources/' + path
-        self.logger.info("Reading sound from " + fil)
-        f = wave.open(fil, 'rb')
-        channels = f.getnchannels()
-        framerate = f.getframerate()
-        sample_width = f.getsampwidth()
-        data = bytearray()
-        sample = f.readframes(256)
-        while sample:
-            for s in sample:
-                data.append(s)
-            sample = f.readframes(256)
-        f.close()
-        source = base64.b64encode(data).decode("ascii")
-        return source
+        return ResourceStore.get().wav_base64(path)
 
     def on_goal(self, goalh):
         self.logger.info("{} recording started".format(self.name))
@@ -192,7 +175,7 @@ class MicrophoneController(BaseThing):
 
         # Concurrent speaker calls handling
         while self.blocked:
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.logger.info("Microphone unlocked")
         self.blocked = True
 
@@ -205,7 +188,7 @@ class MicrophoneController(BaseThing):
             "duration": duration
         })
 
-        timestamp = time.time()
+        timestamp = self.clock.time()
         secs = int(timestamp)
         nanosecs = int((timestamp-secs) * 10**(9))
         ret = {
@@ -225,21 +208,21 @@ class MicrophoneController(BaseThing):
         ))
 
         if self.info["mode"] == "mock":
-            now = time.time()
-            while time.time() - now < duration:
+            now = self.clock.time()
+            while self.clock.time() - now < duration:
                 self.logger.info("Recording...")
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
 
             ret["record"] = base64.b64encode(b'0x55').decode("ascii")
             ret["volume"] = 100
 
         elif self.info["mode"] == "simulation":
             while CommlibFactory.get_tf_affection == None:
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             # Ask tf for proximity sound sources or humans
             res = CommlibFactory.get_tf_affection.call({
                 'name': self.name
@@ -271,14 +254,14 @@ class MicrophoneController(BaseThing):
                 
                 self.logger.info(f"Nothing to record... Silence everywhere!")
 
-            now = time.time()
+            now = self.clock.time()
             
-            while time.time() - now < duration:
+            while self.clock.time() - now < duration:
                 if goalh.cancel_event.is_set():
                     self.logger.info("Cancel got")
                     self.blocked = False
                     return ret
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
             self.logger.info("Recording done")
 
             try:
@@ -294,10 +277,10 @@ class MicrophoneController(BaseThing):
                 self.sensor.async_read(secs = duration)
                 
                 while not self.sensor.recording:
-                    time.sleep(0.1)
+                    self.clock.sleep(0.1)
                 
-                now = time.time()
-                while time.time() - now < (duration + 0.5) and self.sensor.recording:
+                now = self.clock.time()
+                while self.clock.time() - now < (duration + 0.5) and self.sensor.recording:
                     if goalh.cancel_event.is_set():
                         self.blocked = False
                         self.sensor.cancel()
@@ -305,7 +288,7 @@ class MicrophoneController(BaseThing):
                         self.logger.info("Cancel got")
                         return ret
 
-                    time.sleep(0.1)
+                    self.clock.sleep(0.1)
 
                 self.logger.info("Microphone unlocked")
                 
@@ -348,7 +331,7 @@ class MicrophoneController(BaseThing):
 
         # Concurrent speaker calls handling
         while self.blocked:
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
         self.logger.info("Microphone unlocked")
         self.blocked = True
 
@@ -382,9 +365,9 @@ class MicrophoneController(BaseThing):
                     self.vad.reset()
                     self.sensor.async_read(secs=100, stream_cb=self.vad.update)         
 
-                    timer = time.time()
+                    timer = self.clock.time()
                     voice_was_detected = False
-                    while not self.vad.has_spoken() and (time.time() - timer) < duration:
+                    while not self.vad.has_spoken() and (self.clock.time() - timer) < duration:
                         if self.vad.voice_detected() and not voice_was_detected:
                             voice_was_detected = True
                             self.logger.info("Voice Detected! Start Recording...")
@@ -392,9 +375,9 @@ class MicrophoneController(BaseThing):
                             self.sensor.cancel()
                             self.logger.info("Goal Cancelled")
                             break
-                        time.sleep(0.1)
+                        self.clock.sleep(0.1)
 
-                    time.sleep(0.3)
+                    self.clock.sleep(0.3)
 
                     self.sensor.cancel()
                     
@@ -403,15 +386,15 @@ class MicrophoneController(BaseThing):
                     self.sensor.async_read(secs=duration)
 
                     while not self.sensor.recording:
-                        time.sleep(0.1)
+                        self.clock.sleep(0.1)
 
-                    now = time.time()
-                    while time.time() - now < (duration + 0.1) and self.sensor.recording:
+                    now = self.clock.time()
+                    while self.clock.time() - now < (duration + 0.1) and self.sensor.recording:
                         if goalh.cancel_event.is_set():
                             self.sensor.cancel()
                             self.logger.info("Goal Cancelled")
                             break
-                        time.sleep(0.1)
+                        self.clock.sleep(0.1)
 
                 rec = base64.b64encode(self.sensor.record).decode("ascii")
                 rec = base64.b64decode(rec)
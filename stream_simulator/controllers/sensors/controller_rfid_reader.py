@@ -1,17 +1,16 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
+import asyncio
 
 from colorama import Fore, Style
 
 from commlib.logger import Logger
-from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.connectivity import CommlibFactory, AsyncRPCClient
 from stream_simulator.base_classes import BaseThing
 
 class RfidReaderController(BaseThing):
@@ -101,52 +100,61 @@ class RfidReaderController(BaseThing):
         )
 
     def sensor_read(self):
-        self.logger.info("RFID reader {} sensor read thread started".format(self.info["id"]))
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.info["hz"])
-
-            val = {'tags': {}}
-            tags = {}
-            if self.info["mode"] == "mock":
-                if random.uniform(0, 10) < 3:
-                    tags["RF432423"] = "lorem_ipsum"
-            elif self.info["mode"] == "simulation":
-                while CommlibFactory.get_tf_affection == None:
-                    time.sleep(0.1)
-                # Ask tf for proximity sound sources or humans
-                res = CommlibFactory.get_tf_affection.call({
-                    'name': self.name
-                })
-                for t in res:
-                    tags[res[t]['info']['id']] = res[t]['info']['message']
-
-            else: # The real deal
-                pass
-
-            # Publishing value:
-            val['tags'] = tags
-            self.publisher.publish({
-                "data": val,
-                "timestamp": time.time()
+        self.logger.info("RFID reader {} sampling started".format(self.info["id"]))
+        self.schedule(self.sensor_sample, self.info["hz"])
+
+    def sensor_sample(self):
+        tags = {}
+        if self.info["mode"] == "mock":
+            if random.uniform(0, 10) < 3:
+                tags["RF432423"] = "lorem_ipsum"
+        elif self.info["mode"] == "simulation":
+            if CommlibFactory.get_tf_affection == None:
+                return
+            # Ask tf for proximity sound sources or humans
+            res = CommlibFactory.get_tf_affection.call({
+                'name': self.name
             })
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "data": val,
-                    "timestamp": time.time()
-                }]
-            )
-
-        self.logger.info("RFID reader {} sensor read thread stopped".format(self.info["id"]))
+            for t in res:
+                tags[res[t]['info']['id']] = res[t]['info']['message']
+
+        else: # The real deal
+            pass
+
+        self.sensor_update(tags)
+
+    # Asyncio runtime: the affections are awaited on the loop, only the
+    # publishing and storing leave it
+    async def sensor_sample_async(self):
+        if self.info["mode"] != "simulation":
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.sensor_sample)
+        if CommlibFactory.get_tf_affection == None:
+            return
+
+        tags = {}
+        res = await AsyncRPCClient(CommlibFactory.get_tf_affection).call({
+            'name': self.name
+        })
+        for t in res:
+            tags[res[t]['info']['id']] = res[t]['info']['message']
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.sensor_update, tags)
+
+    def sensor_update(self, tags):
+        # Publishing and storing value:
+        val = {'tags': tags}
+        self.write_sample({
+            "data": val,
+            "timestamp": self.clock.time()
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
         self.info["hz"] = message["hz"]
 
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
         return {"enabled": True}
 
     def disable_callback(self, message, meta):
@@ -159,8 +167,7 @@ class RfidReaderController(BaseThing):
         self.disable_rpc_server.run()
 
         if self.info["enabled"]:
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
 
     def stop(self):
         self.info["enabled"] = False
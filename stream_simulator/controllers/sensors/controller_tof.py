@@ -1,11 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
-import threading
 import random
 
 from colorama import Fore, Style
@@ -102,59 +100,41 @@ class TofController(BaseThing):
             from pidevices.sensors.vl53l1x import VL53L1X
             self.sensor = VL53L1X(bus=1)
         if self.info["mode"] == "simulation":
-            self.robot_pose_sub = CommlibFactory.getSubscriber(
-                broker = "redis",
-                topic = self.info['namespace'] + '.' + self.info['device_name'] + ".pose",
-                callback = self.robot_pose_update
-            )
-
-    def robot_pose_update(self, message, meta):
-        self.robot_pose = message
+            # Rays are cast by the robot on its pose updates, if there is
+            # a map to cast them on
+            self.raycaster = package["raycaster"]
+            if self.raycaster is not None:
+                self.raycaster.register(
+                    self.name,
+                    self.info["orientation"],
+                    self.info["max_range"]
+                )
 
     def sensor_read(self):
-        self.logger.info("TOF {} sensor read thread started".format(self.info["id"]))
-        while self.info["enabled"]:
-            time.sleep(1.0 / self.info["hz"])
-
-            val = 0
-            if self.info["mode"] == "mock":
-                val = float(random.uniform(30, 10))
-            elif self.info["mode"] == "simulation":
-                try:
-                    ths = self.robot_pose["theta"] + self.info["orientation"] / 180.0 * math.pi
-                    # Calculate distance
-                    d = 1
-                    originx = self.robot_pose["x"] / self.robot_pose["resolution"]
-                    originy = self.robot_pose["y"] / self.robot_pose["resolution"]
-                    tmpx = originx
-                    tmpy = originy
-                    limit = self.info["max_range"] / self.robot_pose["resolution"]
-                    while self.map[int(tmpx), int(tmpy)] == 0 and d < limit:
-                        d += 1
-                        tmpx = originx + d * math.cos(ths)
-                        tmpy = originy + d * math.sin(ths)
-                    val = d * self.robot_pose["resolution"]
-                except:
+        self.logger.info("TOF {} sampling started".format(self.info["id"]))
+        self.schedule(self.sensor_sample, self.info["hz"])
+
+    def sensor_sample(self):
+        val = 0
+        if self.info["mode"] == "mock":
+            val = float(random.uniform(30, 10))
+        elif self.info["mode"] == "simulation":
+            if self.raycaster is None:
+                self.logger.warning(f"No map for {self.name} to sense")
+            else:
+                d = self.raycaster.get(self.name)
+                if d is None:
                     self.logger.warning("Pose not got yet..")
-            else: # The real deal
-                val = self.sensor.read()
-
-            # Publishing value:
-            self.publisher.publish({
-                "distance": val,
-                "timestamp": time.time()
-            })
-
-            # Storing value:
-            r = CommlibFactory.derp_client.lset(
-                self.derp_data_key,
-                [{
-                    "distance": val,
-                    "timestamp": time.time()
-                }]
-            )
-
-        self.logger.info("TOF {} sensor read thread stopped".format(self.info["id"]))
+                else:
+                    val = d
+        else: # The real deal
+            val = self.sensor.read()
+
+        # Publishing and storing value:
+        self.write_sample({
+            "distance": val,
+            "timestamp": self.clock.time()
+        })
 
     def enable_callback(self, message, meta):
         self.info["enabled"] = True
@@ -162,8 +142,7 @@ class TofController(BaseThing):
         self.info["queue_size"] = message["queue_size"]
 
         self.memory = self.info["queue_size"] * [0]
-        self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-        self.sensor_read_thread.start()
+        self.sensor_read()
         return {"enabled": True}
 
     def disable_callback(self, message, meta):
@@ -175,19 +154,12 @@ class TofController(BaseThing):
         self.enable_rpc_server.run()
         self.disable_rpc_server.run()
 
-        if self.info["mode"] == "simulation":
-            self.robot_pose_sub.run()
-
         if self.info["enabled"]:
             self.memory = self.info["queue_size"] * [0]
-            self.sensor_read_thread = threading.Thread(target = self.sensor_read)
-            self.sensor_read_thread.start()
+            self.sensor_read()
             self.logger.info("TOF {} reads with {} Hz".format(self.info["id"], self.info["hz"]))
 
     def stop(self):
         self.info["enabled"] = False
         self.enable_rpc_server.stop()
         self.disable_rpc_server.stop()
-
-        if self.info["mode"] == "simulation":
-            self.robot_pose_sub.stop()
@@ -3,4 +3,7 @@
 
 from __future__ import absolute_import
 
-from .vad import VAD
\ No newline at end of file
+from .vad import VAD
+from .image_encoder import encode_image
+from .resources import ResourceStore
+from .camera_frames import FrameCache, camera_scene, render_scene
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import collections
+
+import numpy
+
+from stream_simulator.functionality.image_encoder import encode_image
+from stream_simulator.functionality.resources import ResourceStore
+
+# What a simulated camera sees, as a hashable tuple, from the closest of
+# its affections (None if nothing is in view)
+def camera_scene(affection = None):
+    if affection is None:
+        return ("file", "all.png")
+    info = affection['info']
+    if affection['type'] == "human":
+        return ("file", random.choice(["face.jpg", "face_inverted.jpg"]))
+    elif affection['type'] == "qr":
+        return ("qr", info["message"])
+    elif affection['type'] == "barcode":
+        return ("file", "barcode.jpg")
+    elif affection['type'] == "color":
+        return ("color", info["r"], info["g"], info["b"])
+    elif affection['type'] == "text":
+        return ("text", info["text"])
+    return ("file", "all.png")
+
+# The scene as an RGB frame of the given size, rendered in memory
+def render_scene(scene, width, height):
+    kind = scene[0]
+    if kind == "color":
+        image = numpy.zeros((height, width, 3), numpy.uint8)
+        image[:] = scene[1:]
+        return image
+
+    import cv2
+    if kind == "qr":
+        import qrcode
+        image = numpy.array(qrcode.make(scene[1]).convert("RGB"))
+    elif kind == "text":
+        from PIL import Image, ImageDraw, ImageFont
+        im = Image.new("RGB", (width, height), (255, 255, 255))
+        draw = ImageDraw.Draw(im)
+        font = ImageFont.truetype("DejaVuSans.ttf", 36)
+        text = scene[1]
+        start_coord = 30
+        for i in range(0, len(text), 30):
+            draw.text((10, start_coord), text[i:i+30], font = font, fill = (0, 0, 0))
+            start_coord += 40
+        image = numpy.array(im)
+    else:
+        image = ResourceStore.get().image(scene[1])
+    return cv2.resize(image, dsize = (width, height))
+
+class FrameCache:
+    # LRU of encoded camera frames, keyed on the scene and the encoding, and
+    # shared by all the cameras: a static scene costs no image work after
+    # its first frame.
+    shared = None
+
+    @staticmethod
+    def get():
+        if FrameCache.shared is None:
+            FrameCache.shared = FrameCache()
+        return FrameCache.shared
+
+    def __init__(self, size = 64):
+        self.size = size
+        self.frames = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Encoded frame of the scene and the name of its format, as returned
+    # by encode_image
+    def frame(self, scene, width, height, format = "raw", binary = False,
+            raw_format = "RGB"):
+        key = (scene, width, height, format, binary, raw_format)
+        with self.lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                self.hits += 1
+                return self.frames[key]
+            self.misses += 1
+
+        # Rendered outside the lock; concurrent misses of one scene just
+        # render it twice
+        value = encode_image(
+            render_scene(scene, width, height),
+            format = format,
+            binary = binary,
+            raw_format = raw_format
+        )
+        with self.lock:
+            self.frames[key] = value
+            while len(self.frames) > self.size:
+                self.frames.popitem(last = False)
+        return value
@@ -0,0 +1,47 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import base64
+
+import numpy
+
+# Compressed formats, by the name used in the configurations and messages
+ENCODINGS = {
+    "jpeg": ".jpg",
+    "jpg": ".jpg",
+    "png": ".png"
+}
+
+# Encodes an RGB frame (height x width x 3 uint8 array) for the camera
+# messages. Raw frames are the image rows as they are in memory (no copy
+# to Python ints); jpeg / png are compressed with cv2.imencode. Returns
+# the data (bytes if binary, base64 text otherwise) and the name of the
+# format used, raw_format for raw frames.
+def encode_image(image, format = "raw", binary = False, raw_format = "RGB",
+        quality = 90):
+    format = "raw" if format is None else format.lower()
+    if format in ENCODINGS:
+        import cv2
+        params = []
+        if ENCODINGS[format] == ".jpg":
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        ok, buf = cv2.imencode(
+            ENCODINGS[format],
+            cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+            params
+        )
+        if not ok:
+            raise ValueError(f"Frame could not be encoded as {format}")
+        data = buf.tobytes()
+        used = "JPEG" if ENCODINGS[format] == ".jpg" else "PNG"
+    else:
+        # base64 reads the array buffer directly, binary messages get one
+        # copy of it
+        data = memoryview(numpy.ascontiguousarray(image)).cast('B')
+        if binary:
+            data = data.tobytes()
+        used = raw_format
+
+    if not binary:
+        data = base64.b64encode(data).decode("ascii")
+    return data, used
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import base64
+import threading
+
+RESOURCES = os.path.join(os.path.dirname(__file__), "..", "resources")
+
+class ResourceStore:
+    # The images and sounds of resources/, read and decoded once and shared
+    # by all the devices. Everything handed out is immutable (bytes, base64
+    # str, read-only numpy arrays), so callers never need a copy.
+    shared = None
+
+    images = ["all.png", "barcode.jpg", "face.jpg", "face_inverted.jpg"]
+    sounds = ["Silent.wav", "english_sentence.wav", "greek_sentence.wav"]
+
+    @staticmethod
+    def get():
+        if ResourceStore.shared is None:
+            ResourceStore.shared = ResourceStore()
+        return ResourceStore.shared
+
+    def __init__(self, root = RESOURCES):
+        self.root = root
+        self.lock = threading.Lock()
+        self.assets = {}
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    # Loads the given assets (or all the known ones) ahead of their use
+    def preload(self, names = None):
+        if names is None:
+            names = ResourceStore.images + ResourceStore.sounds
+        for name in names:
+            if name.endswith(".wav"):
+                self.wav(name)
+            else:
+                self.image(name)
+
+    def load(self, key, loader):
+        with self.lock:
+            if key in self.assets:
+                return self.assets[key]
+        # Loaded outside the lock; concurrent first uses just load it twice
+        value = loader()
+        with self.lock:
+            return self.assets.setdefault(key, value)
+
+    # The decoded RGB image
+    def image(self, name):
+        def loader():
+            import cv2
+            image = cv2.imread(self.path(name))
+            if image is None:
+                raise OSError(f"Cannot read image {self.path(name)}")
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            return image
+        return self.load(("image", name), loader)
+
+    # The PCM frames of the wav file
+    def wav(self, name):
+        def loader():
+            import wave
+            with wave.open(self.path(name), 'rb') as f:
+                return f.readframes(f.getnframes())
+        return self.load(("wav", name), loader)
+
+    def wav_base64(self, name):
+        return self.load(
+            ("wav_base64", name),
+            lambda: base64.b64encode(self.wav(name)).decode("ascii")
+        )
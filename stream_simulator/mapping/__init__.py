@@ -0,0 +1,10 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+from .distance_field import DistanceField
+from .raycaster import Raycaster
+from .rasterizer import rasterize
+from .map_cache import MapCache
+from .collision import Footprint, swept_collision
@@ -0,0 +1,92 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+
+import numpy
+
+class Footprint:
+    # Shape of a robot, from its configuration (world units):
+    #   None:                  a point
+    #   {radius}:              a circle
+    #   {length, width}:       a rectangle, length along the heading
+    # Kept as the local points, in cells, that are checked against the map
+    # (spaced at most half a cell apart).
+    def __init__(self, conf = None, resolution = 1):
+        self.radius = 0
+        self.rectangle = False
+        points = [(0.0, 0.0)]
+        if conf is not None and 'radius' in conf:
+            self.radius = conf['radius'] / resolution
+            n = int(math.ceil(self.radius * 2))
+            for u in numpy.linspace(-self.radius, self.radius, 2 * n + 1):
+                for v in numpy.linspace(-self.radius, self.radius, 2 * n + 1):
+                    if u * u + v * v <= self.radius * self.radius:
+                        points.append((u, v))
+        elif conf is not None and 'length' in conf:
+            self.rectangle = True
+            l = conf['length'] / resolution / 2.0
+            w = conf['width'] / resolution / 2.0
+            for u in numpy.linspace(-l, l, 2 * int(math.ceil(l * 2)) + 1):
+                for v in numpy.linspace(-w, w, 2 * int(math.ceil(w * 2)) + 1):
+                    points.append((u, v))
+        self.points = numpy.array(points)
+
+    # All the footprint points at the given poses, in cells
+    def place(self, xs, ys, ths):
+        c = numpy.cos(ths).reshape(-1, 1)
+        s = numpy.sin(ths).reshape(-1, 1)
+        u = self.points[:, 0].reshape(1, -1)
+        v = self.points[:, 1].reshape(1, -1)
+        px = xs.reshape(-1, 1) + u * c - v * s
+        py = ys.reshape(-1, 1) + u * s + v * c
+        return px.ravel(), py.ravel()
+
+# Checks the motion from (x0, y0, th0) to (x1, y1, th1), in cells, sampled
+# at most half a cell apart. Obstacles already touched at the start pose are
+# ignored, so that a robot touching a wall can still move away. Cells out of
+# the map count as walls. A distance field (see DistanceField) makes circles
+# a single lookup per sample, once built for the range sensors.
+def swept_collision(grid, footprint, x0, y0, th0, x1, y1, th1,
+        distance_field = None):
+    n = int(math.ceil(math.hypot(x1 - x0, y1 - y0) * 2))
+    if footprint.rectangle:
+        # Rotating corners sweep their own arcs
+        reach = numpy.abs(footprint.points).sum(axis = 1).max()
+        n = max(n, int(math.ceil(abs(th1 - th0) * reach * 2)))
+    # The start pose comes first
+    t = numpy.arange(0, n + 1) / float(max(n, 1))
+    xs = x0 + t * (x1 - x0)
+    ys = y0 + t * (y1 - y0)
+    ths = th0 + t * (th1 - th0)
+
+    if distance_field is not None and distance_field.built() and \
+            not footprint.rectangle and \
+            footprint.radius < distance_field.max_distance:
+        # The field is padded by one cell of walls
+        squared = distance_field.squared
+        i = numpy.floor(xs).astype(numpy.int64) + 1
+        j = numpy.floor(ys).astype(numpy.int64) + 1
+        numpy.clip(i, 0, squared.shape[0] - 1, out = i)
+        numpy.clip(j, 0, squared.shape[1] - 1, out = j)
+        if footprint.radius == 0:
+            hits = squared[i, j] == 0
+        else:
+            hits = squared[i, j] <= footprint.radius * footprint.radius
+        if not hits[0]:
+            return bool(hits[1:].any())
+        # Which obstacles were touched is only known from the grid
+
+    px, py = footprint.place(xs, ys, ths)
+    i = numpy.floor(px).astype(numpy.int64)
+    j = numpy.floor(py).astype(numpy.int64)
+    out = (i < 0) | (j < 0) | (i >= grid.shape[0]) | (j >= grid.shape[1])
+    # Cells as flat indices, -1 for anything out of the map
+    cells = numpy.where(out, -1, i * grid.shape[1] + j)
+    hits = out.copy()
+    hits[~out] = grid[i[~out], j[~out]] != 0
+
+    start = len(footprint.points)
+    touched = cells[:start][hits[:start]]
+    new = cells[start:][hits[start:]]
+    return bool((~numpy.isin(new, touched)).any())
@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+
+import numpy
+
+SQRT2 = math.sqrt(2.0)
+
+# Columns of the map processed at once in the x pass, which bounds its
+# temporaries
+BLOCK = 1024
+
+class DistanceField:
+    # Euclidean distance (in cells) of every map cell to its closest
+    # obstacle, clamped to max_distance. Cells outside the map count as
+    # obstacles. Range sensors sphere trace their rays through it instead
+    # of checking the map one cell at a time.
+    # The field is kept as the squared distances (uint16, exact for
+    # max_distance up to 179) and built on first use, so worlds without
+    # range sensors never pay for it; loader, if given, returns an already
+    # computed one (e.g. from the map cache) instead of computing it.
+    def __init__(self, grid, max_distance = 32, squared = None, loader = None):
+        if max_distance > 179:
+            raise ValueError(f"max_distance {max_distance} is over 179 cells")
+        self.grid = grid
+        self.width = grid.shape[0]
+        self.height = grid.shape[1]
+        self.max_distance = max_distance
+        self.loader = loader
+        self.lock = threading.Lock()
+        self._squared = squared
+
+    @property
+    def squared(self):
+        if self._squared is None:
+            self.build()
+        return self._squared
+
+    def built(self):
+        return self._squared is not None
+
+    def build(self):
+        with self.lock:
+            if self._squared is None:
+                if self.loader is not None:
+                    self._squared = self.loader()
+                else:
+                    self._squared = self.compute()
+        return self
+
+    def compute(self):
+        # One cell of walls around the map, built in place: the distances
+        # along y first, then the closest column within the clamping
+        # window along x, a block of columns at a time
+        cap = self.max_distance + 1
+        field = numpy.full(
+            (self.width + 2, self.height + 2), cap, dtype = numpy.uint16
+        )
+        field[0, :] = 0
+        field[-1, :] = 0
+        field[:, 0] = 0
+        field[:, -1] = 0
+        numpy.copyto(field[1:-1, 1:-1], 0, where = self.grid != 0)
+
+        for j in range(1, field.shape[1]):
+            numpy.minimum(field[:, j], field[:, j - 1] + 1, out = field[:, j])
+        for j in range(field.shape[1] - 2, -1, -1):
+            numpy.minimum(field[:, j], field[:, j + 1] + 1, out = field[:, j])
+
+        limit = self.max_distance * self.max_distance
+        for j in range(0, field.shape[1], BLOCK):
+            g2 = field[:, j:j + BLOCK].astype(numpy.uint16)
+            g2 *= g2
+            f = g2.copy()
+            for dx in range(1, cap + 1):
+                numpy.minimum(f[dx:, :], g2[:-dx, :] + dx * dx, out = f[dx:, :])
+                numpy.minimum(f[:-dx, :], g2[dx:, :] + dx * dx, out = f[:-dx, :])
+            numpy.minimum(f, limit, out = f)
+            field[:, j:j + BLOCK] = f
+            del g2, f
+        return field
+
+    def distance(self, x, y):
+        squared = self.squared
+        i = int(x) + 1
+        j = int(y) + 1
+        if i < 0 or j < 0 or i >= squared.shape[0] or j >= squared.shape[1]:
+            return 0.0
+        return math.sqrt(squared[i, j])
+
+    # Gives the same result as marching the ray one cell at a time: samples
+    # are the origin (counted as 1) and then the points 2, 3, ... cells
+    # away, and the first one on an obstacle or reaching limit is returned.
+    # Samples closer to a free one than its distance to the obstacles are
+    # known to be free and are skipped.
+    def trace(self, x, y, theta, limit):
+        c = math.cos(theta)
+        s = math.sin(theta)
+        d = 1
+        while True:
+            if d == 1:
+                f = self.distance(x, y)
+            else:
+                f = self.distance(x + d * c, y + d * s)
+            if f == 0 or d >= limit:
+                return d
+
+            # A sample q falls in a cell closer than |q - p| + sqrt(2)
+            # (with some slack for the rounding of the square root)
+            skip = int(math.floor(f - SQRT2 - 1e-4))
+            last_free = d + skip if d > 1 else skip
+            nxt = d + 1
+            if last_free >= nxt:
+                at_limit = max(nxt, int(math.ceil(limit)))
+                if at_limit <= last_free:
+                    return at_limit
+                nxt = last_free + 1
+            d = nxt
@@ -0,0 +1,56 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy
+
+# Bump when the rasterization or the distance field change, so that stale
+# cached arrays are not used
+CACHE_VERSION = 2
+
+class MapCache:
+    # Compiled maps stored as .npy files, keyed by the hash of the map
+    # configuration, and opened read-only with numpy.memmap. All simulator
+    # processes using the same map share one copy through the page cache.
+    # The default directory is streamsim/maps in the XDG cache directory.
+    def __init__(self, directory = None):
+        if directory is None:
+            base = os.environ.get("XDG_CACHE_HOME") or \
+                os.path.expanduser("~/.cache")
+            directory = os.path.join(base, "streamsim", "maps")
+        self.directory = directory
+
+    def key(self, map_conf):
+        conf = {k: map_conf[k] for k in map_conf \
+            if k not in ['cache', 'cache_dir']}
+        conf['version'] = CACHE_VERSION
+        raw = json.dumps(conf, sort_keys = True, default = str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key, kind):
+        return os.path.join(self.directory, f"{key}.{kind}.npy")
+
+    # Returns the cached array, building and storing it first if missing
+    def get(self, key, kind, build):
+        path = self.path(key, kind)
+        if not os.path.isfile(path):
+            self.store(path, build())
+        return numpy.load(path, mmap_mode = 'r')
+
+    def store(self, path, array):
+        os.makedirs(self.directory, exist_ok = True)
+        # Written aside and renamed, so concurrent readers never see a
+        # partial file
+        fd, tmp = tempfile.mkstemp(dir = self.directory, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                numpy.save(f, array)
+            os.replace(tmp, path)
+        except:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
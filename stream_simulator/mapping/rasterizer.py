@@ -0,0 +1,129 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import numpy
+
+# Obstacle primitives of the map configuration, in world units:
+#   lines:      {x1, y1, x2, y2}
+#   rectangles: {x, y, width, height} (filled, x and y being a corner)
+#   circles:    {x, y, radius} (filled)
+#   polygons:   {points: [[x, y], ...]} (filled)
+
+def clip_cells(grid, xs, ys):
+    xs = numpy.clip(xs, 0, grid.shape[0] - 1)
+    ys = numpy.clip(ys, 0, grid.shape[1] - 1)
+    return xs, ys
+
+def rasterize_lines(grid, lines, resolution = 1):
+    # All lines at once: one sample per cell step along the axis aligned
+    # lines and per unit of length along the tilted ones, like the per line
+    # loops did
+    if len(lines) == 0:
+        return
+    ends = numpy.array(
+        [[l['x1'], l['y1'], l['x2'], l['y2']] for l in lines],
+        dtype = float
+    ) / resolution
+    x1 = numpy.clip(ends[:, 0].astype(numpy.int64), 0, grid.shape[0] - 1)
+    y1 = numpy.clip(ends[:, 1].astype(numpy.int64), 0, grid.shape[1] - 1)
+    x2 = numpy.clip(ends[:, 2].astype(numpy.int64), 0, grid.shape[0] - 1)
+    y2 = numpy.clip(ends[:, 3].astype(numpy.int64), 0, grid.shape[1] - 1)
+    dx = x2 - x1
+    dy = y2 - y1
+
+    aligned = (dx == 0) | (dy == 0)
+    dist = numpy.hypot(dx, dy)
+    counts = numpy.where(
+        aligned,
+        numpy.abs(dx) + numpy.abs(dy) + 1,
+        dist.astype(numpy.int64) + 2
+    )
+    line = numpy.repeat(numpy.arange(len(lines)), counts)
+    starts = numpy.cumsum(counts) - counts
+    d = numpy.arange(counts.sum()) - starts[line]
+
+    ang = numpy.arctan2(dy, dx)[line]
+    xs = numpy.where(
+        aligned[line],
+        x1[line] + d * numpy.sign(dx)[line],
+        numpy.trunc(x1[line] + d * numpy.cos(ang))
+    ).astype(numpy.int64)
+    ys = numpy.where(
+        aligned[line],
+        y1[line] + d * numpy.sign(dy)[line],
+        numpy.trunc(y1[line] + d * numpy.sin(ang))
+    ).astype(numpy.int64)
+    xs, ys = clip_cells(grid, xs, ys)
+    grid[xs, ys] = 1
+
+def rasterize_rectangles(grid, rectangles, resolution = 1):
+    for r in rectangles:
+        xa = r['x'] / resolution
+        ya = r['y'] / resolution
+        xb = xa + r['width'] / resolution
+        yb = ya + r['height'] / resolution
+        xa, xb = sorted([xa, xb])
+        ya, yb = sorted([ya, yb])
+        i1 = max(int(xa), 0)
+        j1 = max(int(ya), 0)
+        i2 = min(int(xb), grid.shape[0] - 1)
+        j2 = min(int(yb), grid.shape[1] - 1)
+        if i1 <= i2 and j1 <= j2:
+            grid[i1:i2 + 1, j1:j2 + 1] = 1
+
+def rasterize_circles(grid, circles, resolution = 1):
+    # Cells whose center is in the circle, plus the cell of the center
+    for c in circles:
+        cx = c['x'] / resolution
+        cy = c['y'] / resolution
+        r = c['radius'] / resolution
+        i1 = max(int(cx - r), 0)
+        j1 = max(int(cy - r), 0)
+        i2 = min(int(cx + r), grid.shape[0] - 1)
+        j2 = min(int(cy + r), grid.shape[1] - 1)
+        if i1 <= i2 and j1 <= j2:
+            xs = numpy.arange(i1, i2 + 1).reshape(-1, 1) + 0.5
+            ys = numpy.arange(j1, j2 + 1).reshape(1, -1) + 0.5
+            inside = (xs - cx) ** 2 + (ys - cy) ** 2 <= r * r
+            grid[i1:i2 + 1, j1:j2 + 1] |= inside.astype(grid.dtype)
+        i, j = clip_cells(grid, int(cx), int(cy))
+        grid[i, j] = 1
+
+def rasterize_polygons(grid, polygons, resolution = 1):
+    # Even-odd rule on the cell centers, then the outline so that thin
+    # polygons are not lost
+    for p in polygons:
+        pts = numpy.array(p['points'], dtype = float) / resolution
+        i1 = max(int(pts[:, 0].min()), 0)
+        j1 = max(int(pts[:, 1].min()), 0)
+        i2 = min(int(pts[:, 0].max()), grid.shape[0] - 1)
+        j2 = min(int(pts[:, 1].max()), grid.shape[1] - 1)
+        if i1 <= i2 and j1 <= j2:
+            xs = numpy.arange(i1, i2 + 1).reshape(-1, 1) + 0.5
+            ys = numpy.arange(j1, j2 + 1).reshape(1, -1) + 0.5
+            inside = numpy.zeros((i2 - i1 + 1, j2 - j1 + 1), dtype = bool)
+            for k in range(len(pts)):
+                ax, ay = pts[k - 1]
+                bx, by = pts[k]
+                if ay == by:
+                    continue
+                crosses = (ay > ys) != (by > ys)
+                at_x = ax + (ys - ay) * (bx - ax) / (by - ay)
+                inside ^= crosses & (xs < at_x)
+            grid[i1:i2 + 1, j1:j2 + 1] |= inside.astype(grid.dtype)
+
+        outline = [{
+            'x1': pts[k - 1][0], 'y1': pts[k - 1][1],
+            'x2': pts[k][0], 'y2': pts[k][1]
+        } for k in range(len(pts))]
+        rasterize_lines(grid, outline)
+
+def rasterize(width, height, obstacles, resolution = 1):
+    grid = numpy.zeros((width, height), dtype = numpy.uint8)
+    if obstacles is None:
+        return grid
+    rasterize_lines(grid, obstacles.get('lines', []), resolution)
+    rasterize_rectangles(grid, obstacles.get('rectangles', []), resolution)
+    rasterize_circles(grid, obstacles.get('circles', []), resolution)
+    rasterize_polygons(grid, obstacles.get('polygons', []), resolution)
+    return grid
@@ -1,7 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import time
 import json
 import math
 import logging
@@ -17,8 +16,11 @@ from commlib.logger import RemoteLogger, Logger
 from commlib.node import TransportType
 import commlib.transports.amqp as acomm
 from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.base_classes import TickScheduler, SimClock
 import collections
 
+from stream_simulator.mapping import Raycaster, Footprint, swept_collision
+
 
 class HeartbeatThread(threading.Thread):
     def __init__(self, topic, _conn_params, interval=10,  *args, **kwargs):
@@ -65,10 +67,12 @@ class Robot:
                  tick = 0.1):
 
         self.env_properties = world.env_properties
+        self.distance_field = world.distance_field
         world = world.configuration
 
         self.configuration = configuration
         self.logger = Logger(self.configuration["name"])
+        self.clock = SimClock.get()
 
         self.tf_base = world['tf_base']
         self.tf_declare_rpc = CommlibFactory.getRPCClient(
@@ -140,6 +144,8 @@ class Robot:
 
         # circular buffer that stores the last 5 published velocities
         self.circ_buff = collections.deque(maxlen=5)
+        # Scheduler job of the motion steps, while started
+        self.simulation_job = None
 
         # intial robot pose - remains remains constant throughout streamsim launch
         self._init_x = 0
@@ -166,6 +172,12 @@ class Robot:
             self.resolution = 1
         self.logger.info("Robot {}: map set".format(self.name))
 
+        # Shape used in the collision checks, a point if not given
+        self.footprint = Footprint(
+            self.configuration.get('footprint'),
+            self.resolution
+        )
+
         self._x = 0
         self._y = 0
         self._theta = 0
@@ -195,6 +207,11 @@ class Robot:
         if self.common_logging is True:
             _logger = self.logger
 
+        # Casts the rays of all the range sensors on every pose update
+        self.raycaster = None
+        if self.distance_field is not None:
+            self.raycaster = Raycaster(self.distance_field, self.resolution)
+
         self.devices = []
         self.controllers = {}
         self.device_lookup()
@@ -216,6 +233,10 @@ class Robot:
             broker = "redis",
             topic = self.name + ".pose"
         )
+        self.ranges_pub = CommlibFactory.getPublisher(
+            broker = "redis",
+            topic = self.name + ".ranges"
+        )
 
         # publisher that resets robots real state every time a new application is execute
         self.motion_state_reset_pub = CommlibFactory.getPublisher(
@@ -281,9 +302,6 @@ class Robot:
                 callback = self.detects_redis
             )
 
-        # Threads
-        self.simulator_thread = threading.Thread(target = self.simulation_thread)
-
         self.logger.info("Device {} set-up".format(self.name))
 
     def register_controller(self, c):
@@ -328,6 +346,8 @@ class Robot:
             "device_name": self.configuration["name"],
             "logger": self.logger,
             "map": self.map,
+            "distance_field": self.distance_field,
+            "raycaster": self.raycaster,
             "actors": actors,
             'tf_declare': self.tf_declare_rpc,
             "env_properties": self.env_properties
@@ -411,7 +431,7 @@ class Robot:
                 self.logger.info("Got the source!")
                 done = True
             except:
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
                 self.logger.info("Source not written yet...")
 
         if v2 != "empty":
@@ -445,27 +465,27 @@ class Robot:
         self.devices_rpc_server.run()
         self.reset_pose_rpc_server.run()
         self.stopped = False
-        self.simulator_thread.start()
+        self.simulation_thread()
 
         r = CommlibFactory.derp_client.lset(
             "stream_sim/state",
             [{
                 "state": "ACTIVE",
                 "device": self.sim_name,
-                "timestamp": time.time()
+                "timestamp": self.clock.time()
             }])
         self.logger.warning(f"Notified for being ready {self.sim_name}")
         r = CommlibFactory.derp_client.lset(
             f"{self.sim_name}/step_by_step_status",
             [{
                 "value": self.step_by_step_execution,
-                "timestamp": time.time()
+                "timestamp": self.clock.time()
             }])
         r = CommlibFactory.derp_client.lset(
             f"{self.sim_name}/is_simulated",
             [{
                 "value": (self.mode == "simulation"),
-                "timestamp": time.time()
+                "timestamp": self.clock.time()
             }]
         )
 
@@ -486,10 +506,13 @@ class Robot:
 
         self.logger.warning("Trying to stop simulation_thread")
         self.stopped = True
+        if self.simulation_job is not None:
+            self.simulation_job.cancel()
+            self.simulation_job = None
 
     def devices_callback(self, message, meta):
         self.logger.warning("Getting devices")
-        timestamp = time.time()
+        timestamp = self.clock.time()
         secs = int(timestamp)
         nanosecs = int((timestamp-secs) * 10**(9))
 
@@ -498,7 +521,7 @@ class Robot:
         return {
                 "name": self.raw_name,
                 "devices": self.devices,
-                "timestamp": time.time()
+                "timestamp": self.clock.time()
         }
 
     def reset_pose_callback(self, message, meta):
@@ -508,7 +531,7 @@ class Robot:
         self._theta = self._init_theta
         return {}
 
-    def check_ok(self, x, y, prev_x, prev_y):
+    def check_ok(self, x, y, prev_x, prev_y, theta = None, prev_theta = None):
         # Check out of bounds
         if x < 0 or y < 0:
             self.error_log_msg = "Out of bounds - negative x or y"
@@ -519,48 +542,30 @@ class Robot:
             self.logger.error("{}: {}".format(self.name, self.error_log_msg))
             return True
 
-        # Check collision to obstacles
-        
-        x_i = int(x / self.resolution)
-        x_i_p = int(prev_x / self.resolution)
-        if x_i > x_i_p:
-            x_i, x_i_p = x_i_p, x_i
-
-        y_i = int(y / self.resolution)
-        y_i_p = int(prev_y / self.resolution)
-        if y_i > y_i_p:
-            y_i, y_i_p = y_i_p, y_i
-
-        if x_i == x_i_p:
-            for i in range(y_i, y_i_p):
-                if self.map[x_i, i] == 1:
-                    self.error_log_msg = "Crashed on a Wall"
-                    self.logger.error("{}: {}".format(self.name, self.error_log_msg))
-                    return True
-        elif y_i == y_i_p:
-            for i in range(x_i, x_i_p):
-                if self.map[i, y_i] == 1:
-                    self.error_log_msg = "Crashed on a Wall"
-                    self.logger.error("{}: {}".format(self.name, self.error_log_msg))
-                    return True
-        else: # we have a straight line
-            th = math.atan2(y_i_p - y_i, x_i_p - x_i)
-            dist = math.hypot(x_i_p - x_i, y_i_p - y_i)
-            d = 0
-            while d < dist:
-                xx = x_i + d * math.cos(th)
-                yy = y_i + d * math.sin(th)
-                if self.map[int(xx), int(yy)] == 1:
-                    self.error_log_msg = "Crashed on a Wall"
-                    self.logger.error("{}: {}".format(self.name, self.error_log_msg))
-                    return True
-                d += 1.0
+        # Check collision to obstacles, along the whole motion
+        if theta is None:
+            theta = self._theta
+        if prev_theta is None:
+            prev_theta = theta
+        if swept_collision(
+                self.map,
+                self.footprint,
+                prev_x / self.resolution,
+                prev_y / self.resolution,
+                prev_theta,
+                x / self.resolution,
+                y / self.resolution,
+                theta,
+                self.distance_field):
+            self.error_log_msg = "Crashed on a Wall"
+            self.logger.error("{}: {}".format(self.name, self.error_log_msg))
+            return True
 
         return False
 
     def dispatch_pose_local(self):
         # Send initial pose
-        self.internal_pose_pub.publish({
+        self.publish_pose({
             "x": self._x,
             "y": self._y,
             "theta": self._theta,
@@ -568,77 +573,94 @@ class Robot:
             "resolution": self.resolution
         })
 
+    def publish_pose(self, pose):
+        self.internal_pose_pub.publish(pose)
+        if self.raycaster is not None and self.mode == "simulation":
+            self.ranges_pub.publish({
+                "ranges": self.raycaster.update(pose),
+                "name": self.name,
+                "timestamp": self.clock.time()
+            })
+
     def simulation_thread(self):
-        t = time.time()
+        self.last_step = self.clock.time()
 
         self.dispatch_pose_local()
-        while self.stopped is False:
-            size = len(self.circ_buff)
-            if size != 0:
-                # get last motion parameters
-                _linear = self.circ_buff[size - 1]['linear']
-                _angular = self.circ_buff[size - 1]['rotational']
-                
-                # update time interval
-                dt = time.time() - t
-                t = time.time()
-
-                # update previous state
-                prev_x = self._x
-                prev_y = self._y
-                prev_th = self._theta
-
-                if _angular == 0:
-                    self._x += _linear * dt * math.cos(self._theta)
-                    self._y += _linear * dt * math.sin(self._theta)
-                else:
-                    arc = _linear / _angular
-                    self._x += - arc * math.sin(self._theta) + \
-                        arc * math.sin(self._theta + dt * _angular)
-                    self._y -= - arc * math.cos(self._theta) + \
-                        arc * math.cos(self._theta + dt * _angular)
-                self._theta += _angular * dt
-
-                xx = float("{:.2f}".format(self._x))
-                yy = float("{:.2f}".format(self._y))
-                theta2 = float("{:.2f}".format(self._theta))
-                
-                if self._x != prev_x or self._y != prev_y or self._theta != prev_th:
-                    if self.configuration['amqp_inform'] is True:
-                        self.logger.info("AMQP pose updated")
-                        CommlibFactory.notify_ui(
-                            type = "robot_pose",
-                            data = {
-                                "x": xx,
-                                "y": yy,
-                                "theta": theta2,
-                                "name": self.raw_name,
-                                "resolution": self.resolution
-                            }
-                        )
-                    self.logger.info(f"{self.raw_name}: New pose: {xx}, {yy}, {theta2}")
-
-                    # Send internal pose for distance sensors
-                    self.internal_pose_pub.publish({
-                        "x": xx,
-                        "y": yy,
-                        "theta": theta2,
-                        "name": self.name,
-                        "resolution": self.resolution
-                    })
-
-                if self.check_ok(self._x, self._y, prev_x, prev_y):
-                    self._x = prev_x
-                    self._y = prev_y
-                    self._theta = prev_th
-
-                    # notify ui about the error in robot's position
+        if self.simulation_job is not None:
+            return
+        self.simulation_job = TickScheduler.get().add(
+            self.simulation_step,
+            1.0 / self.dt,
+            name = self.name + ".simulation",
+            active = lambda: self.stopped is False
+        )
+
+    def simulation_step(self):
+        size = len(self.circ_buff)
+        if size != 0:
+            # get last motion parameters
+            _linear = self.circ_buff[size - 1]['linear']
+            _angular = self.circ_buff[size - 1]['rotational']
+
+            # update time interval
+            now = self.clock.time()
+            dt = now - self.last_step
+            self.last_step = now
+
+            # update previous state
+            prev_x = self._x
+            prev_y = self._y
+            prev_th = self._theta
+
+            if _angular == 0:
+                self._x += _linear * dt * math.cos(self._theta)
+                self._y += _linear * dt * math.sin(self._theta)
+            else:
+                arc = _linear / _angular
+                self._x += - arc * math.sin(self._theta) + \
+                    arc * math.sin(self._theta + dt * _angular)
+                self._y -= - arc * math.cos(self._theta) + \
+                    arc * math.cos(self._theta + dt * _angular)
+            self._theta += _angular * dt
+
+            xx = float("{:.2f}".format(self._x))
+            yy = float("{:.2f}".format(self._y))
+            theta2 = float("{:.2f}".format(self._theta))
+
+            if self._x != prev_x or self._y != prev_y or self._theta != prev_th:
+                if self.configuration['amqp_inform'] is True:
+                    self.logger.info("AMQP pose updated")
                     CommlibFactory.notify_ui(
-                        type = "logs",
+                        type = "robot_pose",
                         data = {
+                            "x": xx,
+                            "y": yy,
+                            "theta": theta2,
                             "name": self.raw_name,
-                            "message": f"Robot: {self.raw_name} {self.error_log_msg}"
+                            "resolution": self.resolution
                         }
                     )
-
-            time.sleep(self.dt)
+                self.logger.info(f"{self.raw_name}: New pose: {xx}, {yy}, {theta2}")
+
+                # Send internal pose for distance sensors
+                self.publish_pose({
+                    "x": xx,
+                    "y": yy,
+                    "theta": theta2,
+                    "name": self.name,
+                    "resolution": self.resolution
+                })
+
+            if self.check_ok(self._x, self._y, prev_x, prev_y, self._theta, prev_th):
+                self._x = prev_x
+                self._y = prev_y
+                self._theta = prev_th
+
+                # notify ui about the error in robot's position
+                CommlibFactory.notify_ui(
+                    type = "logs",
+                    data = {
+                        "name": self.raw_name,
+                        "message": f"Robot: {self.raw_name} {self.error_log_msg}"
+                    }
+                )
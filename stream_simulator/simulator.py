@@ -20,7 +20,13 @@ elif ConnParams.type == "redis":
     from commlib.transports.redis import Subscriber
 
 from stream_simulator.connectivity import CommlibFactory
-from stream_simulator.transformations import TfController
+from stream_simulator.connectivity import AffectionsCoalescer
+from stream_simulator.connectivity import AffectionsSubscriber
+from stream_simulator.connectivity import SampleSink
+from stream_simulator.connectivity import Metrics
+from stream_simulator.transformations import create_tf
+from stream_simulator.base_classes import TickScheduler, AsyncTickScheduler
+from stream_simulator.base_classes import SimClock
 
 ### Dont know why but if I remove this no controllers are found
 from stream_simulator.controllers import IrController
@@ -51,24 +57,60 @@ class Simulator:
             if 'resolution' in self.configuration['map']:
                 resolution = self.configuration['map']['resolution']
 
-        if 'amqp' in self.configuration:
-            ConnParams.set(
-                type = "amqp",
-                settings = self.configuration['amqp']
-            )
-        
-        if 'redis' in self.configuration:
-            ConnParams.set(
-                type = "redis",
-                settings = self.configuration['redis']
+        tf_conf = {}
+        if 'tf' in self.configuration:
+            tf_conf = self.configuration['tf']
+
+        self.coalesce_window = 0
+        if 'tf' in self.configuration:
+            if 'coalesce_window' in self.configuration['tf']:
+                self.coalesce_window = self.configuration['tf']['coalesce_window']
+
+        # Sensors get their affections pushed by tf instead of polling
+        self.push_affections = False
+        if 'tf' in self.configuration:
+            if 'push_affections' in self.configuration['tf']:
+                self.push_affections = self.configuration['tf']['push_affections']
+
+        self.setupClock()
+
+        # All the periodic device work runs on the workers of one scheduler
+        # (runtime "asyncio" runs them as coroutines on an event loop)
+        workers = 4
+        runtime = "threads"
+        if 'scheduler' in self.configuration:
+            if 'workers' in self.configuration['scheduler']:
+                workers = self.configuration['scheduler']['workers']
+            if 'runtime' in self.configuration['scheduler']:
+                runtime = self.configuration['scheduler']['runtime']
+        self.runtime = runtime
+        if runtime == "asyncio":
+            self.scheduler = AsyncTickScheduler(workers = workers, clock = self.clock)
+        else:
+            self.scheduler = TickScheduler(workers = workers, clock = self.clock)
+        TickScheduler.shared = self.scheduler
+        self.scheduler.start()
+
+        self.setupConnectivity(self.scheduler)
+
+        # Device samples can be flushed in batches, once per tick
+        if 'sample_sink' in self.configuration:
+            conf = self.configuration['sample_sink']
+            CommlibFactory.sample_sink = SampleSink(
+                derp_client = CommlibFactory.derp_client,
+                workers = conf.get('workers', 4),
+                batch = conf.get('batch', False)
             )
+            CommlibFactory.sample_sink.start(self.scheduler, conf.get('hz', 20))
 
-        # Declaring tf controller and setting basetopic
-        self.tf = TfController(
-            base = self.name,
-            device = device_sim_name
-        )
-        self.configuration['tf_base'] = self.tf.base_topic
+        # Declaring tf controller and setting basetopic. A standalone tf
+        # runs in bin/tf_server.py, with the same configuration.
+        self.tf = None
+        if 'standalone' in tf_conf and tf_conf['standalone']:
+            self.logger.warning("tf expected from a tf_server process")
+        else:
+            self.tf = create_tf(self.name, tf_conf, device = device_sim_name)
+        self.configuration['tf_base'] = f"{self.name}.tf"
         time.sleep(0.5)
 
         real_mode_exists = False
@@ -125,6 +167,91 @@ class Simulator:
         )
         self.devices_rpc_server.run()
 
+        if CommlibFactory.metrics is not None:
+            self.metrics_rpc_server = CommlibFactory.getRPCService(
+                broker = "redis",
+                callback = self.metrics_callback,
+                rpc_name = self.name + '.metrics'
+            )
+            self.metrics_rpc_server.run()
+
+        if self.clock.lockstep:
+            self.clock_rpc_server = CommlibFactory.getRPCService(
+                broker = "redis",
+                callback = self.clock_step_callback,
+                rpc_name = self.name + '.clock.step'
+            )
+            self.clock_rpc_server.run()
+
+    # Advances a lockstep simulation by message["dt"] seconds and returns
+    # once the device ticks due by then have run
+    def clock_step_callback(self, message, meta):
+        dt = message["dt"] if "dt" in message else self.tick
+        now = self.clock.step(dt)
+        settled = self.scheduler.settle()
+        if not settled:
+            self.logger.warning(f"Ticks still running at {now}")
+        return {
+            "time": now,
+            "settled": settled
+        }
+
+    # Simulation time: real, scaled (faster than real time) or lockstep
+    # (advanced through the <name>.clock.step RPC)
+    def setupClock(self):
+        clock_mode = "real"
+        clock_scale = 1.0
+        if 'clock' in self.configuration:
+            if 'mode' in self.configuration['clock']:
+                clock_mode = self.configuration['clock']['mode']
+            if 'scale' in self.configuration['clock']:
+                clock_scale = self.configuration['clock']['scale']
+        self.clock = SimClock(mode = clock_mode, scale = clock_scale)
+        SimClock.shared = self.clock
+
+    # Brokers and CommlibFactory options of the configuration. Also used
+    # by TfServer, so that tf processes join the simulation's brokers.
+    # metrics_suffix tells apart the metrics files of the processes.
+    def setupConnectivity(self, scheduler, metrics_suffix = ""):
+        if 'amqp' in self.configuration:
+            ConnParams.set(
+                type = "amqp",
+                settings = self.configuration['amqp']
+            )
+
+        if 'redis' in self.configuration:
+            ConnParams.set(
+                type = "redis",
+                settings = self.configuration['redis']
+            )
+
+        # Headless runs: endpoints of these brokers stay in the process
+        if 'inproc' in self.configuration:
+            CommlibFactory.inproc_brokers = self.configuration['inproc']
+
+        # Timing of every endpoint, served on <name>.metrics and dumped in
+        # the Prometheus text format to metrics.file
+        if 'metrics' in self.configuration:
+            conf = self.configuration['metrics']
+            CommlibFactory.metrics = Metrics()
+            if 'file' in conf:
+                CommlibFactory.metrics.start(
+                    scheduler,
+                    conf['file'] + metrics_suffix,
+                    conf.get('period', 10.0)
+                )
+
+        # Topics carried as msgpack with raw bytes, e.g. camera frames
+        if 'binary_topics' in self.configuration:
+            CommlibFactory.binary_topics = self.configuration['binary_topics']
+
+        # All the Redis RPC services over one connection
+        if 'multiplex_rpcs' in self.configuration:
+            CommlibFactory.multiplex_rpcs = self.configuration['multiplex_rpcs']
+
+    def metrics_callback(self, message, meta):
+        return CommlibFactory.metrics.report()
+
     def devices_callback(self, message, meta):
         return {
                 "robots": self.robot_names,
@@ -183,6 +310,13 @@ class Simulator:
     def stop(self):
         for r in self.robots:
             r.stop()
+        if CommlibFactory.sample_sink is not None:
+            CommlibFactory.sample_sink.stop()
+        if CommlibFactory.metrics is not None:
+            CommlibFactory.metrics.stop()
+        self.scheduler.stop()
+        if CommlibFactory.rpc_dispatcher is not None:
+            CommlibFactory.rpc_dispatcher.stop()
         self.logger.warning("Simulation stopped")
 
     def start(self):
@@ -200,12 +334,31 @@ class Simulator:
 
             self.logger.warning("Simulation started")
 
-        self.tf.setup()
-
-        # Setup tf affectability channel
-        CommlibFactory.get_tf_affection = CommlibFactory.getRPCClient(
-            rpc_name = f"{self.name}.tf.get_affections"
+        if self.tf is not None:
+            self.tf.setup()
+        else:
+            CommlibFactory.getRPCClient(
+                rpc_name = self.configuration['tf_base'] + ".setup"
+            ).call({})
+
+        # Setup tf affectability channel. Sensors asking at the same time
+        # share a single get_affections_batch round trip.
+        CommlibFactory.get_tf_affection = AffectionsCoalescer(
+            batch_client = CommlibFactory.getRPCClient(
+                rpc_name = f"{self.name}.tf.get_affections_batch"
+            ),
+            window = self.coalesce_window,
+            async_batch_client = CommlibFactory.getAsyncRPCClient(
+                rpc_name = f"{self.name}.tf.get_affections_batch"
+            ) if self.runtime == "asyncio" else None
         )
+        if self.push_affections:
+            CommlibFactory.get_tf_affection = AffectionsSubscriber(
+                subscribe_client = CommlibFactory.getRPCClient(
+                    rpc_name = f"{self.name}.tf.subscribe_affections"
+                ),
+                fallback = CommlibFactory.get_tf_affection
+            )
         # Setup tf channel
         CommlibFactory.get_tf = CommlibFactory.getRPCClient(
             rpc_name = f"{self.name}.tf.get_tf"
@@ -0,0 +1,73 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import logging
+
+from commlib.logger import Logger
+
+from .simulator import Simulator
+from stream_simulator.transformations import create_tf
+from stream_simulator.base_classes import TickScheduler
+from stream_simulator.connectivity import CommlibFactory
+
+class TfServer:
+    # tf in a process of its own, for simulations with tf: standalone: true
+    # or sharded ones: the TfController of the simulation, the router of
+    # its shards, or the given shard. Reads the simulation configuration
+    # and joins its brokers the way Simulator does.
+    parseConfiguration = Simulator.parseConfiguration
+    loadYaml = Simulator.loadYaml
+    recursiveConfParse = Simulator.recursiveConfParse
+    setupClock = Simulator.setupClock
+    setupConnectivity = Simulator.setupConnectivity
+
+    def __init__(self,
+                 conf_file = None,
+                 configuration = None,
+                 device_sim_name = None,
+                 shard = None
+                 ):
+        self.logger = Logger("tf_server")
+        logging.getLogger("pika").setLevel(logging.WARNING)
+
+        self.configuration = self.parseConfiguration(conf_file, configuration)
+        if "simulation" in self.configuration:
+            self.name = self.configuration["simulation"]["name"]
+        else:
+            self.name = "streamsim"
+
+        self.setupClock()
+        self.scheduler = TickScheduler(workers = 1, clock = self.clock)
+        TickScheduler.shared = self.scheduler
+        self.scheduler.start()
+        self.setupConnectivity(
+            self.scheduler,
+            metrics_suffix = "." + (shard if shard is not None else "tf")
+        )
+
+        tf_conf = {}
+        if 'tf' in self.configuration:
+            tf_conf = self.configuration['tf']
+
+        self.tf = create_tf(
+            self.name,
+            tf_conf,
+            device = device_sim_name,
+            shard = shard
+        )
+        self.logger.warning(f"tf serving on {self.tf.base_topic}")
+
+    def start(self):
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stop(self):
+        self.tf.stop()
+        if CommlibFactory.metrics is not None:
+            CommlibFactory.metrics.stop()
+        self.scheduler.stop()
+        self.logger.warning("tf server stopped")
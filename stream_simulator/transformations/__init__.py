@@ -4,3 +4,4 @@
 from __future__ import absolute_import
 
 from .tf import TfController
+from .tf_router import TfRouter, create_tf
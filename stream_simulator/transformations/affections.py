@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+
+import numpy as np
+
+class AffectionEngine:
+    # Keeps the positions / ranges of every indexed place in per group NumPy
+    # arrays, so that the distance and field of view checks of tf run in one
+    # vectorized pass over all candidates (and over many sensors at once).
+    # Results are (name, ...) tuples in declaration order, tf builds the
+    # reply dicts out of them.
+    def __init__(self):
+        self.groups = {}    # group -> {names, index, xy, range, order}
+        self.items = {}     # name -> group
+        self.lock = threading.Lock()
+
+    def update(self, name, group, x, y, range = 0, order = 0):
+        if x is None or y is None:
+            return
+        range = 0 if range is None else range
+        with self.lock:
+            if name in self.items and self.items[name] != group:
+                self._remove(name)
+            if group not in self.groups:
+                self.groups[group] = {
+                    'names': [],
+                    'index': {},
+                    'xy': np.zeros((0, 2)),
+                    'range': np.zeros(0),
+                    'order': np.zeros(0, dtype = np.int64)
+                }
+            g = self.groups[group]
+            if name in g['index']:
+                i = g['index'][name]
+                g['xy'][i, 0] = x
+                g['xy'][i, 1] = y
+                g['range'][i] = range
+                return
+            g['index'][name] = len(g['names'])
+            g['names'].append(name)
+            g['xy'] = np.vstack([g['xy'], [[x, y]]])
+            g['range'] = np.append(g['range'], range)
+            g['order'] = np.append(g['order'], order)
+            self.items[name] = group
+
+    def remove(self, name):
+        with self.lock:
+            self._remove(name)
+
+    def _remove(self, name):
+        if name not in self.items:
+            return
+        g = self.groups[self.items.pop(name)]
+        i = g['index'].pop(name)
+        del g['names'][i]
+        g['xy'] = np.delete(g['xy'], i, axis = 0)
+        g['range'] = np.delete(g['range'], i)
+        g['order'] = np.delete(g['order'], i)
+        for j, n in enumerate(g['names'][i:]):
+            g['index'][n] = i + j
+
+    # Arrays of a group, optionally restricted to some candidate names.
+    # Columns are sorted by declaration order.
+    def snapshot(self, group, candidates = None):
+        with self.lock:
+            if group not in self.groups:
+                return [], np.zeros((0, 2)), np.zeros(0)
+            g = self.groups[group]
+            if candidates is None:
+                idx = np.arange(len(g['names']))
+            else:
+                idx = np.fromiter(
+                    (g['index'][n] for n in candidates if n in g['index']),
+                    dtype = np.int64
+                )
+            idx = idx[np.argsort(g['order'][idx], kind = 'stable')]
+            names = [g['names'][i] for i in idx]
+            return names, g['xy'][idx], g['range'][idx]
+
+    def distances(self, points, xy):
+        points = np.asarray(points, dtype = float).reshape(-1, 2)
+        dx = points[:, 0:1] - xy[None, :, 0]
+        dy = points[:, 1:2] - xy[None, :, 1]
+        return np.sqrt(dx**2 + dy**2)
+
+    # Items of group whose own range covers each point (fires, thermostats..)
+    def ranged(self, points, group, candidates = None):
+        names, xy, rng = self.snapshot(group, candidates)
+        d = self.distances(points, xy)
+        mask = d < rng[None, :]
+        return [
+            [(names[j], float(d[i, j])) for j in np.flatnonzero(mask[i])]
+            for i in range(d.shape[0])
+        ]
+
+    # Items of group inside the range of each point (area alarms, sonars..)
+    def within(self, points, ranges, group, candidates = None):
+        names, xy, _ = self.snapshot(group, candidates)
+        d = self.distances(points, xy)
+        mask = d < np.asarray(ranges, dtype = float).reshape(-1, 1)
+        return [
+            [(names[j], float(d[i, j])) for j in np.flatnonzero(mask[i])]
+            for i in range(d.shape[0])
+        ]
+
+    # Items of group inside the range and the field of view of each pose.
+    # poses: [x, y, theta], fovs in degrees. Returns per pose lists of
+    # (name, distance, min_sensor_ang, max_sensor_ang, actor_ang).
+    def arced(self, poses, ranges, fovs, group, candidates = None):
+        names, xy, _ = self.snapshot(group, candidates)
+        poses = np.asarray(poses, dtype = float).reshape(-1, 3)
+        d = self.distances(poses[:, 0:2], xy)
+        fov = np.asarray(fovs, dtype = float).reshape(-1, 1) / 180.0 * math.pi
+        min_a = poses[:, 2:3] - fov / 2
+        max_a = poses[:, 2:3] + fov / 2
+        f_ang = np.arctan2(
+            xy[None, :, 1] - poses[:, 1:2],
+            xy[None, :, 0] - poses[:, 0:1]
+        )
+        inside = (min_a < f_ang) & (f_ang < max_a)
+        plus = (min_a < f_ang + 2 * math.pi) & (f_ang + 2 * math.pi < max_a)
+        minus = (min_a < f_ang - 2 * math.pi) & (f_ang - 2 * math.pi < max_a)
+        # Same angle reporting as the scalar checks of tf
+        ang = np.where(inside, f_ang, f_ang + 2 * math.pi)
+        mask = (d < np.asarray(ranges, dtype = float).reshape(-1, 1)) & \
+            (inside | plus | minus)
+        return [
+            [
+                (
+                    names[j],
+                    float(d[i, j]),
+                    float(min_a[i, 0]),
+                    float(max_a[i, 0]),
+                    float(ang[i, j])
+                )
+                for j in np.flatnonzero(mask[i])
+            ]
+            for i in range(d.shape[0])
+        ]
+
+class AffectionBatch:
+    # Answers many sensors at once: the first sensor asking for a group
+    # triggers one vectorized evaluation for every sensor of the batch, the
+    # rest read their row.
+    def __init__(self, engine, places, infos, names):
+        self.engine = engine
+        self.names = [n for n in names if n in places and 'x' in places[n]]
+        self.row = {n: i for i, n in enumerate(self.names)}
+        self.points = [[places[n]['x'], places[n]['y']] for n in self.names]
+        self.ranges = [
+            infos[n]['range'] if infos[n]['range'] is not None else 0
+            for n in self.names
+        ]
+        # Only sensors with a field of view take part in the arced checks
+        self.arced_names = [
+            n for n in self.names
+            if places[n].get('theta') is not None and \
+                isinstance(infos[n]['properties'], dict) and \
+                'fov' in infos[n]['properties']
+        ]
+        self.arced_row = {n: i for i, n in enumerate(self.arced_names)}
+        self.poses = [
+            [places[n]['x'], places[n]['y'], places[n]['theta']]
+            for n in self.arced_names
+        ]
+        self.arced_ranges = [self.ranges[self.row[n]] for n in self.arced_names]
+        self.fovs = [infos[n]['properties']['fov'] for n in self.arced_names]
+        self.cache = {}
+
+    def ranged(self, name, group):
+        key = ('ranged', group)
+        if key not in self.cache:
+            self.cache[key] = self.engine.ranged(self.points, group)
+        return self.cache[key][self.row[name]]
+
+    def within(self, name, group):
+        key = ('within', group)
+        if key not in self.cache:
+            self.cache[key] = self.engine.within(
+                self.points, self.ranges, group
+            )
+        return self.cache[key][self.row[name]]
+
+    def arced(self, name, group):
+        key = ('arced', group)
+        if key not in self.cache:
+            self.cache[key] = self.engine.arced(
+                self.poses, self.arced_ranges, self.fovs, group
+            )
+        return self.cache[key][self.arced_row[name]]
+
+    def __contains__(self, name):
+        return name in self.row
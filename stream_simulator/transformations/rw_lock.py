@@ -0,0 +1,50 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import threading
+import contextlib
+
+class RWLock:
+    # Many readers or one writer. Waiting writers hold off new readers, so
+    # a steady stream of queries cannot starve index refreshes; a thread
+    # already reading may read again (nested queries) without waiting.
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.writers_waiting = 0
+        self.local = threading.local()
+
+    @contextlib.contextmanager
+    def read(self):
+        depth = getattr(self.local, "depth", 0)
+        if depth == 0:
+            with self.cond:
+                self.cond.wait_for(
+                    lambda: not self.writer and self.writers_waiting == 0
+                )
+                self.readers += 1
+        self.local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.local.depth = depth
+            if depth == 0:
+                with self.cond:
+                    self.readers -= 1
+                    if self.readers == 0:
+                        self.cond.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        with self.cond:
+            self.writers_waiting += 1
+            self.cond.wait_for(lambda: not self.writer and self.readers == 0)
+            self.writers_waiting -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.writer = False
+                self.cond.notify_all()
@@ -0,0 +1,94 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+
+class SpatialGrid:
+    # Uniform grid over the world plane. Every item is stored in all the
+    # cells touched by the bounding box of its disc (position + radius), so
+    # both "which effectors cover this point" (item radius = effector range)
+    # and "which items lie around this sensor" (query radius = sensor range)
+    # return a superset of the true answers. Exact checks stay in tf.
+    def __init__(self, cell_size = 50.0, max_span = 32):
+        if cell_size is None or cell_size <= 0:
+            raise ValueError(f"Invalid spatial grid cell size: {cell_size}")
+        self.cell_size = float(cell_size)
+        # Items / queries spanning more cells per axis than this are not
+        # split into cells; they fall back to the per group member set
+        self.max_span = max_span
+        self.cells = {}     # (i, j) -> group -> set of names
+        self.items = {}     # name -> (group, cells or None if large)
+        self.members = {}   # group -> set of names
+        self.large = {}     # group -> set of names covering too many cells
+        self.lock = threading.Lock()
+
+    def cells_span(self, x, y, radius):
+        r = radius if radius is not None else 0
+        i_min = int(math.floor((x - r) / self.cell_size))
+        i_max = int(math.floor((x + r) / self.cell_size))
+        j_min = int(math.floor((y - r) / self.cell_size))
+        j_max = int(math.floor((y + r) / self.cell_size))
+        if i_max - i_min >= self.max_span or j_max - j_min >= self.max_span:
+            return None
+        return [
+            (i, j)
+            for i in range(i_min, i_max + 1)
+            for j in range(j_min, j_max + 1)
+        ]
+
+    def update(self, name, x, y, radius = 0, group = None):
+        if x is None or y is None:
+            return
+        cells = self.cells_span(x, y, radius)
+        with self.lock:
+            self._remove(name)
+            self.members.setdefault(group, set()).add(name)
+            if cells is None:
+                self.large.setdefault(group, set()).add(name)
+            else:
+                for c in cells:
+                    groups = self.cells.setdefault(c, {})
+                    groups.setdefault(group, set()).add(name)
+            self.items[name] = (group, cells)
+
+    def remove(self, name):
+        with self.lock:
+            self._remove(name)
+
+    def _remove(self, name):
+        if name not in self.items:
+            return
+        group, cells = self.items.pop(name)
+        self.members[group].discard(name)
+        if cells is None:
+            self.large[group].discard(name)
+            return
+        for c in cells:
+            groups = self.cells[c]
+            groups[group].discard(name)
+            if len(groups[group]) == 0:
+                del groups[group]
+            if len(groups) == 0:
+                del self.cells[c]
+
+    def query(self, x, y, radius = 0, group = None):
+        cells = self.cells_span(x, y, radius)
+        with self.lock:
+            groups = list(self.members) if group is None else [group]
+            ret = set()
+            for g in groups:
+                if cells is None:
+                    ret |= self.members.get(g, set())
+                    continue
+                ret |= self.large.get(g, set())
+                for c in cells:
+                    if c in self.cells and g in self.cells[c]:
+                        ret |= self.cells[c][g]
+        return ret
+
+    def __contains__(self, name):
+        return name in self.items
+
+    def __len__(self):
+        return len(self.items)
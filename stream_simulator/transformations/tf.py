@@ -7,21 +7,66 @@ import math
 import logging
 import threading
 import random
+import copy
 from colorama import Fore, Style
 import pprint
 
 from commlib.logger import Logger
 from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.base_classes import SimClock
+
+from .spatial_index import SpatialGrid
+from .affections import AffectionEngine, AffectionBatch
+from .transform_tree import TransformTree
+from .rw_lock import RWLock
 
 class TfController:
-    def __init__(self, base = None, device = None, resolution = None, logger = None):
+    # Sensor subclasses whose affections change when an effector changes
+    # state or when a robot moves
+    effector_affects = {
+        'thermostat': ['temperature', 'temp_hum_pressure_gas'],
+        'humidifier': ['humidity', 'temp_hum_pressure_gas'],
+        'leds': ['light_sensor'],
+    }
+    robot_affects = ['area_alarm', 'sonar']
+    # Sensors whose affections are the crossings since their previous
+    # query: evaluating them for a push would consume the crossings of
+    # their polls, so they are only polled
+    polled_only = ['linear_alarm']
+
+    def __init__(self,
+                 base = None,
+                 device = None,
+                 resolution = None,
+                 logger = None,
+                 cell_size = 50.0,
+                 workers = 4,
+                 shard = None):
         self.logger = Logger("tf") if logger is None else logger
+        self.clock = SimClock.get()
         self.base_topic = base + ".tf" if base is not None else "streamsim.tf"
+        # A shard of a sharded tf (see tf_router.py) serves its RPCs under
+        # <base>.tf.<shard>, behind the router, but publishes where an
+        # unsharded tf would
+        self.tf_topic = self.base_topic
+        self.shard = shard
+        if shard is not None:
+            self.base_topic += "." + shard
 
         self.base = base
         self.device = device
         self.resolution = resolution
         self.lin_alarms_robots = {}
+        self.lin_alarms_lock = threading.Lock()
+
+        # Concurrency: declarations and pose / pan updates are serialized by
+        # lock. Queries read self.world, a snapshot of the world poses that
+        # refresh_index replaces (never modifies) along with the spatial
+        # index, under the write side of world_lock; queries hold its read
+        # side, so they run in parallel and each sees one consistent world.
+        self.lock = threading.RLock()
+        self.world_lock = RWLock()
+        self.world = {}
 
         self.declare_rpc_server = CommlibFactory.getRPCService(
             callback = self.declare_callback,
@@ -37,25 +82,57 @@ class TfController:
 
         self.get_tf_rpc_server = CommlibFactory.getRPCService(
             callback = self.get_tf_callback,
-            rpc_name = self.base_topic + ".get_tf"
+            rpc_name = self.base_topic + ".get_tf",
+            workers = workers
         )
         self.get_tf_rpc_server.run()
 
         self.get_affectability_rpc_server = CommlibFactory.getRPCService(
             callback = self.get_affections_callback,
-            rpc_name = self.base_topic + ".get_affections"
+            rpc_name = self.base_topic + ".get_affections",
+            workers = workers
         )
         self.get_affectability_rpc_server.run()
 
+        self.get_affectability_batch_rpc_server = CommlibFactory.getRPCService(
+            callback = self.get_affections_batch_callback,
+            rpc_name = self.base_topic + ".get_affections_batch",
+            workers = workers
+        )
+        self.get_affectability_batch_rpc_server.run()
+
+        self.subscribe_affections_rpc_server = CommlibFactory.getRPCService(
+            callback = self.subscribe_affections_callback,
+            rpc_name = self.base_topic + ".subscribe_affections"
+        )
+        self.subscribe_affections_rpc_server.run()
+
+        self.unsubscribe_affections_rpc_server = CommlibFactory.getRPCService(
+            callback = self.unsubscribe_affections_callback,
+            rpc_name = self.base_topic + ".unsubscribe_affections"
+        )
+        self.unsubscribe_affections_rpc_server.run()
+
         sim_detection_topic = f"{self.device if self.device else self.base}.tf"
+        if shard is not None:
+            sim_detection_topic += "." + shard
         self.get_sim_detection_rpc_server = CommlibFactory.getRPCService(
             callback = self.get_sim_detection_callback,
-            rpc_name = sim_detection_topic + ".simulated_detection"
+            rpc_name = sim_detection_topic + ".simulated_detection",
+            workers = workers
         )
         self.get_sim_detection_rpc_server.run()
 
+        # Called by the simulator once its devices are declared, when tf
+        # runs in a process of its own
+        self.setup_rpc_server = CommlibFactory.getRPCService(
+            callback = self.setup_callback,
+            rpc_name = self.base_topic + ".setup"
+        )
+        self.setup_rpc_server.run()
+
         self.detections_publisher = CommlibFactory.getPublisher(
-            topic = self.base_topic + ".detections.notify"
+            topic = self.tf_topic + ".detections.notify"
         )
 
         self.declare_rpc_input = [
@@ -68,10 +145,14 @@ class TfController:
         self.names = []
 
         self.effectors_get_rpcs = {}
+        # Latest state of the effectors affecting sensors, kept from their
+        # declarations and .data topics
+        self.effector_states = {}
 
         self.subs = {} # Filled
         self.places_relative = {}
-        self.places_absolute = {}
+        # World poses, cached and recomputed lazily when their host moves
+        self.places_absolute = TransformTree()
         self.tree = {} # filled
         self.items_hosts_dict = {}
         self.existing_hosts = []
@@ -80,6 +161,23 @@ class TfController:
 
         self.speaker_subs = {}
         self.microphone_pubs = {}
+        self.effector_subs = {}
+
+        # Push mode: name -> {'publisher', 'affections', 'seq'} of devices
+        # that get their affection deltas in <base_topic>.affections. seq
+        # numbers the deltas, so subscribers can tell a missed one.
+        self.affection_subs = {}
+        self.affection_subs_lock = threading.Lock()
+
+        # Spatial index of everything with a position, used to prune the
+        # affectability queries to the devices / actors of nearby cells
+        self.spatial_index = SpatialGrid(cell_size = cell_size)
+        self.groups = {} # name -> spatial index group
+        self.stale = set() # moved places, indexed before the next query
+        self.stale_lock = threading.Lock()
+        self.order = {} # name -> declaration order, keeps replies stable
+        # Vectorized distance / fov checks over the indexed places
+        self.affections = AffectionEngine()
 
         self.per_type = {
             'robot': {
@@ -146,8 +244,13 @@ class TfController:
     def stop(self):
         self.declare_rpc_server.stop()
 
+    def setup_callback(self, message, meta):
+        self.setup()
+        return {}
+
     def get_declarations_callback(self, message, meta):
-        return {"declarations": self.declarations}
+        with self.lock:
+            return {"declarations": list(self.declarations)}
 
     def get_tf_callback(self, message, meta):
         name = message['name']
@@ -155,18 +258,8 @@ class TfController:
             self.logger.error(f"TF: Requested transformation of missing device: {name}")
             return {}
 
-        if name in self.robots:
-            return self.places_absolute[name]
-        elif name in self.pantilts:
-            pose = self.places_absolute[name]
-            base_th = 0
-            if self.items_hosts_dict[name] != None:
-                base_th = self.places_absolute[self.items_hosts_dict[name]]['theta']
-            pose['theta'] = self.places_relative[name]['theta'] + \
-                self.pantilts[name]['pan'] + base_th
-            return pose
-        else:
-            return self.places_absolute[name]
+        # Pan-tilts include their pan, devices on them the pan-tilt's theta
+        return self.places_absolute[name].copy()
 
     def setup(self):
         self.logger.info("*************** TF status ***************")
@@ -180,11 +273,9 @@ class TfController:
             self.items_hosts_dict[d['name']] = d['host']
 
             self.places_relative[d['name']] = d['pose'].copy()
-            self.places_absolute[d['name']] = d['pose'].copy()
             if 'x' in d['pose']: # The only culprit is linear alarm
                 for i in ['x', 'y']:
                     self.places_relative[d['name']][i] #*= self.resolution
-                    self.places_absolute[d['name']][i] #*= self.resolution
 
             # if d['range'] != None:
             #     d['range'] *= self.resolution
@@ -231,6 +322,7 @@ class TfController:
             self.logger.info(f"\t{p} on {self.pantilts[p]['place']}")
 
             self.existing_hosts.append(p)
+            self.mark_stale(self.places_absolute.set_kind(p, 'pan_tilt'))
 
             topic = self.pantilts[p]['base_topic'] + '.data'
             self.subs[p] = CommlibFactory.getSubscriber(
@@ -244,6 +336,9 @@ class TfController:
                 if d['host'] not in self.existing_hosts:
                     self.robots.append(d['host'])
                     self.existing_hosts.append(d['host'])
+                    self.mark_stale(
+                        self.places_absolute.set_kind(d['host'], 'robot')
+                    )
 
                     topic = d['host_type'] + "." + d["host"] + ".pose"
                     self.subs[d['host']] = CommlibFactory.getSubscriber(
@@ -262,21 +357,8 @@ class TfController:
                 self.logger.error(f"We have a missing host: {h}")
                 self.logger.error(f"\tAffected devices: {self.tree[h]}")
 
-        # update poses based on tree for pan-tilts
-        for d in self.pantilts:
-            if d in self.tree:  # We can have a pan-tilt with no devices on it
-                for i in self.tree[d]:
-                    # initial pan is considered 0
-                    pt_abs_pose = self.places_absolute[d]
-                    self.places_absolute[i]['x'] += pt_abs_pose['x']
-                    self.places_absolute[i]['y'] += pt_abs_pose['y']
-                    if self.places_absolute[i]['theta'] != None:
-                        self.places_absolute[i]['theta'] += pt_abs_pose['theta']
-
-                    # self.logger.info(f"{i}@{d}:")
-                    # self.logger.info(f"\tPan-tilt: {self.places_absolute[d]}")
-                    # self.logger.info(f"\tRelative: {self.places_relative[i]}")
-                    # self.logger.info(f"\tAbsolute: {self.places_absolute[i]}")
+        # Index all declared places
+        self.refresh_index()
 
         for n in self.declarations_info:
             d_i = self.declarations_info[n]
@@ -296,6 +378,14 @@ class TfController:
                     self.microphone_pubs[d_i['name']] = CommlibFactory.getPublisher(
                         topic = d_i["base_topic"] + ".speech_detected"
                     )
+                # subscribers for effectors affecting sensors
+                for e in self.effector_affects:
+                    if d_i['type'] == "env" and e in d_i['subtype']['subclass']:
+                        self.effector_subs[d_i['name']] = CommlibFactory.getSubscriber(
+                            topic = d_i["base_topic"] + ".data",
+                            callback = self.effector_data_callback(d_i['name'], e)
+                        )
+                        self.effector_subs[d_i['name']].run()
                     
         self.logger.info("*****************************************")
 
@@ -306,82 +396,54 @@ class TfController:
     def speak_callback(self, message, meta):
         # {'text': 'This is an example', 'volume': 100, 'language': 'el', 'speaker': 'speaker_X'}
         name = message['speaker']
-        pose = self.places_absolute[name]
-
-        # search all microphones:
-        for n in self.declarations_info:
-            if self.declarations_info[n]['type'] == "actor":
-                continue
-            if not "subtype" in self.declarations_info[n]:
-                continue
-            if not "subclass" in self.declarations_info[n]['subtype']:
+        self.refresh_index()
+        with self.world_lock.read():
+            world = self.world
+            pose = world[name]
+            xy = [pose['x'], pose['y']]
+
+            # search all nearby microphones:
+            mics = self.nearby(xy, "env.sensor.microphone", 4.0) + \
+                self.nearby(xy, "robot.sensor.microphone", 4.0)
+        for m_name in mics:
+            if m_name not in self.microphone_pubs:
                 continue
-            if "microphone" in self.declarations_info[n]['subtype']['subclass']:
-                # check distance
-                m_name = n
-                m_pose = self.places_absolute[m_name]
-
-                xy = [pose['x'], pose['y']]
-                m_xy = [m_pose['x'], m_pose['y']]
-                d = self.calc_distance(xy, m_xy)
-
-                # lets say 4 meters
-                if d < 4.0:
-                    self.microphone_pubs[m_name].publish({
-                        'speaker': name,
-                        'text': message['text'],
-                        'language': message['language']
-                    })
-
-    def robot_pose_callback(self, message, meta):        
+            # check distance
+            m_pose = world[m_name]
+            m_xy = [m_pose['x'], m_pose['y']]
+            d = self.calc_distance(xy, m_xy)
+
+            # lets say 4 meters
+            if d < 4.0:
+                self.microphone_pubs[m_name].publish({
+                    'speaker': name,
+                    'text': message['text'],
+                    'language': message['language']
+                })
+
+    def robot_pose_callback(self, message, meta):
         nm = message['name'].split(".")[-1]
         # self.logger.info(f"Updating {nm}: {message}")
-        if nm not in self.places_absolute:
-            self.places_absolute[nm] = {'x': 0, 'y': 0, 'theta': 0}
-        self.places_absolute[nm]['x'] = message['x']
-        self.places_absolute[nm]['y'] = message['y']
-        self.places_absolute[nm]['theta'] = message['theta']
-
-        # Update all thetas of devices
-        for d in self.tree[nm]:
-            if self.places_absolute[d]['theta'] != None and d not in self.pantilts:
-                self.places_absolute[d]['theta'] = \
-                    self.places_absolute[nm]['theta'] + \
-                    self.places_relative[d]['theta']
-                # self.logger.info(f"Updated {d}: {self.places_absolute[d]['theta']}")
-
-            self.places_absolute[d]['x'] = self.places_absolute[nm]['x']
-            self.places_absolute[d]['y'] = self.places_absolute[nm]['y']
-
-            # Just setting devs on pan tilts the robot's pose
-            if d in self.pantilts:
-                if d in self.tree:
-                    pt_devs = self.tree[d]
-                    for dev in pt_devs:
-                        self.places_absolute[dev]['x'] = self.places_absolute[nm]['x']
-                        self.places_absolute[dev]['y'] = self.places_absolute[nm]['y']
-                    # Updating the angle of objects on pan-tilt
-                    # self.logger.info(f"Updating pt {d} on {nm}")
-                    pan_now = self.pantilts[d]['pan']
-                    # self.logger.info(f"giving {pan_now}")
-                    self.update_pan_tilt(d, pan_now, False)
+        if nm not in self.groups:
+            with self.lock:
+                self.groups[nm] = "robots"
+                self.order[nm] = len(self.order)
+        self.mark_stale(self.places_absolute.set_pose(
+            nm, message['x'], message['y'], message['theta']
+        ))
+
+        if len(self.affection_subs) > 0:
+            self.push_affections(
+                self.places_absolute.subtree(nm) + \
+                self.subscribed_of(self.robot_affects)
+            )
 
     def update_pan_tilt(self, pt_name, pan, notify = True):
-        base_th = 0
-        # If we are on a robot take its theta
-        if self.items_hosts_dict[pt_name] != None:
-            base_th = self.places_absolute[self.items_hosts_dict[pt_name]]['theta']
-
-        # self.logger.info(f"Updated {pt_name}: {self.places_absolute[pt_name]} / {pan}")
+        self.mark_stale(self.places_absolute.set_pan(pt_name, pan))
 
-        abs_pt_theta = self.places_relative[pt_name]['theta'] + pan + base_th
         if pt_name in self.tree: # if pan-tilt has anything on it
             for i in self.tree[pt_name]:
                 if self.places_absolute[i]['theta'] != None:
-                    self.places_absolute[i]['theta'] = \
-                        self.places_relative[i]['theta'] + \
-                        abs_pt_theta
-                    
                     if notify:
                         CommlibFactory.notify_ui(
                             type = "robot_effectors",
@@ -401,6 +463,7 @@ class TfController:
     def pan_tilt_callback(self, message, meta):
         self.pantilts[message['name']]['pan'] = message['pan']
         self.update_pan_tilt(message['name'], message['pan'])
+        self.push_affections(self.places_absolute.subtree(message['name']))
 
     # {
     #     'type', 'subtype', 'name', 'pose', 'base_topic', 'range', 'fov', \
@@ -433,13 +496,62 @@ class TfController:
         if temp['pose']['theta'] != None:
             temp['pose']['theta'] *= math.pi/180.0
 
-        self.declarations.append(temp)
-        self.declarations_info[temp['name']] = temp
+        with self.lock:
+            self.declarations.append(temp)
+            self.declarations_info[temp['name']] = temp
 
-        # Per type storage
-        self.per_type_storage(temp)
+            # Per type storage
+            self.per_type_storage(temp)
+
+            self.mark_stale(self.places_absolute.add(
+                temp['name'], temp['pose'], temp['host']
+            ))
         return {}
 
+    def mark_stale(self, names):
+        with self.stale_lock:
+            self.stale.update(names)
+
+    # Brings the world snapshot and the spatial index up to date with the
+    # places that moved
+    def refresh_index(self):
+        with self.stale_lock:
+            stale = self.stale
+            self.stale = set()
+        if len(stale) == 0:
+            return
+        with self.world_lock.write():
+            world = dict(self.world)
+            for n in stale:
+                pose = self.places_absolute[n] \
+                    if n in self.places_absolute else None
+                if pose is None:
+                    world.pop(n, None)
+                    continue
+                world[n] = pose
+                self.index_place(n, pose)
+            self.world = world
+
+    def index_place(self, name, pose):
+        if 'x' not in pose: # linear alarms have no point
+            return
+        radius = 0
+        if name in self.declarations_info:
+            if self.declarations_info[name]['range'] is not None:
+                radius = self.declarations_info[name]['range']
+        self.spatial_index.update(
+            name, pose['x'], pose['y'], radius, self.groups.get(name)
+        )
+        self.affections.update(
+            name, self.groups.get(name), pose['x'], pose['y'], radius,
+            self.order.get(name, 0)
+        )
+
+    # Candidates of a group around xy, in declaration order
+    def nearby(self, xy, group, radius = 0):
+        cands = self.spatial_index.query(xy[0], xy[1], radius, group)
+        return sorted(cands, key = lambda n: self.order.get(n, 0))
+
     # https://jsonformatter.org/yaml-formatter/a56cff
     def per_type_storage(self, d):
         type = d['type']
@@ -449,18 +561,22 @@ class TfController:
             self.logger.error(f"Name {d['name']} already exists. {d['base_topic']}")
         else:
             self.names.append(d['name'])
+            self.order[d['name']] = len(self.order)
 
         if type == 'actor':
             self.per_type[type][sub].append(d['name'])
+            self.groups[d['name']] = f"actor.{sub}"
         elif type == "env":
             subclass = sub['subclass'][0]
             category = sub['category']
             self.per_type[type][category][subclass].append(d['name'])
+            self.groups[d['name']] = f"env.{category}.{subclass}"
 
             if subclass in ["thermostat", "humidifier", "leds"]:
                 self.effectors_get_rpcs[d['name']] = CommlibFactory.getRPCClient(
                     rpc_name = d['base_topic'] + ".get"
                 )
+                self.effector_states[d['name']] = dict(d['properties'] or {})
 
         elif type == "robot":
             subclass = sub['subclass'][0]
@@ -468,8 +584,10 @@ class TfController:
             cls = sub['class']
             if cls in ["imu", "button", "env", "encoder", "twist", "line_follow"]:
                 self.per_type[type][category][cls].append(d['name'])
+                self.groups[d['name']] = f"robot.{category}.{cls}"
             else:
                 self.per_type[type][category][subclass].append(d['name'])
+                self.groups[d['name']] = f"robot.{category}.{subclass}"
 
     def get_affections_callback(self, message, meta):
         try:
@@ -478,6 +596,104 @@ class TfController:
             self.logger.error(f"Error in get affections callback: {str(e)}")
             return {}
 
+    def get_affections_batch_callback(self, message, meta):
+        try:
+            return {
+                "affections": self.check_affectability_batch(message['names'])
+            }
+        except Exception as e:
+            self.logger.error(f"Error in get affections batch callback: {str(e)}")
+            return {"affections": {}}
+
+    def subscribe_affections_callback(self, message, meta):
+        name = message['name']
+        if name not in self.declarations_info:
+            self.logger.error(f"TF: Affections subscription of missing device: {name}")
+            return {}
+        if any(s in self.declarations_info[name]['subtype']['subclass'] \
+                for s in self.polled_only):
+            return {"topic": None}
+
+        topic = self.declarations_info[name]['base_topic'] + ".affections"
+        with self.affection_subs_lock:
+            if name not in self.affection_subs:
+                self.affection_subs[name] = {
+                    'publisher': CommlibFactory.getPublisher(topic = topic),
+                    'affections': {},
+                    'seq': 0
+                }
+            aff = self.check_affectability_batch([name])[name]
+            self.affection_subs[name]['affections'] = copy.deepcopy(aff)
+            seq = self.affection_subs[name]['seq']
+
+        # The affections as of delta seq
+        return {
+            "topic": topic,
+            "affections": aff,
+            "seq": seq
+        }
+
+    def unsubscribe_affections_callback(self, message, meta):
+        with self.affection_subs_lock:
+            self.affection_subs.pop(message['name'], None)
+        return {}
+
+    # Subscribed devices having any of the subclasses
+    def subscribed_of(self, subclasses):
+        ret = []
+        for n in list(self.affection_subs):
+            if any(s in self.declarations_info[n]['subtype']['subclass'] \
+                    for s in subclasses):
+                ret.append(n)
+        return ret
+
+    # Recomputes the affections of the subscribed devices among names and
+    # publishes only what changed
+    def push_affections(self, names):
+        with self.affection_subs_lock:
+            names = [n for n in dict.fromkeys(names) if n in self.affection_subs]
+            if len(names) == 0:
+                return
+            res = self.check_affectability_batch(names)
+            for n in names:
+                prev = self.affection_subs[n]['affections']
+                curr = copy.deepcopy(res[n])
+                updated = {
+                    k: curr[k] for k in curr if k not in prev or prev[k] != curr[k]
+                }
+                removed = [k for k in prev if k not in curr]
+                if len(updated) == 0 and len(removed) == 0:
+                    continue
+
+                self.affection_subs[n]['affections'] = curr
+                self.affection_subs[n]['seq'] += 1
+                self.affection_subs[n]['publisher'].publish({
+                    "name": n,
+                    "seq": self.affection_subs[n]['seq'],
+                    "updated": updated,
+                    "removed": removed,
+                    "names": list(curr),
+                    "timestamp": self.clock.time()
+                })
+
+    def effector_data_callback(self, name, subclass):
+        def callback(message, meta):
+            state = dict(self.effector_states.get(name, {}))
+            state.update(message)
+            self.effector_states[name] = state
+            self.push_affections(self.subscribed_of(self.effector_affects[subclass]))
+        return callback
+
+    # Cached state of an effector, asked from it only if the state lacks key
+    # (declared without it and not published since)
+    def effector_state(self, name, key):
+        state = self.effector_states.get(name, {})
+        if key not in state:
+            state = dict(state)
+            state.update(self.effectors_get_rpcs[name].call({}))
+            self.effector_states[name] = state
+        return state
+
     def check_lines_orientation(self, p, q, r):
         val = (float(q[1] - p[1]) * (r[0] - q[0])) - \
             (float(q[0] - p[0]) * (r[1] - q[1]))
@@ -526,97 +742,81 @@ class TfController:
     def calc_distance(self, p1, p2):
         return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
-    def check_distance(self, xy, aff):
-        pl_aff = self.places_absolute[aff]
-        xyt = [pl_aff['x'], pl_aff['y']]
-        d = self.calc_distance(xy, xyt)
-        # d = math.sqrt((xy[0] - xyt[0])**2 + (xy[1] - xyt[1])**2)
+    def ranged_result(self, f, d, type):
+        if self.declarations_info[f]["properties"] == None:
+            self.declarations_info[f]["properties"] = {}
         return {
+            'type': type,
+            'info': self.declarations_info[f]["properties"],
             'distance': d,
-            'properties': self.declarations_info[aff]["properties"]
+            'range': self.declarations_info[f]['range'],
+            'name': self.declarations_info[f]['name'],
+            'id': self.declarations_info[f]['id']
         }
 
-    def handle_affection_ranged(self, xy, f, type):
-        dd = self.check_distance(xy, f)
-        d = dd['distance']
-        if d < self.declarations_info[f]['range']: # range is fire's
-            if self.declarations_info[f]["properties"] == None:
-                self.declarations_info[f]["properties"] = {}
-            return {
-                'type': type,
-                'info': self.declarations_info[f]["properties"],
-                'distance': d,
-                'range': self.declarations_info[f]['range'],
-                'name': self.declarations_info[f]['name'],
-                'id': self.declarations_info[f]['id']
-            }
-        return None
-
-    def handle_affection_arced(self, name, f, type):
-        p_d = self.places_absolute[name]
-        p_f = self.places_absolute[f]
-
-        d = math.sqrt((p_d['x'] - p_f['x'])**2 + (p_d['y'] - p_f['y'])**2)
-
-        if d < self.declarations_info[name]['range']: # range of arced sensor
-            # Check if in specific arc
-            fov = self.declarations_info[name]["properties"]["fov"] / 180.0 * math.pi
-            min_a = p_d['theta'] - fov / 2
-            max_a = p_d['theta'] + fov / 2
-            f_ang = math.atan2(p_f['y'] - p_d['y'], p_f['x'] - p_d['x'])
-
-            ok = False
-            ang = None
-            if min_a < f_ang and f_ang < max_a:
-                ok = True
-                ang = f_ang
-            elif min_a < (f_ang + 2 * math.pi) and (f_ang + 2 * math.pi) < max_a:
-                ok = True
-                ang = f_ang + 2 * math.pi
-            elif min_a < (f_ang - 2 * math.pi) and (f_ang - 2 * math.pi) < max_a:
-                ok = True
-                ang = f_ang + 2 * math.pi
-
-            if ok:
-                props = None
-                if type == "robot":
-                    props = f
-                    name = f
-                    id = None
-                else:
-                    props = self.declarations_info[f]["properties"]
-                    name = self.declarations_info[f]['name']
-                    id = self.declarations_info[f]['id']
-                return {
-                    'type': type,
-                    'info': props,
-                    'distance': d,
-                    'min_sensor_ang': min_a,
-                    'max_sensor_ang': max_a,
-                    'actor_ang': ang,
-                    'name': name,
-                    'id': id
-                }
+    def arced_result(self, f, d, min_a, max_a, ang, type):
+        if type == "robot":
+            props = f
+            name = f
+            id = None
+        else:
+            props = self.declarations_info[f]["properties"]
+            name = self.declarations_info[f]['name']
+            id = self.declarations_info[f]['id']
+        return {
+            'type': type,
+            'info': props,
+            'distance': d,
+            'min_sensor_ang': min_a,
+            'max_sensor_ang': max_a,
+            'actor_ang': ang,
+            'name': name,
+            'id': id
+        }
 
-        return None
+    # Members of group whose range covers xy: [(name, distance)]
+    def affected_ranged(self, name, xy, group, batch = None):
+        if batch is not None and name in batch:
+            return batch.ranged(name, group)
+        cands = self.spatial_index.query(xy[0], xy[1], 0, group)
+        return self.affections.ranged([xy], group, cands)[0]
+
+    # Members of group inside the range of name: [(name, distance)]
+    def affected_within(self, name, xy, group, batch = None):
+        if batch is not None and name in batch:
+            return batch.within(name, group)
+        range = self.declarations_info[name]['range']
+        cands = self.spatial_index.query(xy[0], xy[1], range, group)
+        return self.affections.within([xy], [range], group, cands)[0]
+
+    # Members of group inside the range and fov of name:
+    # [(name, distance, min_sensor_ang, max_sensor_ang, actor_ang)]
+    def affected_arced(self, name, group, batch = None):
+        if batch is not None and name in batch.arced_row:
+            return batch.arced(name, group)
+        pl = self.world[name]
+        range = self.declarations_info[name]['range']
+        fov = self.declarations_info[name]["properties"]["fov"]
+        cands = self.spatial_index.query(pl['x'], pl['y'], range, group)
+        return self.affections.arced(
+            [[pl['x'], pl['y'], pl['theta']]], [range], [fov], group, cands
+        )[0]
 
     # Affected by thermostats and fires
-    def handle_env_sensor_temperature(self, name):
+    def handle_env_sensor_temperature(self, name, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
+            pl = self.world[name]
             x_y = [pl['x'], pl['y']]
 
-            for f in self.per_type['env']['actuator']['thermostat']:
-                r = self.handle_affection_ranged(x_y, f, 'thermostat')
-                if r != None:
-                    th_t = self.effectors_get_rpcs[f].call({})
-                    r['info']['temperature'] = th_t['temperature']
-                    ret[f] = r
-            for f in self.per_type['actor']['fire']:
-                r = self.handle_affection_ranged(x_y, f, 'fire')
-                if r != None:
-                    ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "env.actuator.thermostat", batch):
+                r = self.ranged_result(f, d, 'thermostat')
+                th_t = self.effector_state(f, 'temperature')
+                r['info'] = dict(r['info'])
+                r['info']['temperature'] = th_t['temperature']
+                ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "actor.fire", batch):
+                ret[f] = self.ranged_result(f, d, 'fire')
         except Exception as e:
             self.logger.error(str(e))
             raise Exception(str(e))
@@ -624,22 +824,20 @@ class TfController:
         return ret
 
     # Affected by humidifiers and water sources
-    def handle_env_sensor_humidity(self, name):
+    def handle_env_sensor_humidity(self, name, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
+            pl = self.world[name]
             x_y = [pl['x'], pl['y']]
 
-            for f in self.per_type['env']['actuator']['humidifier']:
-                r = self.handle_affection_ranged(x_y, f, 'humidifier')
-                if r != None:
-                    th_t = self.effectors_get_rpcs[f].call({})
-                    r['info']['humidity'] = th_t['humidity']
-                    ret[f] = r
-            for f in self.per_type['actor']['water']:
-                r = self.handle_affection_ranged(x_y, f, 'water')
-                if r != None:
-                    ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "env.actuator.humidifier", batch):
+                r = self.ranged_result(f, d, 'humidifier')
+                th_t = self.effector_state(f, 'humidity')
+                r['info'] = dict(r['info'])
+                r['info']['humidity'] = th_t['humidity']
+                ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "actor.water", batch):
+                ret[f] = self.ranged_result(f, d, 'water')
         except Exception as e:
             self.logger.error(str(e))
             raise Exception(str(e))
@@ -647,22 +845,18 @@ class TfController:
         return ret
 
     # Affected by humans, fire
-    def handle_env_sensor_gas(self, name, robot = None):
+    def handle_env_sensor_gas(self, name, robot = None, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
+            pl = self.world[name]
             x_y = [pl['x'], pl['y']]
 
             # - env actuator thermostat
-            for f in self.per_type['actor']['human']:
-                r = self.handle_affection_ranged(x_y, f, 'human')
-                if r != None:
-                    ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "actor.human", batch):
+                ret[f] = self.ranged_result(f, d, 'human')
             # - env actor fire
-            for f in self.per_type['actor']['fire']:
-                r = self.handle_affection_ranged(x_y, f, 'fire')
-                if r != None:
-                    ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "actor.fire", batch):
+                ret[f] = self.ranged_result(f, d, 'fire')
         except Exception as e:
             self.logger.error(str(e))
             raise Exception(str(e))
@@ -671,23 +865,19 @@ class TfController:
 
     # Affected by humans with sound, sound sources, speakers (when playing smth),
     # robots (when moving)
-    def handle_sensor_microphone(self, name):
+    def handle_sensor_microphone(self, name, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
+            pl = self.world[name]
             x_y = [pl['x'], pl['y']]
 
             # - actor human
-            for f in self.per_type['actor']['human']:
+            for f, d in self.affected_ranged(name, x_y, "actor.human", batch):
                 if self.declarations_info[f]['properties']['sound'] == 1:
-                    r = self.handle_affection_ranged(x_y, f, 'human')
-                    if r != None:
-                        ret[f] = r
+                    ret[f] = self.ranged_result(f, d, 'human')
             # - actor sound sources
-            for f in self.per_type['actor']['sound_source']:
-                r = self.handle_affection_ranged(x_y, f, 'sound_source')
-                if r != None:
-                    ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "actor.sound_source", batch):
+                ret[f] = self.ranged_result(f, d, 'sound_source')
         except Exception as e:
             self.logger.error(str(e))
             raise Exception(str(e))
@@ -695,23 +885,22 @@ class TfController:
         return ret
 
     # Affected by light, fire
-    def handle_env_light_sensor(self, name):
+    def handle_env_light_sensor(self, name, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
+            pl = self.world[name]
             x_y = [pl['x'], pl['y']]
 
             # - env light
-            for f in self.per_type['env']['actuator']['leds']:
-                r = self.handle_affection_ranged(x_y, f, 'light')
-                if r != None:
-                    th_t = self.effectors_get_rpcs[f].call({})
-                    ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "env.actuator.leds", batch):
+                r = self.ranged_result(f, d, 'light')
+                th_t = self.effector_state(f, 'luminosity')
+                r['info'] = dict(r['info'])
+                r['info']['luminosity'] = th_t['luminosity']
+                ret[f] = r
             # - actor fire
-            for f in self.per_type['actor']['fire']:
-                r = self.handle_affection_ranged(x_y, f, 'fire')
-                if r != None:
-                    ret[f] = r
+            for f, d in self.affected_ranged(name, x_y, "actor.fire", batch):
+                ret[f] = self.ranged_result(f, d, 'fire')
         except Exception as e:
             self.logger.error(str(e))
             raise Exception(str(e))
@@ -719,45 +908,19 @@ class TfController:
         return ret
 
     # Affected by barcode, color, human, qr, text
-    def handle_sensor_camera(self, name, with_robots = False):
+    def handle_sensor_camera(self, name, with_robots = False, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
-            x_y = [pl['x'], pl['y']]
-            th = pl['theta']
 
-            # - actor human
-            for f in self.per_type['actor']['human']:
-                r = self.handle_affection_arced(name, f, 'human')
-                if r != None:
-                    ret[f] = r
-            # - actor qr
-            for f in self.per_type['actor']['qr']:
-                r = self.handle_affection_arced(name, f, 'qr')
-                if r != None:
-                    ret[f] = r
-            # - actor barcode
-            for f in self.per_type['actor']['barcode']:
-                r = self.handle_affection_arced(name, f, 'barcode')
-                if r != None:
-                    ret[f] = r
-            # - actor color
-            for f in self.per_type['actor']['color']:
-                r = self.handle_affection_arced(name, f, 'color')
-                if r != None:
-                    ret[f] = r
-            # - actor text
-            for f in self.per_type['actor']['text']:
-                r = self.handle_affection_arced(name, f, 'text')
-                if r != None:
-                    ret[f] = r
+            # - actor human, qr, barcode, color, text
+            for t in ['human', 'qr', 'barcode', 'color', 'text']:
+                for a in self.affected_arced(name, f"actor.{t}", batch):
+                    ret[a[0]] = self.arced_result(*a, t)
 
             # check all robots
             if with_robots:
-                for rob in self.robots:
-                    r = self.handle_affection_arced(name, rob, 'robot')
-                    if r != None:
-                        ret[rob] = r
+                for a in self.affected_arced(name, "robots", batch):
+                    ret[a[0]] = self.arced_result(*a, 'robot')
 
         except Exception as e:
             self.logger.error("handle_sensor_camera:" + str(e))
@@ -766,18 +929,13 @@ class TfController:
         return ret
 
     # Affected by rfid_tags
-    def handle_sensor_rfid_reader(self, name):
+    def handle_sensor_rfid_reader(self, name, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
-            x_y = [pl['x'], pl['y']]
-            th = pl['theta']
 
-            # - actor human
-            for f in self.per_type['actor']['rfid_tag']:
-                r = self.handle_affection_arced(name, f, 'rfid_tag')
-                if r != None:
-                    ret[f] = r
+            # - actor rfid tags
+            for a in self.affected_arced(name, "actor.rfid_tag", batch):
+                ret[a[0]] = self.arced_result(*a, 'rfid_tag')
 
         except Exception as e:
             self.logger.error(str(e))
@@ -786,24 +944,19 @@ class TfController:
         return ret
 
     # Affected by robots
-    def handle_area_alarm(self, name):
+    def handle_area_alarm(self, name, batch = None):
         try:
             ret = {}
-            pl = self.places_absolute[name]
+            pl = self.world[name]
             xy = [pl['x'], pl['y']]
-            th = pl['theta']
             range = self.declarations_info[name]['range']
 
             # Check all robots if in there
-            for r in self.robots:
-                pl_aff = self.places_absolute[r]
-                xyt = [pl_aff['x'], pl_aff['y']]
-                d = math.sqrt((xy[0] - xyt[0])**2 + (xy[1] - xyt[1])**2)
-                if d < range:
-                    ret[r] = {
-                        "distance": d,
-                        "range": range
-                    }
+            for r, d in self.affected_within(name, xy, "robots", batch):
+                ret[r] = {
+                    "distance": d,
+                    "range": range
+                }
 
         except Exception as e:
             self.logger.error(str(e))
@@ -812,25 +965,20 @@ class TfController:
         return ret
 
     # Affected by robots
-    def handle_env_distance(self, name):
+    def handle_env_distance(self, name, batch = None):
         try:
             ret = {}
 
-            pl = self.places_absolute[name]
+            pl = self.world[name]
             xy = [pl['x'], pl['y']]
-            th = pl['theta']
             range = self.declarations_info[name]['range']
 
             # Check all robots if in there
-            for r in self.robots:
-                pl_aff = self.places_absolute[r]
-                xyt = [pl_aff['x'], pl_aff['y']]
-                d = math.sqrt((xy[0] - xyt[0])**2 + (xy[1] - xyt[1])**2)
-                if d < range:
-                    ret[r] = {
-                        "distance": d,
-                        "range": range
-                    }
+            for r, d in self.affected_within(name, xy, "robots", batch):
+                ret[r] = {
+                    "distance": d,
+                    "range": range
+                }
 
         except Exception as e:
             self.logger.error(str(e))
@@ -857,24 +1005,25 @@ class TfController:
 
             # Check all robots
             for r in self.robots:
-                pl_aff = self.places_absolute[r]
+                pl_aff = self.world[r]
                 xyt = [pl_aff['x'], pl_aff['y']]
 
-                if r not in self.lin_alarms_robots:
-                    self.lin_alarms_robots[r] = {
-                        "prev": xyt,
-                        "curr": xyt
-                    }
+                with self.lin_alarms_lock:
+                    if r not in self.lin_alarms_robots:
+                        self.lin_alarms_robots[r] = {
+                            "prev": xyt,
+                            "curr": xyt
+                        }
 
-                self.lin_alarms_robots[r]["prev"] = \
-                    self.lin_alarms_robots[r]["curr"]
+                    self.lin_alarms_robots[r]["prev"] = \
+                        self.lin_alarms_robots[r]["curr"]
 
-                self.lin_alarms_robots[r]["curr"] = xyt
+                    self.lin_alarms_robots[r]["curr"] = xyt
 
-                intersection = self.check_lines_intersection(sta, end, \
-                    self.lin_alarms_robots[r]["curr"],
-                    self.lin_alarms_robots[r]["prev"]
-                )
+                    intersection = self.check_lines_intersection(sta, end, \
+                        self.lin_alarms_robots[r]["curr"],
+                        self.lin_alarms_robots[r]["prev"]
+                    )
                 # print(sta, end, "||", self.lin_alarms_robots[r]["curr"], \
                 #     self.lin_alarms_robots[r]["prev"], "||", intersection)
 
@@ -887,7 +1036,33 @@ class TfController:
 
         return ret
 
+    # Affections of many devices, evaluated in vectorized passes
+    def check_affectability_batch(self, names):
+        self.refresh_index()
+        with self.world_lock.read():
+            batch = AffectionBatch(
+                self.affections,
+                self.world,
+                self.declarations_info,
+                [n for n in names if n in self.declarations_info]
+            )
+            ret = {}
+            for n in names:
+                try:
+                    ret[n] = self.affectability(n, batch)
+                except Exception as e:
+                    self.logger.error(f"Error in batch affections of {n}: {str(e)}")
+                    ret[n] = {}
+        return ret
+
     def check_affectability(self, name):
+        self.refresh_index()
+        with self.world_lock.read():
+            return self.affectability(name)
+
+    # Affections of name on the current world snapshot; callers hold the
+    # read side of world_lock
+    def affectability(self, name, batch = None):
         try:
             type = self.declarations_info[name]['type']
             subt = self.declarations_info[name]['subtype']
@@ -898,35 +1073,35 @@ class TfController:
             ret = {}
             if type == "env":
                 if 'temperature' in subt['subclass']:
-                    ret = self.handle_env_sensor_temperature(name)
+                    ret = self.handle_env_sensor_temperature(name, batch = batch)
                 if 'humidity' in subt['subclass']:
-                    ret = self.handle_env_sensor_humidity(name)
+                    ret = self.handle_env_sensor_humidity(name, batch = batch)
                 if 'gas' in subt['subclass']:
-                    ret = self.handle_env_sensor_gas(name)
+                    ret = self.handle_env_sensor_gas(name, batch = batch)
                 if 'microphone' in subt['subclass']:
-                    ret = self.handle_sensor_microphone(name)
+                    ret = self.handle_sensor_microphone(name, batch = batch)
                 if 'camera' in subt['subclass']:
-                    ret = self.handle_sensor_camera(name)
+                    ret = self.handle_sensor_camera(name, batch = batch)
                 if 'area_alarm' in subt['subclass']:
-                    ret = self.handle_area_alarm(name)
+                    ret = self.handle_area_alarm(name, batch = batch)
                 if 'linear_alarm' in subt['subclass']:
                     ret = self.handle_linear_alarm(name)
                 if 'sonar' in subt['subclass']:
-                    ret = self.handle_env_distance(name)
+                    ret = self.handle_env_distance(name, batch = batch)
                 if 'light_sensor' in subt['subclass']:
-                    ret = self.handle_env_light_sensor(name)
+                    ret = self.handle_env_light_sensor(name, batch = batch)
             elif type == "robot":
                 if 'microphone' in subt['subclass']:
-                    ret = self.handle_sensor_microphone(name)
+                    ret = self.handle_sensor_microphone(name, batch = batch)
                 if 'camera' in subt['subclass']:
-                    ret = self.handle_sensor_camera(name)
+                    ret = self.handle_sensor_camera(name, batch = batch)
                 if 'rfid_reader' in subt['subclass']:
-                    ret = self.handle_sensor_rfid_reader(name)
+                    ret = self.handle_sensor_rfid_reader(name, batch = batch)
                 if 'temp_hum_pressure_gas' in subt['subclass']:
                     ret = {
-                        'temperature': self.handle_env_sensor_temperature(name),
-                        'humidity': self.handle_env_sensor_humidity(name),
-                        'gas': self.handle_env_sensor_gas(name)
+                        'temperature': self.handle_env_sensor_temperature(name, batch = batch),
+                        'humidity': self.handle_env_sensor_humidity(name, batch = batch),
+                        'gas': self.handle_env_sensor_gas(name, batch = batch)
                     }
         except Exception as e:
             raise Exception(f"Error in device handling: {str(e)}")
@@ -934,6 +1109,11 @@ class TfController:
         return ret
 
     def get_sim_detection_callback(self, message, meta):
+        self.refresh_index()
+        with self.world_lock.read():
+            return self.sim_detection(message)
+
+    def sim_detection(self, message):
         try:
             name = message['name']
             type = message['type']
@@ -964,7 +1144,7 @@ class TfController:
 
         if decl['subtype']['subclass'][0] == "microphone":
             # possible types: sound, language, emotion, speech2text
-            ret = self.check_affectability(name)
+            ret = self.affectability(name)
             decision = False
             info = ""
             frm = ret
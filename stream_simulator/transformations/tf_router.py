@@ -0,0 +1,228 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import copy
+import threading
+import concurrent.futures
+
+from commlib.logger import Logger
+from stream_simulator.connectivity import CommlibFactory
+
+from .tf import TfController
+from .transform_tree import TransformTree
+
+# The tf of a simulation, as configured under tf: a TfController, or the
+# router of its shards if shards are given (shard picks one of them)
+def create_tf(base, conf = None, device = None, shard = None):
+    conf = {} if conf is None else conf
+    workers = conf.get('workers', 4)
+    shards = conf.get('shards', [])
+    if len(shards) > 0 and shard is None:
+        return TfRouter(
+            base = base,
+            device = device,
+            shards = shards,
+            workers = workers
+        )
+    return TfController(
+        base = base,
+        device = device,
+        cell_size = conf.get('cell_size', 50.0),
+        workers = workers,
+        shard = shard
+    )
+
+class TfRouter:
+    # Front of a tf sharded by region. Serves the tf RPCs under <base>.tf
+    # and forwards them to the shards, TfControllers serving under
+    # <base>.tf.<shard> (usually bin/tf_server.py processes):
+    # - declarations and setup go to every shard, so that each one holds
+    #   the whole world and can answer for any device
+    # - queries go to the shard whose region holds the device's current
+    #   position, the first one if none does, so the affectability work is
+    #   split by region
+    # Only the query load is split: every shard still holds, declares and
+    # tracks the poses of the whole world.
+    # Shards are {name, x: [min, max], y: [min, max]}; a missing axis is
+    # unbounded.
+    def __init__(self,
+                 base = None,
+                 device = None,
+                 shards = None,
+                 workers = 4,
+                 logger = None):
+        self.logger = Logger("tf_router") if logger is None else logger
+        self.base = base
+        self.device = device
+        self.base_topic = base + ".tf" if base is not None else "streamsim.tf"
+        self.sim_detection_topic = \
+            f"{self.device if self.device else self.base}.tf"
+        self.shards = shards
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers = len(shards)
+        )
+        self.clients = {}
+        self.clients_lock = threading.Lock()
+
+        # Positions of the declared devices, for the routing only
+        self.places = TransformTree()
+        self.robot_hosts = []
+        self.subs = {}
+        # name -> shard serving its affections subscription
+        self.subscribed = {}
+
+        self.services = []
+        for rpc, callback, rpc_workers in [
+            ("declare", self.declare_callback, 1),
+            ("setup", self.setup_callback, 1),
+            ("get_declarations", self.get_declarations_callback, 1),
+            ("get_tf", self.get_tf_callback, workers),
+            ("get_affections", self.get_affections_callback, workers),
+            ("get_affections_batch", self.get_affections_batch_callback, workers),
+            ("subscribe_affections", self.subscribe_affections_callback, 1),
+            ("unsubscribe_affections", self.unsubscribe_affections_callback, 1)
+        ]:
+            self.services.append(CommlibFactory.getRPCService(
+                callback = callback,
+                rpc_name = self.base_topic + "." + rpc,
+                workers = rpc_workers
+            ))
+        self.services.append(CommlibFactory.getRPCService(
+            callback = self.get_sim_detection_callback,
+            rpc_name = self.sim_detection_topic + ".simulated_detection",
+            workers = workers
+        ))
+        for s in self.services:
+            s.run()
+
+    def start(self):
+        for s in self.services:
+            s.run()
+
+    def stop(self):
+        for s in self.services:
+            s.stop()
+        for s in self.subs:
+            self.subs[s].stop()
+        self.executor.shutdown(wait = False)
+
+    def client(self, shard, rpc):
+        key = (shard, rpc)
+        with self.clients_lock:
+            if key not in self.clients:
+                topic = self.base_topic
+                if rpc == "simulated_detection":
+                    topic = self.sim_detection_topic
+                self.clients[key] = CommlibFactory.getRPCClient(
+                    rpc_name = f"{topic}.{shard}.{rpc}"
+                )
+            return self.clients[key]
+
+    # Calls rpc on every shard, in parallel, returning the first reply of
+    # a shard that answered. Failing shards are logged; the call fails only
+    # if all of them do.
+    def broadcast(self, rpc, message):
+        futures = [
+            (s['name'], self.executor.submit(
+                self.client(s['name'], rpc).call, copy.deepcopy(message)
+            ))
+            for s in self.shards
+        ]
+        replies = []
+        error = None
+        for shard, f in futures:
+            try:
+                replies.append(f.result())
+            except Exception as e:
+                error = e
+                self.logger.error(f"tf shard {shard} failed on {rpc}: {str(e)}")
+        if len(replies) == 0:
+            raise error
+        return replies[0]
+
+    # Shard of the region holding the device
+    def shard_of(self, name):
+        pose = self.places.get(name) if name in self.places else None
+        if pose is None or 'x' not in pose:
+            return self.shards[0]['name']
+        for s in self.shards:
+            if 'x' in s and not s['x'][0] <= pose['x'] < s['x'][1]:
+                continue
+            if 'y' in s and not s['y'][0] <= pose['y'] < s['y'][1]:
+                continue
+            return s['name']
+        return self.shards[0]['name']
+
+    def declare_callback(self, message, meta):
+        self.places.add(message['name'], message['pose'], message.get('host'))
+        if message.get('host_type') == "robot" and \
+                message['host'] not in self.robot_hosts:
+            self.robot_hosts.append(message['host'])
+        return self.broadcast("declare", message)
+
+    def setup(self):
+        for r in self.robot_hosts:
+            self.places.set_kind(r, 'robot')
+            self.subs[r] = CommlibFactory.getSubscriber(
+                topic = "robot." + r + ".pose",
+                callback = self.robot_pose_callback
+            )
+            self.subs[r].run()
+        self.broadcast("setup", {})
+        self.logger.info(f"tf sharded in {[s['name'] for s in self.shards]}")
+
+    def setup_callback(self, message, meta):
+        self.setup()
+        return {}
+
+    def robot_pose_callback(self, message, meta):
+        self.places.set_pose(
+            message['name'].split(".")[-1],
+            message['x'], message['y'], message['theta']
+        )
+
+    def get_declarations_callback(self, message, meta):
+        return self.client(self.shards[0]['name'], "get_declarations").call(message)
+
+    def get_tf_callback(self, message, meta):
+        return self.client(self.shard_of(message['name']), "get_tf").call(message)
+
+    def get_affections_callback(self, message, meta):
+        return self.client(
+            self.shard_of(message['name']), "get_affections"
+        ).call(message)
+
+    def get_affections_batch_callback(self, message, meta):
+        per_shard = {}
+        for n in message['names']:
+            per_shard.setdefault(self.shard_of(n), []).append(n)
+        futures = [
+            self.executor.submit(
+                self.client(s, "get_affections_batch").call,
+                {"names": names}
+            )
+            for s, names in per_shard.items()
+        ]
+        ret = {}
+        for f in futures:
+            try:
+                ret.update(f.result()['affections'])
+            except Exception as e:
+                self.logger.error(f"Error in sharded batch affections: {str(e)}")
+        return {"affections": ret}
+
+    def subscribe_affections_callback(self, message, meta):
+        shard = self.shard_of(message['name'])
+        self.subscribed[message['name']] = shard
+        return self.client(shard, "subscribe_affections").call(message)
+
+    def unsubscribe_affections_callback(self, message, meta):
+        shard = self.subscribed.pop(message['name'], None)
+        if shard is None:
+            return {}
+        return self.client(shard, "unsubscribe_affections").call(message)
+
+    def get_sim_detection_callback(self, message, meta):
+        return self.client(
+            self.shard_of(message['name']), "simulated_detection"
+        ).call(message)
@@ -0,0 +1,152 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import threading
+
+class TransformTree:
+    # Transform graph of tf. Every node keeps its pose relative to its host
+    # and a cached world pose, recomputed lazily on read when dirty. Pose
+    # and pan updates only mark the affected subtree dirty.
+    #
+    # Attachment rules:
+    # - no host: the relative pose is the world pose
+    # - on a robot, directly or through pan-tilts: robot position, host
+    #   theta + relative theta
+    # - on a pan-tilt in the environment (or anything else): host position
+    #   + relative offset, host theta + relative theta
+    # Pan-tilts add their pan to their theta. Devices with a None theta keep
+    # it None. Hosts without a known pose yet leave their devices at their
+    # relative pose.
+    def __init__(self):
+        self.nodes = {}
+        self.children = {}  # host name -> names of hosted nodes
+        self.lock = threading.RLock()
+
+    def add(self, name, pose, host = None, kind = None):
+        with self.lock:
+            if name in self.nodes:
+                self._detach(name)
+            self.nodes[name] = {
+                'host': host,
+                'relative': pose.copy() if pose is not None else None,
+                'kind': kind,
+                'pose': None,   # set for nodes driven by pose messages
+                'pan': 0.0,
+                'world': None,
+                'dirty': False  # marked right below, so it gets reported
+            }
+            self.children.setdefault(host, []).append(name)
+            return self._invalidate(name)
+
+    def _detach(self, name):
+        host = self.nodes[name]['host']
+        self.children[host].remove(name)
+
+    def set_kind(self, name, kind):
+        with self.lock:
+            ret = []
+            if name not in self.nodes:
+                ret = self.add(name, None, kind = kind)
+            self.nodes[name]['kind'] = kind
+            return ret + self._invalidate(name)
+
+    # Pose of a node driven from outside (robots)
+    def set_pose(self, name, x, y, theta):
+        with self.lock:
+            ret = []
+            if name not in self.nodes:
+                ret = self.add(name, None, kind = 'robot')
+            self.nodes[name]['pose'] = {'x': x, 'y': y, 'theta': theta}
+            return ret + self._invalidate(name)
+
+    def set_pan(self, name, pan):
+        with self.lock:
+            self.nodes[name]['pan'] = pan
+            return self._invalidate(name)
+
+    # All the nodes carried by name, at any depth
+    def subtree(self, name):
+        with self.lock:
+            ret = []
+            stack = list(self.children.get(name, []))
+            while len(stack) > 0:
+                n = stack.pop()
+                ret.append(n)
+                stack += self.children.get(n, [])
+            return ret
+
+    # Marks name and its subtree dirty, returns the names that were clean.
+    # A dirty node always has a dirty subtree, so the walk stops there.
+    def _invalidate(self, name):
+        ret = []
+        stack = [name]
+        while len(stack) > 0:
+            n = stack.pop()
+            node = self.nodes.get(n)
+            if node is not None:
+                if node['dirty'] and n != name:
+                    continue
+                if not node['dirty']:
+                    ret.append(n)
+                node['dirty'] = True
+            stack += self.children.get(n, [])
+        return ret
+
+    def get(self, name):
+        with self.lock:
+            node = self.nodes[name]
+            if node['dirty']:
+                node['world'] = self._compute(node)
+                node['dirty'] = False
+            return node['world']
+
+    def _compute(self, node):
+        if node['pose'] is not None:
+            world = node['pose'].copy()
+        elif node['relative'] is None:
+            return None
+        else:
+            rel = node['relative']
+            world = rel.copy()
+            host = node['host']
+            base = None
+            if host is not None and host in self.nodes:
+                base = self.get(host)
+            if base is not None and 'x' in rel:
+                if self._robot_borne(host):
+                    world['x'] = base['x']
+                    world['y'] = base['y']
+                else:
+                    world['x'] = base['x'] + rel['x']
+                    world['y'] = base['y'] + rel['y']
+                if rel['theta'] is not None:
+                    base_th = base['theta'] if base['theta'] is not None else 0
+                    world['theta'] = base_th + rel['theta']
+
+        if node['kind'] == 'pan_tilt' and world.get('theta') is not None:
+            world['theta'] += node['pan']
+        return world
+
+    # Whether host is a robot or is carried by one
+    def _robot_borne(self, host):
+        while host is not None and host in self.nodes:
+            if self.nodes[host]['kind'] == 'robot':
+                return True
+            host = self.nodes[host]['host']
+        return False
+
+    def __getitem__(self, name):
+        world = self.get(name)
+        if world is None:
+            raise KeyError(name)
+        return world
+
+    def __contains__(self, name):
+        with self.lock:
+            return name in self.nodes and self.get(name) is not None
+
+    def __iter__(self):
+        return iter(list(self.nodes))
+
+    def __len__(self):
+        return len(self.nodes)
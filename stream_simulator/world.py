@@ -10,6 +10,7 @@ import math
 
 from commlib.logger import Logger
 from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.mapping import DistanceField, MapCache, rasterize
 
 class World:
     def __init__(self):
@@ -78,7 +79,9 @@ class World:
         self.width = 0
         self.height = 0
         self.map = None
-        self.obstacles = []
+        self.distance_field = None
+        self.resolution = 1
+        self.obstacles = {}
         if 'map' in self.configuration:
             if 'resolution' in self.configuration['map']:
                 self.resolution = self.configuration['map']['resolution']
@@ -86,43 +89,44 @@ class World:
                 self.resolution = 1
             self.width = int(self.configuration['map']['width'] / self.resolution)
             self.height = int(self.configuration['map']['height'] / self.resolution)
-            self.map = numpy.zeros((self.width, self.height))
-            
-
-            # Add obstacles information in map
-            self.obstacles = self.configuration['map']['obstacles']['lines']
-            for obst in self.obstacles:
-                x1 = max(min(int(obst['x1'] / self.resolution), self.width - 1), 0)
-                x2 = max(min(int(obst['x2'] / self.resolution), self.width - 1), 0)
-                y1 = max(min(int(obst['y1'] / self.resolution), self.height - 1), 0)
-                y2 = max(min(int(obst['y2'] / self.resolution), self.height - 1), 0)
-
-                if x1 == x2:
-                    if y1 > y2:
-                        tmp = y2
-                        y2 = y1
-                        y1 = tmp
-                    for i in range(y1, y2 + 1):
-                        self.map[x1, i] = 1
-                elif y1 == y2:
-                    if x1 > x2:
-                        tmp = x2
-                        x2 = x1
-                        x1 = tmp
-                    for i in range(x1, x2 + 1):
-                        self.map[i, y1] = 1
-                else: # we have a tilted line
-                    f_ang = math.atan2(y2 - y1, x2 - x1)
-                    dist = math.sqrt(
-                        math.pow(x2 - x1, 2) + math.pow(y2 - y1, 2)
-                    )
-                    dist = int(dist) + 1
-                    d = 0
-                    while d <= dist:
-                        tmpx = int(x1 + d * math.cos(f_ang))
-                        tmpy = int(y1 + d * math.sin(f_ang))
-                        d += 1
-                        self.map[tmpx, tmpy] = 1
+
+            # Occupancy grid, 1 byte per cell
+            self.obstacles = self.configuration['map'].get('obstacles', {})
+            self.map = None
+            # The map cache is opt-in: map.cache_dir, or map.cache: true
+            # for the default directory
+            cache_dir = self.configuration['map'].get('cache_dir', None)
+            if cache_dir is not None or \
+                    self.configuration['map'].get('cache', False) is True:
+                try:
+                    self.load_cached_map(cache_dir)
+                except Exception as e:
+                    self.logger.warning(f"Map cache not usable: {str(e)}")
+
+            if self.map is None:
+                self.map = self.build_map()
+                # Distances to obstacles, built once a range sensor needs it
+                self.distance_field = DistanceField(self.map)
+
+    def build_map(self):
+        return rasterize(
+            self.width,
+            self.height,
+            self.obstacles,
+            self.resolution
+        )
+
+    # The compiled map and its distance field are shared read-only through
+    # memmapped files among the simulators using the same map
+    def load_cached_map(self, directory = None):
+        cache = MapCache(directory)
+        key = cache.key(self.configuration['map'])
+        grid = cache.get(key, "map", self.build_map)
+        self.map = grid
+        self.distance_field = DistanceField(grid,
+            loader = lambda: cache.get(key, "distance_field",
+                lambda: DistanceField(grid).compute()))
+        self.logger.info(f"Map loaded from cache {cache.path(key, 'map')}")
 
     def register_controller(self, c):
         if c.name in self.controllers:
@@ -137,7 +141,9 @@ class World:
             "logger": None,
             'tf_declare': self.tf_declare_rpc,
             'env': self.env_properties,
-            "map": self.map
+            "map": self.map,
+            "distance_field": self.distance_field,
+            "resolution": self.resolution
         }
         str_sim = __import__("stream_simulator")
         str_contro = getattr(str_sim, "controllers")
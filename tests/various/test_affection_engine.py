@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import unittest
+
+from stream_simulator.transformations.affections import AffectionEngine
+
+class TestAffectionEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = AffectionEngine()
+        self.engine.update("fire_2", "actor.fire", 10, 0, 5, order = 2)
+        self.engine.update("fire_1", "actor.fire", 0, 0, 3, order = 1)
+        self.engine.update("human_1", "actor.human", 0, 10, 0, order = 3)
+
+    def test_ranged(self):
+        res = self.engine.ranged([[1, 0], [8, 0], [50, 50]], "actor.fire")
+        self.assertEqual(res[0], [("fire_1", 1.0)])
+        self.assertEqual(res[1], [("fire_2", 2.0)])
+        self.assertEqual(res[2], [])
+
+    def test_declaration_order(self):
+        self.engine.update("fire_1", "actor.fire", 9, 0, 3, order = 1)
+        res = self.engine.ranged([[9.5, 0]], "actor.fire")[0]
+        self.assertEqual([n for n, _ in res], ["fire_1", "fire_2"])
+
+    def test_within(self):
+        res = self.engine.within([[0, 0], [0, 0]], [15, 5], "actor.human")
+        self.assertEqual(res, [[("human_1", 10.0)], []])
+
+    def test_arced(self):
+        # Looking up, with a 90 degrees field of view
+        res = self.engine.arced([[0, 0, math.pi / 2]], [20], [90], "actor.human")
+        self.assertEqual(len(res[0]), 1)
+        name, d, min_a, max_a, ang = res[0][0]
+        self.assertEqual(name, "human_1")
+        self.assertAlmostEqual(d, 10.0)
+        self.assertAlmostEqual(min_a, math.pi / 4)
+        self.assertAlmostEqual(max_a, 3 * math.pi / 4)
+        self.assertAlmostEqual(ang, math.pi / 2)
+        # Looking down
+        res = self.engine.arced([[0, 0, -math.pi / 2]], [20], [90], "actor.human")
+        self.assertEqual(res, [[]])
+
+    def test_remove(self):
+        self.engine.remove("fire_1")
+        res = self.engine.ranged([[1, 0], [8, 0]], "actor.fire")
+        self.assertEqual(res, [[], [("fire_2", 2.0)]])
+
+if __name__ == "__main__":
+    unittest.main()
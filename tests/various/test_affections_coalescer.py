@@ -0,0 +1,111 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import unittest
+import threading
+
+from stream_simulator.connectivity import AffectionsCoalescer
+
+class BatchClient:
+    def __init__(self):
+        self.calls = []
+
+    def call(self, message):
+        self.calls.append(list(message['names']))
+        return {
+            "affections": {n: {"name": n} for n in message['names']}
+        }
+
+class TestAffectionsCoalescer(unittest.TestCase):
+    def test_concurrent_calls_share_a_round_trip(self):
+        client = BatchClient()
+        coalescer = AffectionsCoalescer(batch_client = client, window = 0.2)
+        results = {}
+
+        def ask(name):
+            results[name] = coalescer.call({'name': name})
+
+        threads = [
+            threading.Thread(target = ask, args = (f"sensor_{i}",))
+            for i in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(sorted(client.calls[0]), sorted(results))
+        for n in results:
+            self.assertEqual(results[n], {"name": n})
+
+    def test_sequential_calls(self):
+        client = BatchClient()
+        coalescer = AffectionsCoalescer(batch_client = client, window = 0)
+        self.assertEqual(coalescer.call({'name': 'a'}), {"name": "a"})
+        self.assertEqual(coalescer.call({'name': 'b'}), {"name": "b"})
+        self.assertEqual(client.calls, [['a'], ['b']])
+
+    def test_no_wait_without_a_round_in_flight(self):
+        client = BatchClient()
+        coalescer = AffectionsCoalescer(batch_client = client)
+        start = time.perf_counter()
+        for i in range(20):
+            coalescer.call({'name': 'a'})
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(len(client.calls), 20)
+
+    def test_calls_during_a_round_share_the_next(self):
+        client = BatchClient()
+        release = threading.Event()
+        first = client.call
+        def call(message):
+            if len(client.calls) == 0:
+                release.wait()
+            return first(message)
+        client.call = call
+        coalescer = AffectionsCoalescer(batch_client = client)
+
+        leader = threading.Thread(target = coalescer.call, args = ({'name': 'a'},))
+        leader.start()
+        while not coalescer.in_flight:
+            time.sleep(0.001)
+        results = {}
+        def ask(name):
+            results[name] = coalescer.call({'name': name})
+        threads = [
+            threading.Thread(target = ask, args = (f"sensor_{i}",))
+            for i in range(10)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads + [leader]:
+            t.join()
+
+        self.assertEqual(client.calls[0], ['a'])
+        self.assertEqual(len(client.calls), 2)
+        self.assertEqual(sorted(client.calls[1]), sorted(results))
+        for n in results:
+            self.assertEqual(results[n], {"name": n})
+
+    def test_concurrent_coroutines_share_a_round_trip(self):
+        client = BatchClient()
+        coalescer = AffectionsCoalescer(batch_client = client, window = 0.05)
+
+        async def ask_all():
+            return await asyncio.gather(*[
+                coalescer.call_async({'name': f"sensor_{i}"})
+                for i in range(10)
+            ])
+
+        results = asyncio.run(ask_all())
+        self.assertEqual(len(client.calls), 1)
+        for i in range(10):
+            self.assertEqual(results[i], {"name": f"sensor_{i}"})
+
+if __name__ == "__main__":
+    unittest.main()
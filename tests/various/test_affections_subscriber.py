@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+
+from stream_simulator.connectivity import CommlibFactory, AffectionsSubscriber
+from stream_simulator.connectivity.inproc import InprocBus
+
+class SubscribeClient:
+    # tf's subscribe_affections: the current affections and their delta
+    # seq. hooks run inside the given call, as deltas arriving meanwhile.
+    def __init__(self):
+        self.affections = {"fire_1": {"distance": 1}}
+        self.seq = 3
+        self.calls = 0
+        self.hooks = {}
+
+    def call(self, message):
+        self.calls += 1
+        if self.calls in self.hooks:
+            self.hooks[self.calls]()
+        return {
+            "topic": "test.sonar_1.affections",
+            "affections": dict(self.affections),
+            "seq": self.seq
+        }
+
+def delta(seq, updated, names):
+    return {"name": "sonar_1", "seq": seq, "updated": updated,
+        "removed": [], "names": names}
+
+class TestAffectionsSubscriber(unittest.TestCase):
+    def setUp(self):
+        self.inproc_brokers = CommlibFactory.inproc_brokers
+        CommlibFactory.inproc_brokers = ["redis", "amqp"]
+        InprocBus.reset()
+        self.tf = SubscribeClient()
+        self.sub = AffectionsSubscriber(subscribe_client = self.tf)
+
+    def tearDown(self):
+        self.sub.stop()
+        InprocBus.reset()
+        CommlibFactory.inproc_brokers = self.inproc_brokers
+
+    def test_delta_during_resync(self):
+        # Published after tf answered the resync, delivered before it is
+        # applied
+        self.tf.hooks[2] = lambda: self.sub.delta_callback(
+            delta(4, {"human_1": {"distance": 2}}, ["fire_1", "human_1"]), None
+        )
+        self.assertEqual(self.sub.call({"name": "sonar_1"}), {
+            "fire_1": {"distance": 1}, "human_1": {"distance": 2}
+        })
+        self.sub.delta_callback(delta(5, {}, ["human_1"]), None)
+        self.assertEqual(self.sub.call({"name": "sonar_1"}),
+            {"human_1": {"distance": 2}})
+        self.assertEqual(self.tf.calls, 2)
+
+    def test_resync_on_missed_delta(self):
+        self.sub.call({"name": "sonar_1"})
+        self.tf.affections = {"human_1": {"distance": 3}}
+        self.tf.seq = 5
+        # Delta 4 was lost
+        self.sub.delta_callback(delta(5, {}, ["human_1"]), None)
+        self.assertEqual(self.tf.calls, 3)
+        self.assertEqual(self.sub.call({"name": "sonar_1"}),
+            {"human_1": {"distance": 3}})
+        # Deltas already in the resynced affections are skipped
+        self.sub.delta_callback(delta(5, {}, []), None)
+        self.assertEqual(self.sub.call({"name": "sonar_1"}),
+            {"human_1": {"distance": 3}})
+
+    def test_resync_on_missing_entry(self):
+        self.sub.call({"name": "sonar_1"})
+        self.tf.affections = {"human_1": {"distance": 3}}
+        self.tf.seq = 4
+        # human_1 is neither updated nor known
+        self.sub.delta_callback(delta(4, {}, ["human_1"]), None)
+        self.assertEqual(self.tf.calls, 3)
+        self.assertEqual(self.sub.call({"name": "sonar_1"}),
+            {"human_1": {"distance": 3}})
+
+    def test_pushed_effector_state(self):
+        from stream_simulator.transformations import TfController
+        tf = TfController(base = "test", workers = 1)
+        declare = CommlibFactory.getRPCClient(rpc_name = "test.tf.declare")
+        for name, subclass, category, x in [
+                ("thermostat_1", "thermostat", "actuator", 0),
+                ("temperature_1", "temperature", "sensor", 5)]:
+            declare.call({
+                'type': "env",
+                'subtype': {'category': category, 'class': "env",
+                    'subclass': [subclass]},
+                'name': name,
+                'pose': {'x': x, 'y': 0, 'theta': None},
+                'base_topic': f"test.{name}",
+                'range': 20,
+                'properties': {'temperature': 25},
+                'id': name
+            })
+        # The simulator's device listings, asked by the tf setup
+        for rpc_name, reply in [
+                ("test.get_device_groups", {'robots': [], 'world': "world"}),
+                ("world.nodes_detector.get_connected_devices", {'devices': []})]:
+            CommlibFactory.getRPCService(
+                rpc_name = rpc_name,
+                callback = lambda message, meta, reply = reply: reply
+            ).run()
+        CommlibFactory.getRPCClient(rpc_name = "test.tf.setup").call({})
+        sub = AffectionsSubscriber(subscribe_client = CommlibFactory.getRPCClient(
+            rpc_name = "test.tf.subscribe_affections"
+        ))
+        try:
+            temperature = lambda: sub.call({"name": "temperature_1"}) \
+                ["thermostat_1"]["info"]["temperature"]
+            self.assertEqual(temperature(), 25)
+
+            # The published state replaces the cached one, without asking
+            # the thermostat (which serves no get here), and is pushed
+            CommlibFactory.getPublisher(topic = "test.thermostat_1.data") \
+                .publish({"temperature": 30})
+            deadline = time.time() + 2
+            while temperature() != 30 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(temperature(), 30)
+            self.assertEqual(tf.effector_state("thermostat_1", "temperature"),
+                {"temperature": 30})
+        finally:
+            sub.stop()
+            tf.stop()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import unittest
+
+from stream_simulator.base_classes.async_tick_scheduler import AsyncTickScheduler
+
+class TestAsyncTickScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = AsyncTickScheduler(workers = 2)
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_coroutine_and_plain_jobs(self):
+        ticks = {'coroutine': 0, 'plain': 0}
+        async def sample():
+            await asyncio.sleep(0.001)
+            ticks['coroutine'] += 1
+        def blocking():
+            time.sleep(0.001)
+            ticks['plain'] += 1
+        self.scheduler.add(sample, 50)
+        self.scheduler.add(blocking, 10)
+        time.sleep(0.55)
+        self.assertTrue(25 <= ticks['coroutine'] <= 28)
+        self.assertTrue(5 <= ticks['plain'] <= 6)
+
+    def test_many_coroutines_share_the_loop(self):
+        # Coroutines waiting on I/O do not hold a thread each
+        ticks = []
+        async def sample():
+            await asyncio.sleep(0.05)
+            ticks.append(1)
+        for i in range(100):
+            self.scheduler.add(sample, 10)
+        time.sleep(0.5)
+        self.assertTrue(len(ticks) >= 300)
+
+    def test_inactive_job_stops(self):
+        ticks = []
+        state = {'active': True}
+        async def sample():
+            ticks.append(1)
+        self.scheduler.add(sample, 100, active = lambda: state['active'])
+        time.sleep(0.1)
+        state['active'] = False
+        time.sleep(0.05)
+        n = len(ticks)
+        time.sleep(0.1)
+        self.assertEqual(len(ticks), n)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from stream_simulator.benchmarks import synthetic_map, synthetic_declarations, \
+    measure
+from stream_simulator.mapping import rasterize
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_map_is_reproducible(self):
+        a = synthetic_map(200, 100, obstacles = 30, seed = 1)
+        b = synthetic_map(200, 100, obstacles = 30, seed = 1)
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, synthetic_map(200, 100, obstacles = 30, seed = 2))
+
+        grid = rasterize(a['width'], a['height'], a['obstacles'])
+        self.assertEqual(grid.shape, (200, 100))
+        # Walled in
+        self.assertTrue(grid[0, :].all() and grid[:, 0].all())
+        self.assertTrue(grid[-1, :].all() and grid[:, -1].all())
+
+    def test_synthetic_declarations(self):
+        declarations = synthetic_declarations(100, 100, actors = 40, sensors = 9)
+        names = [d['name'] for d in declarations]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(
+            len([d for d in declarations if d['type'] == "actor"]), 40)
+        sensors = [d for d in declarations
+            if d['type'] == "env" and d['subtype']['category'] == "sensor"]
+        self.assertEqual(len(sensors), 9)
+        for d in declarations:
+            self.assertTrue(0 <= d['pose']['x'] <= 100)
+            self.assertTrue(0 <= d['pose']['y'] <= 100)
+
+    def test_measure(self):
+        calls = []
+        times = measure(lambda: calls.append(1), number = 10, repeat = 3,
+            warmup = 2)
+        self.assertEqual(len(times), 3)
+        self.assertEqual(len(calls), 32)
+        self.assertTrue(all(t >= 0 for t in times))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.connectivity.binary_endpoints import pack, unpack
+
+class TestBinaryTopics(unittest.TestCase):
+    def tearDown(self):
+        CommlibFactory.binary_topics = []
+
+    def test_topic_selection(self):
+        CommlibFactory.binary_topics = ["*.camera.*.data"]
+        self.assertTrue(CommlibFactory.isBinary("robot_1.sensor.visual.camera.front.data"))
+        self.assertFalse(CommlibFactory.isBinary("robot_1.sensor.distance.sonar.front.data"))
+
+    def test_bytes_travel_raw(self):
+        frame = bytes(range(256)) * 3600
+        message = {
+            "data": {"width": 640, "height": 480, "image": frame},
+            "timestamp": 1.5
+        }
+        payload = pack(message)
+        # No base64 inflation
+        self.assertLess(len(payload), len(frame) + 100)
+        self.assertEqual(unpack(payload), message)
+
+if __name__ == "__main__":
+    unittest.main()
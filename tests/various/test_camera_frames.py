@@ -0,0 +1,41 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from stream_simulator.functionality.camera_frames import FrameCache, camera_scene, \
+    render_scene
+from stream_simulator.functionality.image_encoder import encode_image
+
+class TestFrameCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = FrameCache(size = 2)
+        self.red = camera_scene({'type': 'color', 'info': {'r': 255, 'g': 0, 'b': 0}})
+        self.green = camera_scene({'type': 'color', 'info': {'r': 0, 'g': 255, 'b': 0}})
+        self.blue = camera_scene({'type': 'color', 'info': {'r': 0, 'g': 0, 'b': 255}})
+
+    def test_frame(self):
+        data = self.cache.frame(self.red, 8, 6)
+        self.assertEqual(data, encode_image(render_scene(self.red, 8, 6)))
+        self.assertEqual(self.cache.frame(self.red, 8, 6), data)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_keyed_on_encoding(self):
+        self.cache.frame(self.red, 8, 6)
+        data, format = self.cache.frame(self.red, 8, 6, binary = True, raw_format = "BMP")
+        self.assertEqual(format, "BMP")
+        self.assertEqual(len(data), 8 * 6 * 3)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_eviction(self):
+        self.cache.frame(self.red, 8, 6)
+        self.cache.frame(self.green, 8, 6)
+        self.cache.frame(self.red, 8, 6)
+        self.cache.frame(self.blue, 8, 6)
+        # green was the least recently used
+        self.cache.frame(self.red, 8, 6)
+        self.cache.frame(self.green, 8, 6)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 4))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import unittest
+
+import numpy
+
+from stream_simulator.mapping import DistanceField, Footprint, swept_collision
+
+class TestSweptCollision(unittest.TestCase):
+    def setUp(self):
+        self.map = numpy.zeros((100, 100), dtype = numpy.uint8)
+        self.map[50, 20:80] = 1
+        self.field = DistanceField(self.map).build()
+        self.point = Footprint()
+
+    def test_thin_wall(self):
+        # A single step crossing the one cell wall
+        for field in [None, self.field]:
+            self.assertTrue(swept_collision(
+                self.map, self.point, 40.3, 30.7, 0, 60.9, 41.2, 0, field))
+            self.assertFalse(swept_collision(
+                self.map, self.point, 40.3, 10.7, 0, 60.9, 15.2, 0, field))
+            # Moving away from the wall
+            self.assertFalse(swept_collision(
+                self.map, self.point, 50.5, 30, 0, 40, 30, 0, field))
+
+    def test_point_field_matches_grid(self):
+        random.seed(0)
+        for _ in range(500):
+            x0, y0, x1, y1 = [random.uniform(0, 99.9) for _ in range(4)]
+            self.assertEqual(
+                swept_collision(self.map, self.point, x0, y0, 0, x1, y1, 0),
+                swept_collision(
+                    self.map, self.point, x0, y0, 0, x1, y1, 0, self.field)
+            )
+
+    def test_footprints(self):
+        circle = Footprint({'radius': 1.5}, 0.5)
+        for field in [None, self.field]:
+            self.assertTrue(swept_collision(
+                self.map, circle, 40, 30, 0, 47.5, 30, 0, field))
+            self.assertFalse(swept_collision(
+                self.map, circle, 40, 30, 0, 45, 30, 0, field))
+
+        # 10 x 2 cells, turning towards the wall
+        rectangle = Footprint({'length': 5, 'width': 1}, 0.5)
+        self.assertFalse(swept_collision(
+            self.map, rectangle, 46, 50, math.pi / 2, 46, 50, math.pi / 2))
+        self.assertTrue(swept_collision(
+            self.map, rectangle, 46, 50, math.pi / 2, 46, 50, 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import unittest
+
+import numpy
+
+from stream_simulator.mapping import DistanceField
+
+class TestDistanceField(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.map = numpy.zeros((120, 80))
+        self.map[60, 10:70] = 1
+        self.map[10:50, 40] = 1
+        self.field = DistanceField(self.map)
+
+    def march(self, x, y, th, limit):
+        d = 1
+        tmpx = x
+        tmpy = y
+        while True:
+            i = int(tmpx)
+            j = int(tmpy)
+            if i < 0 or j < 0 or i >= self.map.shape[0] or j >= self.map.shape[1]:
+                return d
+            if self.map[i, j] != 0 or d >= limit:
+                return d
+            d += 1
+            tmpx = x + d * math.cos(th)
+            tmpy = y + d * math.sin(th)
+
+    def test_distances(self):
+        self.assertEqual(self.field.distance(60, 20), 0)
+        self.assertEqual(self.field.distance(55, 20), 5)
+        # Outside the map counts as an obstacle
+        self.assertEqual(self.field.distance(-5, 20), 0)
+        self.assertEqual(self.field.distance(0, 20), 1)
+
+    def test_built_on_first_use(self):
+        field = DistanceField(self.map)
+        self.assertFalse(field.built())
+        field.distance(10, 10)
+        self.assertTrue(field.built())
+        self.assertEqual(field.squared.dtype, numpy.uint16)
+
+    def test_matches_brute_force(self):
+        obstacles = numpy.argwhere(self.map != 0)
+        for _ in range(200):
+            x = random.randrange(0, 120)
+            y = random.randrange(0, 80)
+            d = min(
+                numpy.hypot(obstacles[:, 0] - x, obstacles[:, 1] - y).min(),
+                x + 1, y + 1, 120 - x, 80 - y,
+                self.field.max_distance
+            )
+            self.assertAlmostEqual(self.field.distance(x, y), d)
+
+    def test_trace_matches_marching(self):
+        for _ in range(2000):
+            x = random.uniform(0, 120)
+            y = random.uniform(0, 80)
+            th = random.uniform(-math.pi, math.pi)
+            limit = random.choice([1, 2.5, 30, 200])
+            self.assertEqual(
+                self.field.trace(x, y, th, limit),
+                self.march(x, y, th, limit)
+            )
+
+if __name__ == "__main__":
+    unittest.main()
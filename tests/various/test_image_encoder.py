@@ -0,0 +1,42 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import base64
+import unittest
+
+import numpy
+
+from stream_simulator.functionality.image_encoder import encode_image
+
+class TestImageEncoder(unittest.TestCase):
+    def setUp(self):
+        self.image = numpy.random.randint(0, 255, (48, 64, 3), dtype = numpy.uint8)
+
+    def test_raw_matches_per_pixel_encoding(self):
+        data, format = encode_image(self.image)
+        per_pixel = [int(d) for row in self.image for c in row for d in c]
+        self.assertEqual(data, base64.b64encode(bytes(per_pixel)).decode("ascii"))
+        self.assertEqual(format, "RGB")
+
+    def test_raw_binary(self):
+        data, format = encode_image(self.image, binary = True, raw_format = "BMP")
+        self.assertEqual(data, self.image.tobytes())
+        self.assertEqual(format, "BMP")
+
+    def test_non_contiguous(self):
+        view = self.image[:, ::2]
+        data, format = encode_image(view, binary = True)
+        self.assertEqual(data, view.tobytes())
+
+    def test_compressed(self):
+        try:
+            import cv2
+        except ImportError:
+            self.skipTest("cv2 not installed")
+        data, format = encode_image(self.image, format = "png", binary = True)
+        self.assertEqual(format, "PNG")
+        decoded = cv2.imdecode(numpy.frombuffer(data, numpy.uint8), cv2.IMREAD_COLOR)
+        self.assertTrue((cv2.cvtColor(decoded, cv2.COLOR_BGR2RGB) == self.image).all())
+
+if __name__ == "__main__":
+    unittest.main()
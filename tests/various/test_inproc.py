@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import queue
+import unittest
+import threading
+
+from stream_simulator.connectivity import inproc, CommlibFactory
+
+class TestInproc(unittest.TestCase):
+    def setUp(self):
+        inproc.InprocBus.reset()
+
+    def test_pub_sub(self):
+        received = queue.Queue()
+        sub = inproc.Subscriber(
+            topic = "robot_1.pose",
+            on_message = lambda message, meta: received.put(message)
+        )
+        sub.run()
+        pub = inproc.Publisher(topic = "robot_1.pose")
+        message = {"x": 1, "y": 2}
+        pub.publish(message)
+        # A copy, as a broker would deliver it
+        got = received.get(timeout = 1)
+        self.assertEqual(got, message)
+        self.assertIsNot(got, message)
+
+        sub.stop()
+        pub.publish(message)
+        with self.assertRaises(queue.Empty):
+            received.get(timeout = 0.1)
+
+    def test_rpc(self):
+        service = inproc.RPCService(
+            rpc_name = "tf.get_affections",
+            on_request = lambda message, meta: {"name": message["name"]}
+        )
+        service.run()
+        client = inproc.RPCClient(rpc_name = "tf.get_affections")
+        self.assertEqual(client.call({"name": "sonar"}), {"name": "sonar"})
+
+    def test_rpc_waits_for_service(self):
+        client = inproc.RPCClient(rpc_name = "late.rpc")
+        service = inproc.RPCService(
+            rpc_name = "late.rpc",
+            on_request = lambda message, meta: {"ok": True}
+        )
+        threading.Timer(0.1, service.run).start()
+        self.assertEqual(client.call({}, timeout = 1), {"ok": True})
+        with self.assertRaises(TimeoutError):
+            inproc.RPCClient(rpc_name = "missing.rpc").call({}, timeout = 0.1)
+
+    def test_receivers_get_their_own_copy(self):
+        from stream_simulator.transformations import TfController
+        inproc_brokers = CommlibFactory.inproc_brokers
+        CommlibFactory.inproc_brokers = ["redis", "amqp"]
+        tf = TfController(base = "test", workers = 1)
+        try:
+            pose = {'x': 1, 'y': 2, 'theta': 90}
+            CommlibFactory.getRPCClient(rpc_name = "test.tf.declare").call({
+                'type': "env",
+                'subtype': {'category': "sensor", 'class': "env",
+                    'subclass': ["temperature"]},
+                'name': "temperature_1",
+                'pose': pose,
+                'base_topic': "test.temperature_1",
+                'range': 10,
+                'properties': {},
+                'id': "temperature_1"
+            })
+            # tf turns the declared theta to radians on its own copy
+            self.assertEqual(pose, {'x': 1, 'y': 2, 'theta': 90})
+        finally:
+            tf.stop()
+            CommlibFactory.inproc_brokers = inproc_brokers
+
+if __name__ == "__main__":
+    unittest.main()
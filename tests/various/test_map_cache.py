@@ -0,0 +1,59 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from stream_simulator.mapping import MapCache
+
+class TestMapCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MapCache(self.directory)
+        self.builds = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self):
+        self.builds += 1
+        grid = numpy.zeros((20, 10), dtype = numpy.uint8)
+        grid[5, :] = 1
+        return grid
+
+    def test_built_once(self):
+        conf = {'width': 20, 'height': 10, 'obstacles': {'lines': []}}
+        key = self.cache.key(conf)
+        first = self.cache.get(key, "map", self.build)
+        second = self.cache.get(key, "map", self.build)
+        self.assertEqual(self.builds, 1)
+        self.assertIsInstance(second, numpy.memmap)
+        self.assertFalse(second.flags.writeable)
+        numpy.testing.assert_array_equal(first, self.build())
+
+    def test_keys(self):
+        conf = {'width': 20, 'height': 10, 'obstacles': {'lines': []}}
+        same = {'obstacles': {'lines': []}, 'height': 10, 'width': 20,
+            'cache': True, 'cache_dir': self.directory}
+        other = {'width': 20, 'height': 11, 'obstacles': {'lines': []}}
+        self.assertEqual(self.cache.key(conf), self.cache.key(same))
+        self.assertNotEqual(self.cache.key(conf), self.cache.key(other))
+
+    def test_default_directory(self):
+        saved = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = self.directory
+        try:
+            self.assertEqual(MapCache().directory,
+                os.path.join(self.directory, "streamsim", "maps"))
+        finally:
+            if saved is None:
+                del os.environ["XDG_CACHE_HOME"]
+            else:
+                os.environ["XDG_CACHE_HOME"] = saved
+
+if __name__ == "__main__":
+    unittest.main()
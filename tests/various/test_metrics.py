@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+
+from stream_simulator.connectivity.metrics import Metrics, EndpointMetrics, \
+    payload_size
+
+class Publisher:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message):
+        self.messages.append(message)
+
+    def store(self, key, record):
+        pass
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_quantiles(self):
+        m = EndpointMetrics()
+        for i in range(90):
+            m.observe(0.0002)
+        for i in range(10):
+            m.observe(0.2)
+        self.assertLess(m.quantile(0.5), 0.0005)
+        self.assertGreater(m.quantile(0.95), 0.1)
+        self.assertLessEqual(m.quantile(0.99), 0.25)
+
+    def test_publisher(self):
+        pub = Publisher()
+        timed = self.metrics.publisher("a.data", pub)
+        timed.publish({"value": "abcd"})
+        self.assertEqual(pub.messages, [{"value": "abcd"}])
+        # The rest of the endpoint is untouched
+        self.assertTrue(hasattr(timed, "store"))
+        report = self.metrics.report()["publisher"]["a.data"]
+        self.assertEqual(report["calls"], 1)
+        self.assertEqual(report["bytes"], payload_size({"value": "abcd"}))
+
+    def test_callback_errors(self):
+        def callback(message, meta):
+            raise ValueError("bad")
+        timed = self.metrics.callback("rpc_service", "a.get", callback)
+        with self.assertRaises(ValueError):
+            timed({}, {})
+        report = self.metrics.report()["rpc_service"]["a.get"]
+        self.assertEqual((report["calls"], report["errors"]), (1, 1))
+
+    def test_prometheus_dump(self):
+        self.metrics.callback("subscriber", "a.pose", lambda m, meta: None)({}, {})
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "streamsim.prom")
+            self.metrics.dump(path)
+            with open(path) as f:
+                text = f.read()
+        self.assertIn(
+            'streamsim_endpoint_calls_total{kind="subscriber",topic="a.pose"} 1',
+            text
+        )
+        self.assertIn(
+            'streamsim_endpoint_latency_seconds_bucket{kind="subscriber",topic="a.pose",le="+Inf"} 1',
+            text
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import unittest
+
+import numpy
+
+from stream_simulator.mapping import rasterize
+
+class TestRasterizer(unittest.TestCase):
+    def loop_lines(self, width, height, lines, resolution):
+        grid = numpy.zeros((width, height))
+        for obst in lines:
+            x1 = max(min(int(obst['x1'] / resolution), width - 1), 0)
+            x2 = max(min(int(obst['x2'] / resolution), width - 1), 0)
+            y1 = max(min(int(obst['y1'] / resolution), height - 1), 0)
+            y2 = max(min(int(obst['y2'] / resolution), height - 1), 0)
+            if x1 == x2:
+                for i in range(min(y1, y2), max(y1, y2) + 1):
+                    grid[x1, i] = 1
+            elif y1 == y2:
+                for i in range(min(x1, x2), max(x1, x2) + 1):
+                    grid[i, y1] = 1
+            else:
+                f_ang = math.atan2(y2 - y1, x2 - x1)
+                dist = int(math.hypot(x2 - x1, y2 - y1)) + 1
+                for d in range(dist + 1):
+                    tmpx = min(int(x1 + d * math.cos(f_ang)), width - 1)
+                    tmpy = min(int(y1 + d * math.sin(f_ang)), height - 1)
+                    grid[tmpx, tmpy] = 1
+        return grid
+
+    def test_lines_match_loops(self):
+        random.seed(0)
+        lines = []
+        for _ in range(300):
+            lines.append({
+                'x1': random.uniform(-10, 110), 'y1': random.uniform(-10, 90),
+                'x2': random.uniform(-10, 110), 'y2': random.uniform(-10, 90)
+            })
+        lines.append({'x1': 10, 'y1': 5, 'x2': 10, 'y2': 50})
+        lines.append({'x1': 70, 'y1': 30, 'x2': 20, 'y2': 30})
+        grid = rasterize(200, 160, {'lines': lines}, 0.5)
+        self.assertEqual(grid.dtype, numpy.uint8)
+        numpy.testing.assert_array_equal(
+            grid, self.loop_lines(200, 160, lines, 0.5))
+
+    def test_shapes(self):
+        grid = rasterize(100, 100, {
+            'rectangles': [{'x': 10, 'y': 10, 'width': 5, 'height': -3}],
+            'circles': [{'x': 50, 'y': 50, 'radius': 5}],
+            'polygons': [{'points': [[70, 70], [90, 70], [80, 90]]}]
+        })
+        self.assertEqual(grid[10:16, 7:11].sum(), 24)
+        self.assertEqual(grid[:, 12].sum(), 0)
+        self.assertEqual(grid[50, 50], 1)
+        self.assertEqual(grid[54, 50], 1)
+        self.assertEqual(grid[56, 50], 0)
+        self.assertEqual(grid[80, 80], 1)
+        self.assertEqual(grid[70, 80], 0)
+        # The outline is kept
+        self.assertEqual(grid[90, 70], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import unittest
+
+import numpy
+
+from stream_simulator.mapping import DistanceField, Raycaster
+
+class TestRaycaster(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.map = numpy.zeros((120, 80))
+        self.map[60, 10:70] = 1
+        self.map[10:50, 40] = 1
+        self.field = DistanceField(self.map)
+        self.resolution = 0.5
+        self.sensors = {
+            "sonar_front": (0, 20),
+            "sonar_left": (90, 20),
+            "ir_back": (180, 3),
+            "tof_right": (-90, 60)
+        }
+        self.caster = Raycaster(self.field, self.resolution)
+        for n in self.sensors:
+            self.caster.register(n, *self.sensors[n])
+
+    def test_before_pose(self):
+        self.assertIsNone(self.caster.get("sonar_front"))
+
+    def test_matches_trace(self):
+        for _ in range(500):
+            pose = {
+                'x': random.uniform(-5, 65),
+                'y': random.uniform(-5, 45),
+                'theta': random.uniform(-math.pi, math.pi)
+            }
+            ranges = self.caster.update(pose)
+            for n, (orientation, max_range) in self.sensors.items():
+                d = self.field.trace(
+                    pose['x'] / self.resolution,
+                    pose['y'] / self.resolution,
+                    pose['theta'] + orientation / 180.0 * math.pi,
+                    max_range / self.resolution
+                )
+                self.assertEqual(ranges[n], d * self.resolution)
+                self.assertEqual(self.caster.get(n), ranges[n])
+
+if __name__ == "__main__":
+    unittest.main()
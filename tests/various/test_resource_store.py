@@ -0,0 +1,44 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import wave
+import base64
+import tempfile
+import unittest
+
+from stream_simulator.functionality.resources import ResourceStore
+
+class TestResourceStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.frames = bytes(range(256)) * 40
+        with wave.open(os.path.join(self.dir.name, "tone.wav"), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(self.frames)
+        self.store = ResourceStore(root = self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_wav(self):
+        self.assertEqual(self.store.wav("tone.wav"), self.frames)
+        self.assertEqual(
+            self.store.wav_base64("tone.wav"),
+            base64.b64encode(self.frames).decode("ascii")
+        )
+
+    def test_loaded_once(self):
+        self.store.preload(["tone.wav"])
+        os.remove(os.path.join(self.dir.name, "tone.wav"))
+        self.assertIs(self.store.wav("tone.wav"), self.store.wav("tone.wav"))
+        self.assertEqual(self.store.wav("tone.wav"), self.frames)
+
+    def test_missing(self):
+        with self.assertRaises(OSError):
+            self.store.wav("missing.wav")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import unittest
+
+from stream_simulator.connectivity import CommlibFactory
+
+# Needs a running Redis, as the other redis tests
+class TestRPCDispatcher(unittest.TestCase):
+    def setUp(self):
+        CommlibFactory.multiplex_rpcs = True
+
+    def tearDown(self):
+        CommlibFactory.multiplex_rpcs = False
+
+    def test_many_services_one_dispatcher(self):
+        services = []
+        for i in range(20):
+            s = CommlibFactory.getRPCService(
+                broker = "redis",
+                rpc_name = f"test.rpc_dispatcher.{i}",
+                callback = lambda message, meta, i = i: {"i": i, **message}
+            )
+            s.run()
+            services.append(s)
+        time.sleep(0.1)
+
+        for i in [0, 7, 19]:
+            client = CommlibFactory.getRPCClient(
+                broker = "redis",
+                rpc_name = f"test.rpc_dispatcher.{i}"
+            )
+            self.assertEqual(client.call({"data": "x"}), {"i": i, "data": "x"})
+
+        for s in services:
+            s.stop()
+        self.assertEqual(len(CommlibFactory.getRPCDispatcher().services), 0)
+
+    def test_async_client(self):
+        s = CommlibFactory.getRPCService(
+            broker = "redis",
+            rpc_name = "test.rpc_dispatcher.async",
+            callback = lambda message, meta: {"echo": message}
+        )
+        s.run()
+        time.sleep(0.1)
+
+        async def calls():
+            client = CommlibFactory.getAsyncRPCClient(
+                rpc_name = "test.rpc_dispatcher.async"
+            )
+            return await asyncio.gather(*[
+                client.call({"i": i}) for i in range(5)
+            ])
+
+        try:
+            res = asyncio.run(calls())
+        finally:
+            CommlibFactory.async_redis = None
+            s.stop()
+        self.assertEqual(res, [{"echo": {"i": i}} for i in range(5)])
+
+if __name__ == "__main__":
+    unittest.main()
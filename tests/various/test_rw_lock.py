@@ -0,0 +1,57 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import unittest
+
+from stream_simulator.transformations.rw_lock import RWLock
+
+class TestRWLock(unittest.TestCase):
+    def setUp(self):
+        self.lock = RWLock()
+
+    def test_parallel_readers(self):
+        inside = threading.Barrier(3, timeout = 2)
+        def reader():
+            with self.lock.read():
+                inside.wait()
+        threads = [threading.Thread(target = reader) for i in range(2)]
+        for t in threads:
+            t.start()
+        # All three readers hold the lock at once
+        with self.lock.read():
+            inside.wait()
+        for t in threads:
+            t.join()
+
+    def test_writer_excludes_readers(self):
+        events = []
+        def writer():
+            with self.lock.write():
+                events.append("write")
+        with self.lock.read():
+            t = threading.Thread(target = writer)
+            t.start()
+            time.sleep(0.1)
+            events.append("read")
+        t.join(2)
+        self.assertEqual(events, ["read", "write"])
+
+    def test_nested_read_with_waiting_writer(self):
+        done = threading.Event()
+        def writer():
+            with self.lock.write():
+                done.set()
+        with self.lock.read():
+            t = threading.Thread(target = writer)
+            t.start()
+            time.sleep(0.1)
+            # Waiting writers hold off new readers, not the nested ones
+            with self.lock.read():
+                self.assertFalse(done.is_set())
+        t.join(2)
+        self.assertTrue(done.is_set())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+import threading
+
+from stream_simulator.connectivity.sample_sink import SampleSink
+
+class SlowStore:
+    def __init__(self):
+        self.writes = []
+        self.lock = threading.Lock()
+
+    def lset(self, key, records):
+        time.sleep(0.05)
+        with self.lock:
+            self.writes.append((key, records[0]))
+
+class Stream:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message):
+        self.messages.append(message)
+
+class Pipeline:
+    def __init__(self):
+        self.commands = []
+        self.executed = 0
+
+    def publish(self, topic, payload):
+        self.commands.append(("publish", topic, payload))
+
+    def set(self, key, payload):
+        self.commands.append(("set", key, payload))
+
+    def execute(self):
+        self.executed += 1
+
+class BinaryStream:
+    # Binary publishers queue their commands on the given pipeline
+    def __init__(self, topic):
+        self.topic = topic
+
+    def publish(self, message, pipe = None):
+        pipe.publish(self.topic, message)
+
+    def store(self, key, record, pipe = None):
+        pipe.set(key, record)
+
+class TestSampleSink(unittest.TestCase):
+    def test_stores_are_coalesced(self):
+        store = SlowStore()
+        sink = SampleSink(derp_client = store)
+        stream = Stream()
+        for i in range(10):
+            sink.write(stream, "sonar", {"distance": i})
+        time.sleep(0.3)
+        # Every sample published, the newest one stored last
+        self.assertEqual([m["distance"] for m in stream.messages], list(range(10)))
+        self.assertLessEqual(len(store.writes), 2)
+        self.assertEqual(store.writes[-1], ("sonar", {"distance": 9}))
+
+    def test_batch(self):
+        store = SlowStore()
+        sink = SampleSink(derp_client = store, batch = True)
+        streams = [Stream() for i in range(3)]
+        for i in range(3):
+            sink.write(streams[i], f"sensor_{i}", {"value": i})
+            sink.write(streams[i], f"sensor_{i}", {"value": i + 10})
+        self.assertEqual(streams[0].messages, [])
+        sink.flush()
+        time.sleep(0.2)
+        for i in range(3):
+            self.assertEqual(len(streams[i].messages), 2)
+        self.assertEqual(sorted(store.writes, key = lambda w: w[0]), [
+            (f"sensor_{i}", {"value": i + 10}) for i in range(3)
+        ])
+
+    def test_batch_pipeline(self):
+        pipe = Pipeline()
+        sink = SampleSink(derp_client = SlowStore(), batch = True)
+        sink.pipeline = lambda: pipe
+        for i in range(3):
+            stream = BinaryStream(f"camera_{i}.data")
+            sink.write(stream, f"camera_{i}", {"frame": i})
+            sink.write(stream, f"camera_{i}", {"frame": i + 10})
+        sink.flush()
+        # One round trip, with every publish and the last sample stored
+        self.assertEqual(pipe.executed, 1)
+        self.assertEqual(
+            [c for c in pipe.commands if c[0] == "publish"],
+            [("publish", f"camera_{i}.data", {"frame": f}) \
+                for i in range(3) for f in [i, i + 10]]
+        )
+        self.assertEqual(
+            sorted(c for c in pipe.commands if c[0] == "set"),
+            [("set", f"camera_{i}", {"frame": i + 10}) for i in range(3)]
+        )
+        sink.flush()
+        self.assertEqual(pipe.executed, 1)
+
+    def test_stored_shape(self):
+        store = SlowStore()
+        sink = SampleSink(derp_client = store)
+        stream = Stream()
+        sink.write(stream, "lf", {"so_1": 1}, stored = {"data": {"so_1": 1}})
+        time.sleep(0.1)
+        self.assertEqual(stream.messages, [{"so_1": 1}])
+        self.assertEqual(store.writes, [("lf", {"data": {"so_1": 1}})])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+import threading
+
+from stream_simulator.base_classes.sim_clock import SimClock
+from stream_simulator.base_classes.tick_scheduler import TickScheduler
+
+class TestSimClock(unittest.TestCase):
+    def test_scaled(self):
+        clock = SimClock(mode = "scaled", scale = 20)
+        start = clock.time()
+        t = time.time()
+        clock.sleep(2)
+        self.assertLess(time.time() - t, 0.5)
+        self.assertGreaterEqual(clock.time() - start, 2)
+
+    def test_lockstep_sleep(self):
+        clock = SimClock(mode = "lockstep", start = 0)
+        done = threading.Event()
+        def sleeper():
+            clock.sleep(1)
+            done.set()
+        threading.Thread(target = sleeper, daemon = True).start()
+        clock.step(0.5)
+        self.assertFalse(done.wait(0.1))
+        clock.step(0.5)
+        self.assertTrue(done.wait(1))
+        self.assertEqual(clock.time(), 1)
+
+    def test_real_clock_cannot_step(self):
+        with self.assertRaises(RuntimeError):
+            SimClock().step(1)
+
+    def test_lockstep_scheduler(self):
+        clock = SimClock(mode = "lockstep", start = 0)
+        scheduler = TickScheduler(workers = 2, clock = clock)
+        scheduler.start()
+        stamps = []
+        scheduler.add(lambda: stamps.append(clock.time()), 10)
+        # No time passes without steps
+        time.sleep(0.1)
+        self.assertEqual(stamps, [])
+        for i in range(10):
+            clock.step(0.1)
+            self.assertTrue(scheduler.settle(timeout = 1))
+        scheduler.stop()
+        self.assertEqual(len(stamps), 10)
+        self.assertAlmostEqual(stamps[-1], 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from stream_simulator.transformations.spatial_index import SpatialGrid
+
+class TestSpatialGrid(unittest.TestCase):
+    def setUp(self):
+        self.grid = SpatialGrid(cell_size = 10)
+
+    def test_effector_range_covers_point(self):
+        self.grid.update("fire_1", 50, 50, 15, "actor.fire")
+        self.assertIn("fire_1", self.grid.query(62, 50, 0, "actor.fire"))
+        self.assertNotIn("fire_1", self.grid.query(90, 90, 0, "actor.fire"))
+
+    def test_query_radius(self):
+        self.grid.update("human_1", 100, 100, 0, "actor.human")
+        self.assertIn("human_1", self.grid.query(80, 100, 25, "actor.human"))
+        self.assertNotIn("human_1", self.grid.query(40, 100, 25, "actor.human"))
+
+    def test_groups_are_separate(self):
+        self.grid.update("qr_1", 5, 5, 0, "actor.qr")
+        self.assertEqual(self.grid.query(5, 5, 0, "actor.human"), set())
+        self.assertEqual(self.grid.query(5, 5, 0), {"qr_1"})
+
+    def test_move_and_remove(self):
+        self.grid.update("robot_1", 5, 5, 0, "robots")
+        self.grid.update("robot_1", 500, 500, 0, "robots")
+        self.assertEqual(self.grid.query(5, 5, 0, "robots"), set())
+        self.assertEqual(self.grid.query(500, 500, 0, "robots"), {"robot_1"})
+        self.grid.remove("robot_1")
+        self.assertEqual(len(self.grid), 0)
+        self.assertEqual(self.grid.cells, {})
+
+    def test_large_ranges(self):
+        self.grid.update("thermostat_1", 0, 0, 10000, "env.actuator.thermostat")
+        self.assertIn("thermostat_1",
+            self.grid.query(3000, 3000, 0, "env.actuator.thermostat"))
+        self.grid.update("human_1", 3000, 3000, 0, "actor.human")
+        self.assertIn("human_1", self.grid.query(0, 0, 10000, "actor.human"))
+
+if __name__ == "__main__":
+    unittest.main()
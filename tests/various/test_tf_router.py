@@ -0,0 +1,106 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+
+from stream_simulator.connectivity import CommlibFactory
+from stream_simulator.connectivity.inproc import InprocBus
+from stream_simulator.transformations import TfRouter
+
+class Shard:
+    # Stand-in of a tf shard: records its calls, answers every batch query
+    # with its own name
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+        self.failing = False
+        self.services = []
+        for rpc in ["declare", "setup", "get_affections", "get_affections_batch"]:
+            s = CommlibFactory.getRPCService(
+                rpc_name = f"test.tf.{name}.{rpc}",
+                callback = lambda message, meta, rpc = rpc: \
+                    self.callback(rpc, message)
+            )
+            s.run()
+            self.services.append(s)
+
+    def callback(self, rpc, message):
+        self.calls.append((rpc, message))
+        if self.failing:
+            raise Exception(f"{self.name} is down")
+        if rpc == "get_affections_batch":
+            return {"affections": {n: self.name for n in message['names']}}
+        return {"shard": self.name}
+
+    def names(self, rpc):
+        return [m for r, m in self.calls if r == rpc]
+
+class TestTfRouter(unittest.TestCase):
+    def setUp(self):
+        self.inproc_brokers = CommlibFactory.inproc_brokers
+        CommlibFactory.inproc_brokers = ["redis", "amqp"]
+        InprocBus.reset()
+        self.shards = {n: Shard(n) for n in ["west", "east"]}
+        self.router = TfRouter(base = "test", shards = [
+            {'name': "west", 'x': [0, 50]},
+            {'name': "east", 'x': [50, 100]}
+        ])
+        self.declare = CommlibFactory.getRPCClient(rpc_name = "test.tf.declare")
+
+    def tearDown(self):
+        self.router.stop()
+        InprocBus.reset()
+        CommlibFactory.inproc_brokers = self.inproc_brokers
+
+    def declaration(self, name, x, host = None):
+        ret = {'name': name, 'pose': {'x': x, 'y': 0, 'theta': None}}
+        if host is not None:
+            ret['host'] = host
+            ret['host_type'] = "robot"
+        return ret
+
+    def test_batch_split_by_region(self):
+        self.declare.call(self.declaration("sonar_1", 10))
+        self.declare.call(self.declaration("sonar_2", 80))
+        # Both shards hold the whole world
+        for s in self.shards.values():
+            self.assertEqual(len(s.names("declare")), 2)
+
+        res = CommlibFactory.getRPCClient(
+            rpc_name = "test.tf.get_affections_batch"
+        ).call({"names": ["sonar_1", "sonar_2", "unknown"]})
+        self.assertEqual(res, {"affections": {
+            "sonar_1": "west", "sonar_2": "east", "unknown": "west"
+        }})
+        self.assertEqual(self.shards["west"].names("get_affections_batch"),
+            [{"names": ["sonar_1", "unknown"]}])
+        self.assertEqual(self.shards["east"].names("get_affections_batch"),
+            [{"names": ["sonar_2"]}])
+
+    def test_follows_robot_poses(self):
+        self.declare.call(self.declaration("sonar_1", 0, host = "robot_1"))
+        CommlibFactory.getRPCClient(rpc_name = "test.tf.setup").call({})
+        get = CommlibFactory.getRPCClient(rpc_name = "test.tf.get_affections")
+        self.assertEqual(get.call({"name": "sonar_1"}), {"shard": "west"})
+
+        CommlibFactory.getPublisher(topic = "robot.robot_1.pose").publish({
+            "name": "robot.robot_1", "x": 80, "y": 0, "theta": 0
+        })
+        deadline = time.time() + 1
+        while self.router.shard_of("sonar_1") != "east" and \
+                time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(get.call({"name": "sonar_1"}), {"shard": "east"})
+
+    def test_broadcast_tolerates_failing_shard(self):
+        self.shards["west"].failing = True
+        res = self.declare.call(self.declaration("sonar_1", 10))
+        self.assertEqual(res, {"shard": "east"})
+
+        self.shards["east"].failing = True
+        with self.assertRaises(Exception):
+            self.declare.call(self.declaration("sonar_2", 10))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+
+from stream_simulator.base_classes.tick_scheduler import TickScheduler
+
+class TestTickScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = TickScheduler(workers = 2)
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_rates(self):
+        ticks = {'fast': [], 'slow': []}
+        self.scheduler.add(lambda: ticks['fast'].append(time.time()), 50)
+        self.scheduler.add(lambda: ticks['slow'].append(time.time()), 10)
+        time.sleep(0.55)
+        self.assertTrue(25 <= len(ticks['fast']) <= 28)
+        self.assertTrue(5 <= len(ticks['slow']) <= 6)
+
+    def test_no_drift(self):
+        # Work taking most of the period does not delay the next ticks
+        def work():
+            ticks.append(time.time())
+            time.sleep(0.015)
+        ticks = []
+        job = self.scheduler.add(work, 50)
+        time.sleep(0.5)
+        job.cancel()
+        self.assertTrue(len(ticks) >= 23)
+        self.assertEqual(job.missed, 0)
+
+    def test_stop_jobs(self):
+        state = {'enabled': True, 'n': 0, 'm': 0}
+        def count():
+            state['n'] += 1
+        def other():
+            state['m'] += 1
+        self.scheduler.add(count, 100, active = lambda: state['enabled'])
+        job = self.scheduler.add(other, 100)
+        time.sleep(0.1)
+        state['enabled'] = False
+        job.cancel()
+        time.sleep(0.02)
+        n, m = state['n'], state['m']
+        time.sleep(0.1)
+        self.assertEqual((state['n'], state['m']), (n, m))
+
+if __name__ == "__main__":
+    unittest.main()
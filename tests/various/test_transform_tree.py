@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import unittest
+
+from stream_simulator.transformations.transform_tree import TransformTree
+
+class TestTransformTree(unittest.TestCase):
+    def setUp(self):
+        # robot_1 -> pan_tilt_1 -> pan_tilt_2 -> camera_1
+        self.tree = TransformTree()
+        self.tree.add("camera_1", {'x': 0, 'y': 1, 'theta': 0.1}, "pan_tilt_2")
+        self.tree.add("pan_tilt_2", {'x': 2, 'y': 0, 'theta': 0.2}, "pan_tilt_1")
+        self.tree.add("pan_tilt_1", {'x': 5, 'y': 5, 'theta': 0.3}, "robot_1")
+        self.tree.add("sonar_1", {'x': 0, 'y': 0, 'theta': None}, "robot_1")
+        self.tree.add("fire_1", {'x': 3, 'y': 4, 'theta': None})
+        self.tree.set_kind("robot_1", "robot")
+        self.tree.set_kind("pan_tilt_1", "pan_tilt")
+        self.tree.set_kind("pan_tilt_2", "pan_tilt")
+
+    def test_static_and_unposed(self):
+        self.assertEqual(self.tree["fire_1"], {'x': 3, 'y': 4, 'theta': None})
+        self.assertNotIn("robot_1", self.tree)
+        # Devices of a robot without pose stay at their relative pose
+        self.assertEqual(self.tree["pan_tilt_1"]['x'], 5)
+
+    def test_nested_poses(self):
+        self.tree.set_pose("robot_1", 10, 20, 1.0)
+        self.assertEqual(self.tree["sonar_1"], {'x': 10, 'y': 20, 'theta': None})
+        pt_1 = self.tree["pan_tilt_1"]
+        self.assertEqual((pt_1['x'], pt_1['y']), (10, 20))
+        self.assertAlmostEqual(pt_1['theta'], 1.3)
+        # Devices on a robot's pan-tilts are placed at the robot
+        cam = self.tree["camera_1"]
+        self.assertEqual((cam['x'], cam['y']), (10, 20))
+        self.assertAlmostEqual(cam['theta'], 1.6)
+
+        self.tree.set_pan("pan_tilt_1", 0.5)
+        self.tree.set_pan("pan_tilt_2", -0.1)
+        self.assertAlmostEqual(self.tree["camera_1"]['theta'], 2.0)
+
+    def test_environment_pan_tilt(self):
+        self.tree.add("pan_tilt_3", {'x': 5, 'y': 5, 'theta': 0.3})
+        self.tree.add("camera_2", {'x': 1, 'y': -1, 'theta': 0.1}, "pan_tilt_3")
+        self.tree.set_kind("pan_tilt_3", "pan_tilt")
+        self.tree.set_pan("pan_tilt_3", 0.5)
+        cam = self.tree["camera_2"]
+        self.assertEqual((cam['x'], cam['y']), (6, 4))
+        self.assertAlmostEqual(cam['theta'], 0.9)
+
+    def test_dirty_propagation(self):
+        self.tree.set_pose("robot_1", 0, 0, 0)
+        for n in self.tree:
+            if n in self.tree:
+                self.tree.get(n)
+        moved = self.tree.set_pose("robot_1", 1, 1, math.pi)
+        self.assertEqual(
+            sorted(moved),
+            ["camera_1", "pan_tilt_1", "pan_tilt_2", "robot_1", "sonar_1"]
+        )
+        # Already dirty, nothing newly marked
+        self.assertEqual(self.tree.set_pose("robot_1", 2, 2, math.pi), [])
+        self.assertEqual(self.tree["camera_1"]['x'], 2)
+        self.assertEqual(
+            sorted(self.tree.set_pan("pan_tilt_2", 0.1)),
+            ["camera_1", "pan_tilt_2"]
+        )
+
+if __name__ == "__main__":
+    unittest.main()